@@ -158,3 +158,10 @@ WJS_NEWSLETTER_TOKEN_SALT = "CHANGEME"
 
 ENABLE_FULL_TEXT_SEARCH = True
 CORE_FILETEXT_MODEL = "core.PGFileText"
+
+# Run the steps of Insert Many Users in background jobs (see the command run_imu_jobs)
+WJS_IMU_ASYNC = False
+
+# Only record emails in the outbox, and let the command send_outbox send them (see wjs.jcom_profile.outbox).
+# When this is on, the command send_outbox must run: nothing else sends the recorded emails.
+WJS_OUTBOX_ASYNC = False
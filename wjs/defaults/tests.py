@@ -54,6 +54,20 @@ class SkipMigrations(Mapping):
                 cursor = connection.cursor()
                 cursor.execute("CREATE EXTENSION IF NOT EXISTS citext;")
 
+        if key == "jcom_profile":
+            from django.db import connection
+
+            if connection.vendor == "postgresql":
+                # See migration jcom_profile.0025_author_matching_normalized_names
+                cursor = connection.cursor()
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent;")
+                cursor.execute(
+                    "CREATE OR REPLACE FUNCTION wjs_normalize_name(text) RETURNS text AS"
+                    " $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$"
+                    " LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;",
+                )
+
         return None
 
     def __contains__(self, key):
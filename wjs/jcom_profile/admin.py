@@ -19,7 +19,10 @@ from wjs.jcom_profile.models import (
     Correspondence,
     EditorAssignmentParameters,
     EditorKeyword,
+    Genealogy,
+    IMUJob,
     JCOMProfile,
+    OutboxEmail,
     Recipient,
     SpecialIssue,
 )
@@ -146,6 +149,36 @@ class EditorKeywordAdmin(admin.ModelAdmin):
     """Helper class to "admin" editor keyword."""
 
 
+@admin.register(Genealogy)
+class GenealogyAdmin(admin.ModelAdmin):
+    """Helper class to "admin" genealogies."""
+
+    list_select_related = ["parent"]
+    raw_id_fields = ["parent"]
+
+    def get_queryset(self, request):
+        """Prefetch the children, counted by Genealogy.__str__."""
+        return super().get_queryset(request).prefetch_related("children")
+
+
+@admin.register(IMUJob)
+class IMUJobAdmin(admin.ModelAdmin):
+    """Helper class to "admin" IMU jobs."""
+
+    list_display = ["pk", "special_issue", "step", "status", "created", "finished"]
+    list_filter = ["step", "status"]
+    exclude = ["data_file"]
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Helper class to "admin" the emails of the outbox."""
+
+    list_display = ["pk", "subject", "recipients", "status", "attempts", "created", "sent"]
+    list_filter = ["status", "journal"]
+    search_fields = ["subject"]
+
+
 @admin.register(Recipient)
 class RecipientAdmin(admin.ModelAdmin):
     """Helper class to "admin" recipient."""
@@ -0,0 +1,124 @@
+"""Find the Janeway accounts that match some persons (authors from wjapp, lines of an IMU file, etc.).
+
+Names are compared after normalization (unaccented and lower-cased) by
+trigram similarity. The normalization function and the trigram indexes
+are created by migration 0025_author_matching_normalized_names.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from core.models import Account
+from django.db import connection
+from django.db.models.functions import Lower
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Matches with a lower score are discarded.
+# A person with the same last name and a completely different first
+# name scores 0.67.
+MIN_SCORE = 0.6
+
+
+@dataclass
+class Person:
+    """Somebody that we are looking for. `key` is used to pair the matches to the person."""
+
+    key: Hashable
+    first_name: str = ""
+    last_name: str = ""
+    email: Optional[str] = None
+
+
+@dataclass
+class Match:
+    """An account that matches a person.
+
+    The score is 1 for accounts with the same email, otherwise it is a
+    weighted similarity of the names (the last name counts twice).
+    """
+
+    account: Account
+    score: float
+    same_email: bool = False
+
+
+NAMES_SIMILARITY_QUERY = """
+SELECT p.key, a.id,
+       similarity(wjs_normalize_name(a.last_name), wjs_normalize_name(p.last_name)) AS last_name_similarity,
+       similarity(wjs_normalize_name(coalesce(a.first_name, '')), wjs_normalize_name(p.first_name))
+         AS first_name_similarity
+FROM (VALUES {values}) AS p(key, first_name, last_name)
+JOIN core_account a ON wjs_normalize_name(a.last_name) %% wjs_normalize_name(p.last_name)
+"""
+
+
+def match_people(
+    people: Iterable[Person],
+    min_score: float = MIN_SCORE,
+    prefetch_usercods: bool = False,
+    ignore_email_case: bool = False,
+) -> Dict[Hashable, List[Match]]:
+    """Find the accounts that match each of the given persons.
+
+    All persons are resolved at once: one query on the emails and one
+    (trigram-indexed) query on the last names.
+    Emails are compared exactly, unless `ignore_email_case` is True.
+
+    Return a dictionary key -> list of matches, best first.
+    """
+    people = list(people)
+    matches = {person.key: {} for person in people}
+
+    # The key can be anything: use the position in the list in SQL
+    by_position = {str(position): person for position, person in enumerate(people)}
+
+    def normalize_email(email):
+        return email.lower() if ignore_email_case else email
+
+    people_by_email = defaultdict(list)
+    for person in people:
+        if person.email:
+            people_by_email[normalize_email(person.email)].append(person)
+    named_people = {position: person for position, person in by_position.items() if person.last_name}
+
+    scores = []
+    if people_by_email:
+        if ignore_email_case:
+            accounts = Account.objects.annotate(email_lower=Lower("email")).filter(email_lower__in=people_by_email)
+        else:
+            accounts = Account.objects.filter(email__in=people_by_email)
+        for account_id, email in accounts.values_list("id", "email"):
+            for person in people_by_email[normalize_email(email)]:
+                scores.append((person, account_id, 1.0, True))
+    if named_people:
+        values = ", ".join(["(%s, %s, %s)"] * len(named_people))
+        params = []
+        for position, person in named_people.items():
+            params.extend([position, person.first_name or "", person.last_name])
+        with connection.cursor() as cursor:
+            cursor.execute(NAMES_SIMILARITY_QUERY.format(values=values), params)
+            for position, account_id, last_name_similarity, first_name_similarity in cursor.fetchall():
+                person = by_position[position]
+                if person.first_name:
+                    score = (2 * last_name_similarity + first_name_similarity) / 3
+                else:
+                    score = last_name_similarity
+                if score >= min_score:
+                    scores.append((person, account_id, score, False))
+
+    accounts = Account.objects.filter(id__in={account_id for _, account_id, _, _ in scores})
+    if prefetch_usercods:
+        accounts = accounts.prefetch_related("usercods")
+    accounts = accounts.in_bulk()
+
+    for person, account_id, score, same_email in scores:
+        best = matches[person.key].get(account_id)
+        if best is None or (score, same_email) > (best.score, best.same_email):
+            matches[person.key][account_id] = Match(account=accounts[account_id], score=score, same_email=same_email)
+
+    return {
+        key: sorted(account_matches.values(), key=lambda match: (-match.score, match.account.id))
+        for key, account_matches in matches.items()
+    }
@@ -11,14 +11,15 @@ def get_special_issue_parameters(article):
     Get special issue EditorAssignmentParameters depending on article special issue editors.
 
     :param article: The assigned article.
-    :return: The Editor assignment parameters for a special issue article.
+    :return: The Editor assignment parameters for a special issue article, None if the special issue has no editors.
     """
     from ..models import EditorAssignmentParameters
+    from .roles import special_issue_editor_ids
 
-    return EditorAssignmentParameters.objects.filter(
-        journal=article.journal,
-        editor__in=article.articlewrapper.special_issue.editors.all(),
-    )
+    editor_ids = special_issue_editor_ids(article.articlewrapper.special_issue_id)
+    if not editor_ids:
+        return None
+    return EditorAssignmentParameters.objects.filter(journal=article.journal, editor__in=editor_ids)
 
 
 def default_assign_editors_to_articles(**kwargs) -> None:
@@ -27,42 +28,42 @@ def default_assign_editors_to_articles(**kwargs) -> None:
     from utils.logic import get_current_request
 
     from ..models import EditorAssignmentParameters
+    from .scoring import best_editor
 
     article = kwargs["article"]
-    parameters = None
-    if article.articlewrapper.special_issue:
-        if article.articlewrapper.special_issue.editors:
-            parameters = get_special_issue_parameters(article)
+    if article.articlewrapper.special_issue_id:
+        parameters = get_special_issue_parameters(article)
     else:
         parameters = EditorAssignmentParameters.objects.filter(journal=article.journal)
-    if parameters:
-        request = get_current_request()
-        assign_editor(article, parameters.order_by("workload").first().editor, "editor", request, False)
+    if parameters is not None:
+        editor = best_editor(article, parameters)
+        if editor:
+            request = get_current_request()
+            assign_editor(article, editor, "editor", request, False)
 
 
 def jcom_assign_editors_to_articles(**kwargs):
     """Assign editors to article for review. JCOM algorithm."""
-    from core.models import AccountRole, Role
     from review.logic import assign_editor
     from utils.logic import get_current_request
 
     from ..models import EditorAssignmentParameters
+    from .roles import director_ids
+    from .scoring import best_editor
 
     article = kwargs["article"]
-    parameters = None
-
-    if article.articlewrapper.special_issue:
-        if article.articlewrapper.special_issue.editors:
-            parameters = get_special_issue_parameters(article)
+    if article.articlewrapper.special_issue_id:
+        parameters = get_special_issue_parameters(article)
     else:
-        directors = AccountRole.objects.filter(
+        parameters = EditorAssignmentParameters.objects.filter(
             journal=article.journal,
-            role=Role.objects.get(slug="director"),
-        ).values_list("user")
-        parameters = EditorAssignmentParameters.objects.filter(journal=article.journal, editor__in=directors)
-    if parameters:
-        request = get_current_request()
-        assign_editor(article, parameters.order_by("workload").first().editor, "editor", request, False)
+            editor__in=director_ids(article.journal_id),
+        )
+    if parameters is not None:
+        editor = best_editor(article, parameters)
+        if editor:
+            request = get_current_request()
+            assign_editor(article, editor, "editor", request, False)
 
 
 def dispatch_assignment(**kwargs) -> None:
@@ -0,0 +1,83 @@
+"""Cached role memberships, used by the automatic assignment of articles.
+
+The members of the roles of a journal (AccountRole) and the editors of
+special issues change rarely, but they are needed at every submission.
+They are kept in Django's cache (one entry per journal and one per
+special issue) and the entries are invalidated by the signals in
+`wjs.jcom_profile.signals`.
+"""
+from typing import Dict, FrozenSet
+
+from django.core.cache import cache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Invalidation is explicit: the timeout only limits the damage of changes made bypassing the signals
+CACHE_TIMEOUT = 24 * 60 * 60
+
+DIRECTOR_ROLE = "director"
+
+
+def _journal_roles_key(journal_id) -> str:
+    return f"wjs_journal_roles_{journal_id}"
+
+
+def _special_issue_editors_key(special_issue_id) -> str:
+    return f"wjs_special_issue_editors_{special_issue_id}"
+
+
+def journal_roles(journal_id) -> Dict[str, FrozenSet[int]]:
+    """Return the ids of the members of each role of a journal (role slug → account ids)."""
+    key = _journal_roles_key(journal_id)
+    roles = cache.get(key)
+    if roles is None:
+        from core.models import AccountRole
+
+        members = {}
+        for slug, user_id in AccountRole.objects.filter(journal_id=journal_id).values_list("role__slug", "user_id"):
+            members.setdefault(slug, set()).add(user_id)
+        roles = {slug: frozenset(user_ids) for slug, user_ids in members.items()}
+        cache.set(key, roles, CACHE_TIMEOUT)
+    return roles
+
+
+def role_member_ids(journal, role_slug: str) -> FrozenSet[int]:
+    """Return the ids of the accounts that have the given role in the given journal (object or id)."""
+    journal_id = getattr(journal, "pk", journal)
+    return journal_roles(journal_id).get(role_slug, frozenset())
+
+
+def director_ids(journal) -> FrozenSet[int]:
+    """Return the ids of the directors of the given journal (object or id)."""
+    return role_member_ids(journal, DIRECTOR_ROLE)
+
+
+def special_issue_editor_ids(special_issue) -> FrozenSet[int]:
+    """Return the ids of the editors of the given special issue (object or id)."""
+    special_issue_id = getattr(special_issue, "pk", special_issue)
+    key = _special_issue_editors_key(special_issue_id)
+    editor_ids = cache.get(key)
+    if editor_ids is None:
+        from ..models import SpecialIssue
+
+        editor_ids = frozenset(
+            SpecialIssue.editors.through.objects.filter(specialissue_id=special_issue_id).values_list(
+                "account_id",
+                flat=True,
+            ),
+        )
+        cache.set(key, editor_ids, CACHE_TIMEOUT)
+    return editor_ids
+
+
+def invalidate_journal_roles(journal_id):
+    """Forget the role memberships of a journal."""
+    logger.debug(f"Invalidating cached roles of journal {journal_id}")
+    cache.delete(_journal_roles_key(journal_id))
+
+
+def invalidate_special_issue_editors(*special_issue_ids):
+    """Forget the editors of the given special issues."""
+    logger.debug(f"Invalidating cached editors of special issues {special_issue_ids}")
+    cache.delete_many([_special_issue_editors_key(special_issue_id) for special_issue_id in special_issue_ids])
@@ -0,0 +1,68 @@
+"""Rank the candidate editors of an article, using the keywords' weights of the editors and their workload.
+
+The weights (EditorKeyword.weight, set by the director) of the editors
+of a journal are loaded with one query into a sparse keyword×editor
+matrix; at submission time only the rows of the article's keywords are
+needed. The affinity of an editor with an article is the sum of the
+editor's weights of the article's keywords, reduced by the editor's
+workload; the workload itself breaks ties (see
+`workload.available_parameters`).
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from .workload import available_parameters
+
+
+class KeywordWeights:
+    """Sparse matrix keyword → editor (EditorAssignmentParameters id) → weight."""
+
+    def __init__(self, rows: Iterable[Tuple[int, int, int]]):
+        self.matrix: Dict[int, Dict[int, int]] = defaultdict(dict)
+        for keyword_id, parameters_id, weight in rows:
+            if weight:
+                self.matrix[keyword_id][parameters_id] = weight
+
+    @classmethod
+    def for_journal(cls, journal, keyword_ids: Iterable[int] = None) -> "KeywordWeights":
+        """Load the weights of the editors of a journal (only of the given keywords, if any)."""
+        from ..models import EditorKeyword
+
+        editor_keywords = EditorKeyword.objects.filter(editor_parameters__journal=journal)
+        if keyword_ids is not None:
+            editor_keywords = editor_keywords.filter(keyword_id__in=keyword_ids)
+        return cls(editor_keywords.values_list("keyword_id", "editor_parameters_id", "weight"))
+
+    def affinities(self, keyword_ids: Iterable[int]) -> Dict[int, int]:
+        """Return the sum of the weights of the given keywords for each editor (only editors with some weight)."""
+        affinities = defaultdict(int)
+        for keyword_id in keyword_ids:
+            for parameters_id, weight in self.matrix.get(keyword_id, {}).items():
+                affinities[parameters_id] += weight
+        return affinities
+
+
+def rank_editors(article, parameters, weights: KeywordWeights = None) -> List[Tuple[float, object]]:
+    """Return the available EditorAssignmentParameters among the given ones with their scores, best first.
+
+    Editors that put the brake on are excluded.
+    """
+    keyword_ids = list(article.keywords.values_list("id", flat=True))
+    if weights is None:
+        weights = KeywordWeights.for_journal(article.journal, keyword_ids)
+    affinities = weights.affinities(keyword_ids)
+    ranking = [
+        (affinities.get(parameter.pk, 0) / (1 + parameter.active_assignments), parameter)
+        for parameter in available_parameters(parameters).select_related("editor")
+    ]
+    # available_parameters orders by workload: a stable sort keeps that order among equal scores
+    ranking.sort(key=lambda score_parameter: -score_parameter[0])
+    return ranking
+
+
+def best_editor(article, parameters):
+    """Return the editor that should be assigned to the article (or None)."""
+    ranking = rank_editors(article, parameters)
+    if not ranking:
+        return None
+    return ranking[0][1].editor
@@ -1,13 +1,17 @@
 """Events-related functions."""
 from django.urls import reverse
-from utils import notify_helpers
 from utils.logger import get_logger
 
+from ..outbox import enqueue_email
+
 logger = get_logger(__name__)
 
 
 def notify_coauthors_article_submission(**kwargs):
-    """Notify co-authors of submission."""
+    """Notify co-authors of submission.
+
+    With WJS_OUTBOX_ASYNC on, the emails are only recorded in the outbox and sent by the command send_outbox.
+    """
     logger.debug("CALLED!!!")
     # FIXME: This logic is intended to be insert in janeway; this is a copy-paste of janeway
     #  src/utils/transitional_email.send_submission_acknowledgement function, with the difference that we want to
@@ -39,7 +43,7 @@ def notify_coauthors_article_submission(**kwargs):
             "author": coauthor,
             "review_unassigned_article_url": review_unassigned_article_url,
         }
-        notify_helpers.send_email_with_body_from_setting_template(
+        enqueue_email(
             request,
             "submission_coauthors_acknowledgment",
             "subject_submission_coauthors_acknowledgement",
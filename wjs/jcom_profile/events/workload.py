@@ -0,0 +1,95 @@
+"""Live workload of the editors, used by the automatic assignment of articles.
+
+The workload of an editor in a journal is the number of its active
+editor assignments, i.e. assignments on articles of that journal that
+are still waiting for an editor's decision. The counter is kept in
+EditorAssignmentParameters.active_assignments and it is updated
+incrementally by the signals in `wjs.jcom_profile.signals`.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from submission import models as submission_models
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Articles in these stages keep their editors busy.
+# Keep in sync with migration 0028_editorassignmentparameters_active_assignments.
+ACTIVE_STAGES = (
+    submission_models.STAGE_UNASSIGNED,
+    submission_models.STAGE_ASSIGNED,
+    submission_models.STAGE_UNDER_REVIEW,
+    submission_models.STAGE_UNDER_REVISION,
+)
+
+
+def is_active_stage(stage) -> bool:
+    """Tell if the editors of an article in the given stage are still working on it."""
+    return stage in ACTIVE_STAGES
+
+
+def update_workload(editors, journal, delta: int):
+    """Add delta to the number of active assignments of the given editors (accounts or ids) in the given journal."""
+    from ..models import EditorAssignmentParameters
+
+    parameters = EditorAssignmentParameters.objects.filter(editor__in=editors, journal=journal)
+    if delta < 0:
+        # Never go below zero (e.g. if the counter was out of sync)
+        parameters = parameters.filter(active_assignments__gte=-delta)
+    parameters.update(active_assignments=F("active_assignments") + delta)
+
+
+def count_active_assignments(editor, journal) -> int:
+    """Count the active assignments of an editor in a journal (with an aggregate query)."""
+    from review.models import EditorAssignment
+
+    return EditorAssignment.objects.filter(
+        editor=editor,
+        article__journal=journal,
+        article__stage__in=ACTIVE_STAGES,
+    ).count()
+
+
+def recount_workloads(journal=None):
+    """Recompute the counters of active assignments from scratch (e.g. after bulk updates of the articles)."""
+    from review.models import EditorAssignment
+
+    from ..models import EditorAssignmentParameters
+
+    active_assignments = (
+        EditorAssignment.objects.filter(
+            editor=OuterRef("editor"),
+            article__journal=OuterRef("journal"),
+            article__stage__in=ACTIVE_STAGES,
+        )
+        .order_by()
+        .values("editor")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    parameters = EditorAssignmentParameters.objects.annotate(
+        count=Coalesce(Subquery(active_assignments, output_field=IntegerField()), 0),
+    )
+    if journal:
+        parameters = parameters.filter(journal=journal)
+    for parameter in parameters.exclude(active_assignments=F("count")).select_related("editor", "journal"):
+        logger.warning(
+            f"Workload of {parameter.editor} in {parameter.journal} was {parameter.active_assignments}"
+            f" instead of {parameter.count}",
+        )
+        parameter.active_assignments = parameter.count
+        parameter.save(update_fields=["active_assignments"])
+
+
+def available_parameters(parameters):
+    """Order the given EditorAssignmentParameters by workload, excluding the editors who put the brake on.
+
+    `brake_on` is the number of active assignments from which the
+    editor should not receive new articles (0 means no brake). The
+    (manually maintained) `workload` breaks ties.
+    """
+    return parameters.filter(Q(brake_on=0) | Q(active_assignments__lt=F("brake_on"))).order_by(
+        "active_assignments",
+        "workload",
+        "pk",
+    )
@@ -0,0 +1,103 @@
+"""Look up the parent/children relations between articles (see models.Genealogy) without per-article queries.
+
+Listings can tell which articles have children (commentaries) either
+from an annotation of their queryset (`with_has_children`) or from the
+cached set of the parents of each journal (`parent_ids`), that the
+signals in `wjs.jcom_profile.signals` forget when a genealogy changes.
+`genealogy_tree` fetches all the descendants of an article at once.
+"""
+from collections import defaultdict
+from typing import Dict, FrozenSet, List
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from submission.models import Article
+
+# Invalidation is explicit: the timeout only limits the damage of changes made bypassing the signals
+CACHE_TIMEOUT = 24 * 60 * 60
+
+GENEALOGY_TREE_QUERY = """
+WITH RECURSIVE tree(parent_id, child_id, sort_value, depth, path) AS (
+    SELECT g.parent_id, c.{child}, c.{sort_value}, 1, ARRAY[g.parent_id, c.{child}]
+    FROM {genealogy} g JOIN {children} c ON c.{genealogy_fk} = g.id
+    WHERE g.parent_id = %s
+  UNION ALL
+    SELECT g.parent_id, c.{child}, c.{sort_value}, t.depth + 1, t.path || c.{child}
+    FROM tree t
+    JOIN {genealogy} g ON g.parent_id = t.child_id
+    JOIN {children} c ON c.{genealogy_fk} = g.id
+    -- an article cannot be its own ancestor
+    WHERE c.{child} <> ALL(t.path)
+)
+SELECT a.*, tree.parent_id AS genealogy_parent_id, tree.depth AS genealogy_depth
+FROM tree JOIN {article} a ON a.id = tree.child_id
+ORDER BY tree.depth, tree.parent_id, tree.sort_value
+"""
+
+
+def _parent_ids_key(journal_id) -> str:
+    return f"wjs_genealogy_parents_{journal_id}"
+
+
+def with_has_children(articles):
+    """Annotate the given Article queryset with `wjs_has_children` (see the template filter `article_has_children`)."""
+    from .models import Genealogy
+
+    children = Genealogy.children.through.objects.filter(genealogy__parent=OuterRef("pk"))
+    return articles.annotate(wjs_has_children=Exists(children))
+
+
+def parent_ids(journal) -> FrozenSet[int]:
+    """Return the ids of the articles of the given journal (object or id) that have children."""
+    journal_id = getattr(journal, "pk", journal)
+    key = _parent_ids_key(journal_id)
+    ids = cache.get(key)
+    if ids is None:
+        from .models import Genealogy
+
+        ids = frozenset(
+            Genealogy.children.through.objects.filter(genealogy__parent__journal_id=journal_id).values_list(
+                "genealogy__parent_id",
+                flat=True,
+            ),
+        )
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
+
+
+def has_children(article) -> bool:
+    """Tell if the article has children, using the annotation of `with_has_children` if present."""
+    annotated = getattr(article, "wjs_has_children", None)
+    if annotated is not None:
+        return annotated
+    return article.pk in parent_ids(article.journal_id)
+
+
+def genealogy_tree(article) -> Dict[int, List[Article]]:
+    """Return all the descendants of the given article (object or id) with one query.
+
+    The result maps the id of each parent to its children, in order.
+    Each child has the attributes `genealogy_parent_id` and
+    `genealogy_depth` (1 for the children of the given article).
+    """
+    from .models import Genealogy
+
+    children_field = Genealogy._meta.get_field("children")
+    through = children_field.remote_field.through
+    query = GENEALOGY_TREE_QUERY.format(
+        genealogy=Genealogy._meta.db_table,
+        children=through._meta.db_table,
+        genealogy_fk=through._meta.get_field("genealogy").column,
+        child=through._meta.get_field("article").column,
+        sort_value=children_field.sort_value_field_name,
+        article=Article._meta.db_table,
+    )
+    tree = defaultdict(list)
+    for child in Article.objects.raw(query, [getattr(article, "pk", article)]):
+        tree[child.genealogy_parent_id].append(child)
+    return dict(tree)
+
+
+def invalidate_parent_ids(*journal_ids):
+    """Forget the articles with children of the given journals."""
+    cache.delete_many([_parent_ids_key(journal_id) for journal_id in journal_ids])
@@ -1,14 +1,26 @@
 """Utility functions used only during data import."""
+import cProfile
+import hashlib
+import io
+import json
+import pstats
 import re
-from collections import namedtuple
-from typing import Optional
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Optional
 
 import lxml.html
 import pycountry
 import requests
-from core.models import Account, Country
+from core.models import Account, Country, File
 from django.conf import settings
+from django.core.files.base import ContentFile
 from lxml.html import HtmlElement
+from production.logic import save_galley_image
+from requests.adapters import HTTPAdapter
 from submission import models as submission_models
 from utils.logger import get_logger
 
@@ -39,6 +51,14 @@ FUNNY_LANGUAGE_CODES = {
 }
 
 
+# Number of images downloaded at the same time when importing a galley
+IMAGES_FETCH_WORKERS = 8
+# Number of concurrent requests to wjapp when prefetching articles' data
+WJAPP_FETCH_WORKERS = 4
+# Seconds to wait for wjapp to connect and to send data (see requests' timeouts)
+WJAPP_TIMEOUT = getattr(settings, "WJAPP_TIMEOUT", 30)
+
+
 FakeRequest = namedtuple("FakeRequest", ["user"])
 # Use a "technical account" (that is created if not already present)
 admin, _ = Account.objects.get_or_create(
@@ -55,23 +75,79 @@ admin, _ = Account.objects.get_or_create(
 fake_request = FakeRequest(user=admin)
 
 
+class WjappClient:
+    """Fetch the metadata of published articles from wjapp.
+
+    Requests go through a pooled session and results are cached by
+    pubid, so that an article is queried only once per run.
+
+    The session is shared by the threads of `prefetch`. This is safe as
+    used here: the threads only send GET requests, without changing the
+    session; the connection pool of the adapter and the cookie jar are
+    thread-safe. Every request times out after `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        url="https://jcom.sissa.it/jcom/services/jsonpublished",
+        api_key="WJAPP_JCOM_APIKEY",
+        max_workers=WJAPP_FETCH_WORKERS,
+        timeout=WJAPP_TIMEOUT,
+    ):
+        self.url = url
+        self.apikey = getattr(settings, api_key)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = {}
+
+    def fetch(self, pubid):
+        """Query wjapp for the given pubid (bypassing the cache)."""
+        params = {
+            "pubId": pubid,
+            "apiKey": self.apikey,
+        }
+        response = self.session.get(url=self.url, params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            logger.warning(
+                "Got HTTP code %s from wjapp (%s) for %s",
+                response.status_code,
+                self.url,
+                pubid,
+            )
+            return {}
+        return response.json()
+
+    def get(self, pubid):
+        """Get the data of the given pubid."""
+        if pubid not in self.cache:
+            self.cache[pubid] = self.fetch(pubid)
+        return self.cache[pubid]
+
+    def prefetch(self, pubids):
+        """Fetch concurrently the data of the given pubids that are not already cached.
+
+        Failed requests (e.g. timeouts) are not cached: `get` tries
+        again when the data is needed.
+        """
+        missing = [pubid for pubid in dict.fromkeys(pubids) if pubid not in self.cache]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+            jobs = {pubid: executor.submit(self.fetch, pubid) for pubid in missing}
+        for pubid, job in jobs.items():
+            try:
+                self.cache[pubid] = job.result()
+            except requests.RequestException as exception:
+                logger.warning("Cannot prefetch %s from wjapp (%s): %s", pubid, self.url, exception)
+
+
 def query_wjapp_by_pubid(pubid, url="https://jcom.sissa.it/jcom/services/jsonpublished", api_key="WJAPP_JCOM_APIKEY"):
     """Get data from wjapp."""
-    apikey = getattr(settings, api_key)
-    params = {
-        "pubId": pubid,
-        "apiKey": apikey,
-    }
-    response = requests.get(url=url, params=params)
-    if response.status_code != 200:
-        logger.warning(
-            "Got HTTP code %s from wjapp (%s) for %s",
-            response.status_code,
-            url,
-            pubid,
-        )
-        return {}
-    return response.json()
+    return WjappClient(url=url, api_key=api_key, max_workers=1).fetch(pubid)
 
 
 def set_author_country(author: Account, json_data):
@@ -224,64 +300,189 @@ def publish_article(article):
     logger.debug(f"Article {article.get_identifier('pubid')} run through Janeway's publication process")
 
 
-def promote_headings(html: HtmlElement):
+class BodyRule:
+    """A rewriting rule for the body / full-text HTML.
+
+    Rules are applied by `rewrite_body`: `visit` is called for every
+    element whose tag is in `tags` (any element if `tags` is None)
+    during a single traversal of the tree; `finish` is called once
+    after the traversal and is where the tree can be restructured
+    (elements cannot be dropped while the tree is being walked).
+    """
+
+    tags = None
+
+    def visit(self, element: HtmlElement):
+        pass
+
+    def finish(self, html: HtmlElement):
+        pass
+
+
+def rewrite_body(html: HtmlElement, rules):
+    """Apply the given rules to the tree in a single traversal.
+
+    For each element, rules are visited in the given order (so a rule
+    sees the changes done by the rules before it), and so are they
+    finished.
+    """
+    for _, element in lxml.etree.iterwalk(html, events=("start",)):
+        if not isinstance(element.tag, str):
+            # Comments and processing instructions
+            continue
+        for rule in rules:
+            if rule.tags is None or element.tag in rule.tags:
+                rule.visit(element)
+    for rule in rules:
+        rule.finish(html)
+    return html
+
+
+def still_in_tree(element: HtmlElement, html: HtmlElement):
+    """Tell if the element has not been dropped (by a rule finished before) from the tree."""
+    return element is html or any(ancestor is html for ancestor in element.iterancestors())
+
+
+class PromoteHeadings(BodyRule):
     """Promote all h2-h6 headings by one level."""
-    for level in range(2, 7):
-        for heading in html.findall(f".//h{level}"):
-            heading.tag = f"h{level-1}"
 
+    tags = {f"h{level}" for level in range(2, 7)}
 
-def drop_toc(html: HtmlElement):
+    def visit(self, element):
+        element.tag = f"h{int(element.tag[1]) - 1}"
+
+
+class DropTOC(BodyRule):
     """Drop the "manual" TOC present in Drupal body content."""
-    tocs = html.find_class("tableofcontents")
-    if len(tocs) == 0:
-        logger.warning("No TOC in WRITEME!!!")
-        return
 
-    if len(tocs) > 1:
-        logger.error("Multiple TOCs in WRITEME!!!")
+    def __init__(self):
+        self.tocs = []
 
-    tocs[0].drop_tree()
+    def visit(self, element):
+        if "tableofcontents" in (element.get("class") or "").split():
+            self.tocs.append(element)
 
+    def finish(self, html):
+        if len(self.tocs) == 0:
+            logger.warning("No TOC in WRITEME!!!")
+            return
 
-def drop_how_to_cite(html: HtmlElement, lang="eng"):
+        if len(self.tocs) > 1:
+            logger.error("Multiple TOCs in WRITEME!!!")
+
+        self.tocs[0].drop_tree()
+
+
+class DropHowToCite(BodyRule):
     """Drop the "manual" How-to-cite present in Drupal body content."""
+
+    tags = {"h2"}
     how_to_cite = {
         "eng": "How to cite",
         "spa": "Cómo citar",
         "por": "Como citar",
     }
-    # It is possible that the <h2> contains <a>s, so a xpath query
-    # such as .//h2[text()='How to cite'] might not be sufficient.
-    htc_h2 = [element for element in html.findall(".//h2") if how_to_cite[lang] in element.text_content()]
-    if len(htc_h2) == 0:
-        logger.warning("No How-to-cite in HTML.")
-        return
 
-    if len(htc_h2) > 1:
-        logger.error("Multiple How-to-cites in HTML.")
-
-    htc_h2 = htc_h2[0]
-    max_expected = 3
-    count = 0
-    while True:
-        # we are going to `drop_tree` this element, so `getnext()`
-        # should provide for new elments
-        p = htc_h2.getnext()
-        count += 1
-        if count > max_expected:
-            logger.warning("Too many elements after How-to-cite's H2 in HTML.")
-            break
-        if p is None:
-            break
-        if p.tag != "p":
-            break
-        if p.text is not None and p.text.strip() == "":
+    def __init__(self, lang="eng"):
+        self.header = self.how_to_cite[lang]
+        self.htc_h2 = []
+
+    def visit(self, element):
+        # It is possible that the <h2> contains <a>s, so a xpath query
+        # such as .//h2[text()='How to cite'] might not be sufficient.
+        if self.header in element.text_content():
+            self.htc_h2.append(element)
+
+    def finish(self, html):
+        self.htc_h2 = [element for element in self.htc_h2 if still_in_tree(element, html)]
+        if len(self.htc_h2) == 0:
+            logger.warning("No How-to-cite in HTML.")
+            return
+
+        if len(self.htc_h2) > 1:
+            logger.error("Multiple How-to-cites in HTML.")
+
+        htc_h2 = self.htc_h2[0]
+        max_expected = 3
+        count = 0
+        while True:
+            # we are going to `drop_tree` this element, so `getnext()`
+            # should provide for new elments
+            p = htc_h2.getnext()
+            count += 1
+            if count > max_expected:
+                logger.warning("Too many elements after How-to-cite's H2 in HTML.")
+                break
+            if p is None:
+                break
+            if p.tag != "p":
+                break
+            if p.text is not None and p.text.strip() == "":
+                p.drop_tree()
+                break
             p.drop_tree()
-            break
-        p.drop_tree()
 
-    htc_h2.drop_tree()
+        htc_h2.drop_tree()
+
+
+class DropFrontmatter(BodyRule):
+    """Drop <head> and the div.maketitle, but keep reivews info if present."""
+
+    tags = {"head", "div"}
+
+    def __init__(self):
+        self.heads = []
+        self.maketitle = None
+
+    def visit(self, element):
+        if element.tag == "head":
+            self.heads.append(element)
+        elif self.maketitle is None and element.get("class") == "maketitle":
+            self.maketitle = element
+
+    def finish(self, html):
+        heads = [head for head in self.heads if head.getparent() is html]
+        if len(heads) != 1:
+            logger.error(f"Found {len(heads)} (expected 1). Proceeding anyway")
+        for head in heads:
+            html.remove(head)
+
+        if self.maketitle is None or not still_in_tree(self.maketitle, html):
+            logger.error("No <div class='maketitle'> found!")
+            return
+
+        review_data = extract_reviews_info(self.maketitle)
+        if review_data is not None:
+            html.insert(0, review_data)
+
+        self.maketitle.drop_tree()
+
+
+class RemoveImagesDimensions(BodyRule):
+    """Remove dimensions from <img> tags, let Janeway decide."""
+
+    tags = {"img"}
+
+    def visit(self, element):
+        if "width" in element.attrib:
+            del element.attrib["width"]
+        if "height" in element.attrib:
+            del element.attrib["height"]
+
+
+def promote_headings(html: HtmlElement):
+    """Promote all h2-h6 headings by one level."""
+    rewrite_body(html, [PromoteHeadings()])
+
+
+def drop_toc(html: HtmlElement):
+    """Drop the "manual" TOC present in Drupal body content."""
+    rewrite_body(html, [DropTOC()])
+
+
+def drop_how_to_cite(html: HtmlElement, lang="eng"):
+    """Drop the "manual" How-to-cite present in Drupal body content."""
+    rewrite_body(html, [DropHowToCite(lang=lang)])
 
 
 def extract_reviews_info(maketitle: HtmlElement) -> Optional[HtmlElement]:
@@ -341,32 +542,12 @@ def extract_reviews_info(maketitle: HtmlElement) -> Optional[HtmlElement]:
 
 def drop_frontmatter(html: HtmlElement):
     """Drop <head> and the div.maketitle, but keep reivews info if present."""
-    heads = html.findall("head")
-
-    if len(heads) != 1:
-        logger.error(f"Found {len(heads)} (expected 1). Proceeding anyway")
-    for head in heads:
-        html.remove(head)
-
-    maketitle: HtmlElement = html.find(".//div[@class='maketitle']")
-    if maketitle is None:
-        logger.error("No <div class='maketitle'> found!")
-        return
-
-    review_data = extract_reviews_info(maketitle)
-    if review_data is not None:
-        html.insert(0, review_data)
-
-    maketitle.drop_tree()
+    rewrite_body(html, [DropFrontmatter()])
 
 
 def remove_images_dimensions(html: HtmlElement):
     """Remove dimensions from <img> tags, let Janeway decide."""
-    for img in html.findall(".//img"):
-        if "width" in img.attrib:
-            del img.attrib["width"]
-        if "height" in img.attrib:
-            del img.attrib["height"]
+    rewrite_body(html, [RemoveImagesDimensions()])
 
 
 def standalone_html_to_fragment(html_element: HtmlElement):
@@ -378,14 +559,16 @@ def standalone_html_to_fragment(html_element: HtmlElement):
     html_element.find(".//body").drop_tag()
 
 
-def process_body(body: str, style=None, lang="eng") -> bytes:
+def process_body_tree(body: str, style=None, lang="eng") -> HtmlElement:
     """Rewrite and adapt body / full-text HTML to match Janeway's expectations.
 
     Take care of
     - TOC (heading levels)
     - how-to-cite
 
-    Images included in body are done elsewhere since they require an existing galley.
+    All the rewriting is done in a single traversal of the tree.
+    Images included in body are done elsewhere since they require an
+    existing galley: the returned tree can be handed to them.
     """
     html = lxml.html.fromstring(body)
     standalone_html_to_fragment(html)
@@ -394,13 +577,15 @@ def process_body(body: str, style=None, lang="eng") -> bytes:
     # - the root element of the article must have id="main_article"
     html.set("id", "main_article")
     # - the headings that go in the toc must be h2-level, but Drupal has them at h3-level
-    promote_headings(html)
-    drop_toc(html)
-    drop_how_to_cite(html, lang=lang)
+    rules = [PromoteHeadings(), DropTOC(), DropHowToCite(lang=lang)]
     if style == "wjapp":
-        drop_frontmatter(html)
-        remove_images_dimensions(html)
-    return lxml.html.tostring(html)
+        rules.extend([DropFrontmatter(), RemoveImagesDimensions()])
+    return rewrite_body(html, rules)
+
+
+def process_body(body: str, style=None, lang="eng") -> bytes:
+    """Rewrite and adapt body / full-text HTML to match Janeway's expectations. See `process_body_tree`."""
+    return lxml.html.tostring(process_body_tree(body, style=style, lang=lang))
 
 
 def evince_language_from_filename_and_article(filename, article):
@@ -416,3 +601,196 @@ def evince_language_from_filename_and_article(filename, article):
     if "_pt" in filename:
         return "por"
     return article.language
+
+
+def stored_images_by_hash(article) -> Dict[str, File]:
+    """Map the content hash of the images already linked to the article's galleys to their File."""
+    known = {}
+    for galley in article.galley_set.all():
+        for file_obj in galley.images.all():
+            try:
+                with open(file_obj.self_article_path(), "rb") as stored_file:
+                    known[hashlib.sha256(stored_file.read()).hexdigest()] = file_obj
+            except OSError:
+                logger.warning(f"Cannot read image {file_obj.label} of {article.pk}. Not reusing it.")
+    return known
+
+
+def ingest_galley_images(article, html: HtmlElement, fetch, max_workers=IMAGES_FETCH_WORKERS):
+    """Store the images of the article's render galley and point each <img> "src" to them.
+
+    `fetch` is a callable that takes the src of an image and returns
+    its content (bytes) or None. Each src is fetched only once and all
+    fetches run concurrently; images with the same content are stored
+    only once per article (an image already linked to another galley of
+    the article is linked also to the render galley).
+    """
+    render_galley = article.get_render_galley
+    images = html.findall(".//img")
+    sources = list(dict.fromkeys(image.attrib["src"].split("?")[0] for image in images))
+    if not sources:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sources))) as executor:
+        contents = dict(zip(sources, executor.map(fetch, sources)))
+
+    known = stored_images_by_hash(article)
+    stored = {}
+    for src, content in contents.items():
+        if content is None:
+            continue
+        digest = hashlib.sha256(content).hexdigest()
+        if digest in known:
+            file_obj = known[digest]
+            render_galley.images.add(file_obj)
+            logger.debug(f"Reusing image {file_obj.label} for {src}")
+        else:
+            image_name = src.split("/")[-1]
+            file_obj = save_galley_image(
+                render_galley,
+                request=fake_request,
+                uploaded_file=ContentFile(content, name=image_name),
+                label=image_name,  # [*]
+            )
+            # [*] I tryed to look for some IPTC metadata in the image
+            # itself (Exif would probably useless as it is mostly related
+            # to the picture technical details) with `exiv2 -P I ...`, but
+            # found 3 maybe-useful metadata on ~1600 files and abandoned
+            # this idea.
+            known[digest] = file_obj
+        stored[src] = file_obj
+
+    for image in images:
+        file_obj = stored.get(image.attrib["src"].split("?")[0])
+        if file_obj is not None:
+            # TBV: the `src` attribute is relative to the article's URL
+            image.attrib["src"] = file_obj.label
+
+
+class ImportReport:
+    """Collect timings, counters and failures of an import run.
+
+    Phases can be nested: the time spent in an inner phase is not
+    accounted to the outer one (e.g. "images" is not part of "body").
+    """
+
+    def __init__(self, profile=False):
+        self.profile = profile
+        self.started = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.failures = []
+        self.profilers = {}
+        self._lock = threading.Lock()
+        self._stack = []
+        self._phase_started = None
+
+    @contextmanager
+    def phase(self, name):
+        """Account the time spent in the block to the given phase."""
+        now = time.perf_counter()
+        if self._stack:
+            self._stop(self._stack[-1], now)
+        self._stack.append(name)
+        self.calls[name] += 1
+        self._start(name, now)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stop(self._stack.pop(), now)
+            if self._stack:
+                self._start(self._stack[-1], now)
+
+    def _start(self, name, now):
+        self._phase_started = now
+        if self.profile:
+            self.profilers.setdefault(name, cProfile.Profile()).enable()
+
+    def _stop(self, name, now):
+        self.seconds[name] += now - self._phase_started
+        if self.profile:
+            self.profilers[name].disable()
+
+    def add(self, counter, value=1):
+        """Increment the given counter (e.g. "articles", "files", "bytes"). Thread-safe."""
+        with self._lock:
+            self.counters[counter] += value
+
+    def failure(self, identifier, exception):
+        """Record a failed import. Thread-safe."""
+        with self._lock:
+            self.counters["failures"] += 1
+            self.failures.append({"id": identifier, "error": f"{exception.__class__.__name__}: {exception}"})
+
+    def as_dict(self):
+        """Return the report as a json-serializable dictionary."""
+        elapsed = time.perf_counter() - self.started
+        return {
+            "elapsed": round(elapsed, 3),
+            "phases": {
+                name: {"seconds": round(seconds, 3), "calls": self.calls[name]}
+                for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])
+            },
+            "counters": dict(self.counters),
+            "throughput": {
+                "articles_per_minute": round(self.counters.get("articles", 0) * 60 / elapsed, 2) if elapsed else 0,
+                "bytes_per_second": round(self.counters.get("bytes", 0) / elapsed) if elapsed else 0,
+            },
+            "failures": self.failures,
+        }
+
+    def as_json(self):
+        """Return the report as a json string."""
+        return json.dumps(self.as_dict(), indent=2)
+
+    def as_table(self):
+        """Return the report as a human-readable table."""
+        report = self.as_dict()
+        lines = [f"{'Phase':<20}{'Calls':>8}{'Seconds':>12}{'%':>8}"]
+        for name, phase in report["phases"].items():
+            share = phase["seconds"] * 100 / report["elapsed"] if report["elapsed"] else 0
+            lines.append(f"{name:<20}{phase['calls']:>8}{phase['seconds']:>12.3f}{share:>8.1f}")
+        lines.append(f"{'Total':<20}{'':>8}{report['elapsed']:>12.3f}")
+        lines.append("")
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f"{name:<20}{value:>20}")
+        for name, value in report["throughput"].items():
+            lines.append(f"{name:<20}{value:>20}")
+        for failure in report["failures"]:
+            lines.append(f"FAILED {failure['id']}: {failure['error']}")
+        return "\n".join(lines)
+
+    def profile_stats(self, limit=20):
+        """Return the cProfile statistics of each phase (only when profiling)."""
+        output = io.StringIO()
+        for name, profiler in self.profilers.items():
+            output.write(f"=== {name} ===\n")
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+    def write(self, stream, json_filename=None):
+        """Write the report as a table onto the given stream, and as json onto the given file (or the stream)."""
+        stream.write(f"{self.as_table()}\n")
+        if json_filename:
+            with open(json_filename, "w") as json_file:
+                json_file.write(self.as_json())
+        else:
+            stream.write(f"{self.as_json()}\n")
+        if self.profile:
+            stream.write(self.profile_stats())
+
+
+def add_report_arguments(parser):
+    """Add to an import command the arguments that control the run report."""
+    parser.add_argument(
+        "--report-json",
+        help="Write the json report of the run (timings, counters, failures) to this file."
+        " By default it is written to stdout after the summary table.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each import phase with cProfile and print the statistics at the end of the run.",
+    )
@@ -2,15 +2,15 @@
 from urllib.parse import urlencode
 
 import mariadb
-from core.models import Account
 from django.conf import settings
 from django.core.mail import send_mail
 from django.core.management.base import BaseCommand
-from django.db.models import Q
 from journal.models import Journal
 from utils.logger import get_logger
 from utils.setting_handler import get_setting
 
+from wjs.jcom_profile.author_matching import Person, match_people
+
 logger = get_logger(__name__)
 
 
@@ -98,15 +98,17 @@ class Command(BaseCommand):
         """
         cursor.execute(statement, (options["lookback_days"],))
 
+        new_users = cursor.fetchall()
+        connection.close()
+
         message = ""
         base_url = journal.site_url()
         current_source = journal.code.lower()
-        for new_user in cursor:
+        similar_accounts_by_user = self.find_similar_accounts(new_users)
+        for new_user in new_users:
             logger.debug(f'{new_user["userCod"]} - {new_user["firstName"]} {new_user["lastName"]}')
 
-            similar_accounts = Account.objects.filter(
-                Q(email=new_user["email"]) | Q(last_name__icontains=new_user["lastName"]),
-            )
+            similar_accounts = similar_accounts_by_user[new_user["userCod"]]
 
             # Each similar account could or could not already have a mapping.
             # - the similar account does have mapping
@@ -121,7 +123,7 @@ class Command(BaseCommand):
             # Mapping are used during import from wjapp to identify existing authors.
             # See import_from_wjapp.py:241.
 
-            if similar_accounts.exists():
+            if similar_accounts:
                 logger.debug(f"  similar to {similar_accounts}")
                 message += "\n"
                 message += f"{new_user['userCod']} - {new_user['firstName']} {new_user['lastName']}"
@@ -129,8 +131,10 @@ class Command(BaseCommand):
                 message += " is similar to:\n"
 
                 for a in similar_accounts:
-                    if a.usercods.exists():
-                        for mapping in a.usercods.all():
+                    # usercods are prefetched: don't use exists()
+                    mappings = a.usercods.all()
+                    if mappings:
+                        for mapping in mappings:
                             if mapping.source != current_source:
                                 new_mapping_message = self.new_mapping_message(current_source, base_url, new_user, a)
                                 message += new_mapping_message
@@ -143,6 +147,27 @@ class Command(BaseCommand):
 
         return message
 
+    def find_similar_accounts(self, new_users):
+        """Find the Janeway accounts similar to each of the given wjapp users.
+
+        An account is similar to a user if it has the same email or a
+        similar name (see `wjs.jcom_profile.author_matching`). The
+        mappings of the accounts are prefetched.
+
+        Return a dictionary userCod -> list of accounts, most similar first.
+        """
+        people = [
+            Person(
+                key=new_user["userCod"],
+                first_name=new_user["firstName"] or "",
+                last_name=new_user["lastName"] or "",
+                email=new_user["email"],
+            )
+            for new_user in new_users
+        ]
+        matches = match_people(people, prefetch_usercods=True)
+        return {user_cod: [match.account for match in user_matches] for user_cod, user_matches in matches.items()}
+
     def new_mapping_message(self, source, url, wjapp_user, janeway_account):
         """Build and return the URL path and query string for a new mapping (aka Correspondence)."""
         params = {
@@ -0,0 +1,38 @@
+"""Create the ArticleWrappers of the articles that don't have one."""
+from django.core.management.base import BaseCommand
+from submission.models import Article
+from utils.logger import get_logger
+
+from wjs.jcom_profile.models import ArticleWrapper
+
+logger = get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = (  # NOQA A003
+        "Create the missing ArticleWrappers (e.g. of bulk-created articles, that skip the signal creating them)."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to command."""
+        parser.add_argument(
+            "--journal-code",
+            help="Only consider the articles of this journal.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the articles without wrapper.",
+        )
+
+    def handle(self, *args, **options):
+        """Command entry point."""
+        articles = Article.objects.filter(articlewrapper__isnull=True)
+        if options["journal_code"]:
+            articles = articles.filter(journal__code=options["journal_code"])
+        if options["dry_run"]:
+            self.stdout.write(f"{articles.count()} articles without wrapper.")
+            return
+        created = ArticleWrapper.create_missing(articles.values_list("pk", flat=True))
+        logger.info(f"Created {created} article wrappers.")
+        self.stdout.write(f"Created {created} article wrappers.")
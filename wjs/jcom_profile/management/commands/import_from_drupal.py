@@ -1,4 +1,6 @@
 """Data migration POC."""
+import hashlib
+import json
 import os
 from datetime import datetime
 from io import BytesIO
@@ -20,19 +22,22 @@ from django.utils import timezone
 from identifiers import models as identifiers_models
 from journal import models as journal_models
 from lxml.html import HtmlElement
-from production.logic import save_galley, save_galley_image, save_supp_file
+from production.logic import save_galley, save_supp_file
 from requests.auth import HTTPBasicAuth
 from submission import models as submission_models
 from utils.logger import get_logger
 
 from wjs.jcom_profile import models as wjs_models
 from wjs.jcom_profile.import_utils import (
+    ImportReport,
+    WjappClient,
+    add_report_arguments,
     decide_galley_label,
     drop_existing_galleys,
     fake_request,
-    process_body,
+    ingest_galley_images,
+    process_body_tree,
     publish_article,
-    query_wjapp_by_pubid,
     set_author_country,
     set_language,
     set_language_specific_field,
@@ -127,25 +132,37 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Command entry point."""
         self.options = options
+        self.report = ImportReport(profile=options["profile"])
+        self.pending_hashes = {}
+        journal_data = JOURNALS_DATA[options["journal-code"]]
+        self.wjapp_client = WjappClient(url=journal_data["wjapp_url"], api_key=journal_data["wjapp_api_key"])
         self.prepare()
 
         for raw_data in self.find_articles():
-            if interesting_year := self.options["year"]:
-                article_year = rome_timezone.localize(datetime.fromtimestamp(int(raw_data["field_year"]))).year
-                if article_year < int(interesting_year):
-                    continue
-            elif interesting_pubids := self.options["ids"]:
-                interesting_pubids = interesting_pubids.split(",")
-                if raw_data["field_id"] not in interesting_pubids:
-                    continue
+            if not self.is_interesting(raw_data):
+                continue
 
             try:
                 self.process(raw_data)
             except Exception as e:
                 logger.critical("Failed import for %s (%s)!\n%s", raw_data["field_id"], raw_data["nid"], e)
+                self.report.failure(raw_data["field_id"], e)
                 # raise e
 
         self.tidy_up()
+        self.report.write(self.stdout, json_filename=options["report_json"])
+
+    def is_interesting(self, raw_data):
+        """Tell if the node should be processed, according to the --year and --ids filters."""
+        if interesting_year := self.options["year"]:
+            article_year = rome_timezone.localize(datetime.fromtimestamp(int(raw_data["field_year"]))).year
+            if article_year < int(interesting_year):
+                return False
+        elif interesting_pubids := self.options["ids"]:
+            interesting_pubids = interesting_pubids.split(",")
+            if raw_data["field_id"] not in interesting_pubids:
+                return False
+        return True
 
     def add_arguments(self, parser):
         """Add arguments to command."""
@@ -183,6 +200,12 @@ class Command(BaseCommand):
             action="store_true",
             help="Do create a thumbnail for the article from the large image.",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-run all import steps, even if the source data did not change since the last import.",
+        )
+        add_report_arguments(parser)
         parser.add_argument(
             "journal-code",
             help="Toward which journal to import.",
@@ -212,10 +235,12 @@ class Command(BaseCommand):
             params.setdefault("field_id", self.options["id"])
         else:
             params.setdefault("type", "Document")
-        response = requests.get(url, params, auth=self.basic_auth)
+        with self.report.phase("fetch"):
+            response = requests.get(url, params, auth=self.basic_auth)
         assert response.status_code == 200, f"Got {response.status_code}!"
         response_json = response.json()
         batch = response_json["list"]
+        self.prefetch_wjapp(batch)
         while True:
             if not batch:
                 if "next" not in response_json:
@@ -234,9 +259,11 @@ class Command(BaseCommand):
                 # Warning: url cannot be used as it is: it lacks the ".json"
                 url += ".json"
                 params = dict(parse_qsl(u.query))
-                response = requests.get(url, params, auth=self.basic_auth)
+                with self.report.phase("fetch"):
+                    response = requests.get(url, params, auth=self.basic_auth)
                 response_json = response.json()
                 batch.extend(response_json["list"])
+                self.prefetch_wjapp(response_json["list"])
                 logger.debug(" ------------- Next batch -------------")
             raw_data = batch.pop(0)
             yield raw_data
@@ -255,23 +282,84 @@ class Command(BaseCommand):
             article = submission_models.Article.objects.get(pk=article_pk)
             return article
 
-        self.wjapp = self.data_from_wjapp(raw_data)
-        article = self.create_article(raw_data)
-        self.set_identifiers(article, raw_data)
-        self.set_history(article, raw_data)
-        self.set_files(article, raw_data)
-        self.set_supplementary_material(article, raw_data)
-        self.set_image(article, raw_data)
-        self.set_abstract(article, raw_data)
-        self.set_body(article, raw_data)
-        self.set_keywords(article, raw_data)
-        self.set_issue(article, raw_data)
-        self.set_authors(article, raw_data)
-        self.set_license(article, raw_data)
-        publish_article(article)
+        with self.report.phase("wjapp"):
+            self.wjapp = self.data_from_wjapp(raw_data)
+        with self.report.phase("create"):
+            article = self.create_article(raw_data)
+            self.set_identifiers(article, raw_data)
+            self.set_history(article, raw_data)
+        # Each step hashes what it reads, including what previous steps
+        # set on the article (e.g. `set_files` infers the language of
+        # JCOM articles from their galleys).
+        # Galleys and body go together: `set_files` drops all galleys, including the body's one.
+        if self.has_changed(
+            article, "galleys", raw_data["field_attachments"], raw_data["body"], raw_data.get("language")
+        ):
+            with self.report.phase("files"):
+                self.set_files(article, raw_data)
+            with self.report.phase("body"):
+                self.set_body(article, raw_data)
+            self.mark_imported(article, "galleys")
+        with self.report.phase("files"):
+            if self.has_changed(article, "supplementary_material", raw_data["field_additional_files"]):
+                self.set_supplementary_material(article, raw_data)
+                self.mark_imported(article, "supplementary_material")
+            image_options = (self.options["article_image_meta_only"], self.options["article_image_thumbnail"])
+            if self.has_changed(article, "image", raw_data["field_image"], image_options):
+                self.set_image(article, raw_data)
+                self.mark_imported(article, "image")
+        with self.report.phase("create"):
+            if self.has_changed(article, "abstract", raw_data["field_abstract"], article.language):
+                self.set_abstract(article, raw_data)
+                self.mark_imported(article, "abstract")
+            if self.has_changed(article, "keywords", raw_data["field_keywords"]):
+                self.set_keywords(article, raw_data)
+                self.mark_imported(article, "keywords")
+            if self.has_changed(
+                article,
+                "issue",
+                raw_data["field_issue"],
+                raw_data["field_type"],
+                raw_data["field_volume"],
+                article.date_published,
+            ):
+                self.set_issue(article, raw_data)
+                self.mark_imported(article, "issue")
+            if self.has_changed(
+                article,
+                "authors",
+                raw_data["field_authors"],
+                self.wjapp,
+                article.date_published >= HISTORY_EXPECTED_DATE,
+            ):
+                self.set_authors(article, raw_data)
+                self.mark_imported(article, "authors")
+            self.set_license(article, raw_data)
+            publish_article(article)
+        self.report.add("articles")
         self.set_children(article, raw_data)
         return article
 
+    def has_changed(self, article, step, *source_data):
+        """Tell if the source data of an import step changed since the last import of the article.
+
+        The hash of the source data is kept aside and stored by `mark_imported`
+        only when the step completes.
+        """
+        digest = hashlib.sha256(json.dumps(source_data, sort_keys=True, default=str).encode()).hexdigest()
+        if not self.options["force"] and article.articlewrapper.import_hashes.get(step) == digest:
+            logger.debug("  %s - %s unchanged. Skipping.", article.get_identifier("pubid"), step)
+            self.report.add("skipped_steps")
+            return False
+        self.pending_hashes[(article.pk, step)] = digest
+        return True
+
+    def mark_imported(self, article, step):
+        """Record that an import step has been done with the source data seen by `has_changed`."""
+        wrapper = article.articlewrapper
+        wrapper.import_hashes[step] = self.pending_hashes.pop((article.pk, step))
+        wrapper.save(update_fields=["import_hashes"])
+
     def create_article(self, raw_data):
         """Create a stub for an article with basic metadata.
 
@@ -298,6 +386,11 @@ class Command(BaseCommand):
             article.save()
             article.articlewrapper.nid = self.nid
             article.articlewrapper.save()
+        elif wjs_models.ArticleWrapper.create_missing([article]):
+            # Articles that were bulk-created (or created before this app was installed) may lack their wrapper
+            logger.warning("Created missing wrapper of article %s.", article.pk)
+            article.articlewrapper.nid = self.nid
+            article.articlewrapper.save()
         assert article.articlewrapper.nid == self.nid
 
         # I explicitly receive the language info only for JCOMAL.
@@ -584,8 +677,8 @@ class Command(BaseCommand):
 
         name = "body.html"
         label = "HTML"
-        body_bytes = process_body(body, lang=article.language)
-        body_as_file = File(BytesIO(body_bytes), name)
+        body_tree = process_body_tree(body, lang=article.language)
+        body_as_file = File(BytesIO(lxml.html.tostring(body_tree)), name)
         new_galley = save_galley(
             article,
             request=fake_request,
@@ -594,6 +687,8 @@ class Command(BaseCommand):
             label=label,
             save_to_disk=True,
             public=True,
+            # The file is re-written from body_tree when mangling the images
+            html_prettify=False,
         )
         expected_mimetype = "text/html"
         acceptable_mimetypes = [
@@ -610,7 +705,7 @@ class Command(BaseCommand):
             new_galley.file.mime_type = "text/html"
             new_galley.file.save()
         article.render_galley = new_galley
-        self.mangle_images(article)
+        self.mangle_images(article, body_tree)
         article.save()
         logger.debug("  %s - body (as html galley)", raw_data["field_id"])
 
@@ -923,6 +1018,8 @@ class Command(BaseCommand):
     def uploaded_file(self, url, name):
         """Download a file from the given url and upload it into Janeway."""
         response = requests.get(url, auth=self.basic_auth)
+        self.report.add("files")
+        self.report.add("bytes", len(response.content))
         return File(BytesIO(response.content), name)
 
     def fetch_data_dict(self, uri):
@@ -936,66 +1033,70 @@ class Command(BaseCommand):
             # Too much noise: logger.debug(f"Removed lang code {lang_code} from {uri}")
             uri = uri_nolang
         uri += ".json"
-        response = requests.get(uri, auth=self.basic_auth)
+        with self.report.phase("fetch"):
+            response = requests.get(uri, auth=self.basic_auth)
         if response.status_code != 200:
             logger.critical(f"Got {response.status_code} for {uri}!")
             raise FileNotFoundError()
         return response.json()
 
     # Adapted from plugins/imports/logic.py
-    def mangle_images(self, article):
-        """Download all <img>s in the article's galley and adapt the "src" attribute."""
+    def mangle_images(self, article, html: HtmlElement = None):
+        """Download all <img>s in the article's galley and adapt the "src" attribute.
+
+        If not given, the galley's tree is read from the galley file.
+        """
         render_galley = article.get_render_galley
         galley_file: core_models.File = render_galley.file
-        # NB: cannot use `body` from the json dict here because it has already been modified
-        galley_string: str = galley_file.get_file(article)
-        html: HtmlElement = lxml.html.fromstring(galley_string)
-        images = html.findall(".//img")
-        for image in images:
-            img_src = image.attrib["src"].split("?")[0]
-            img_obj: core_models.File = self.download_and_store_article_file(img_src, article)
-            # TBV: the `src` attribute is relative to the article's URL
-            image.attrib["src"] = img_obj.label
+        if html is None:
+            # NB: cannot use `body` from the json dict here because it has already been modified
+            galley_string: str = galley_file.get_file(article)
+            html = lxml.html.fromstring(galley_string)
+        with self.report.phase("images"):
+            ingest_galley_images(article, html, fetch=self.download_image)
 
         with open(galley_file.self_article_path(), "wb") as out_file:
             out_file.write(lxml.html.tostring(html, pretty_print=False))
 
-    def download_and_store_article_file(self, image_source_url, article):
-        """Downaload a media file and link it to the article."""
-        image_name = image_source_url.split("/")[-1]
+    def download_image(self, image_source_url):
+        """Download a media file and return its content (or None)."""
         if not image_source_url.startswith("http"):
             if "base_url" not in self.options:
                 logger.error("Unknown image src for %s", image_source_url)
                 return None
             image_source_url = f"{self.options['base_url']}{image_source_url}"
-        image_file = self.uploaded_file(image_source_url, name=image_name)
-        new_file: core_models.File = save_galley_image(
-            article.get_render_galley,
-            request=fake_request,
-            uploaded_file=image_file,
-            label=image_name,  # [*]
-        )
-        # [*] I tryed to look for some IPTC metadata in the image
-        # itself (Exif would probably useless as it is mostly related
-        # to the picture technical details) with `exiv2 -P I ...`, but
-        # found 3 maybe-useful metadata on ~1600 files and abandoned
-        # this idea.
-        return new_file
+        response = requests.get(image_source_url, auth=self.basic_auth)
+        if response.status_code != 200:
+            logger.error("Got %s for image %s", response.status_code, image_source_url)
+            return None
+        self.report.add("files")
+        self.report.add("bytes", len(response.content))
+        return response.content
 
     def data_from_wjapp(self, raw_data):
         """Get data from wjapp."""
+        if not self.is_in_wjapp(raw_data):
+            return {}
+        return self.wjapp_client.get(raw_data["field_id"])
+
+    def is_in_wjapp(self, raw_data):
+        """Tell if wjapp is expected to know about the article."""
         # No point in interrogating wjapp before JCOM moved there
         timestamp = raw_data["field_published_date"]
         if not timestamp:
             logger.error("Missing publication date for %s. This is unexpected...", raw_data["field_id"])
         else:
             if rome_timezone.localize(datetime.fromtimestamp(int(timestamp))) < HISTORY_EXPECTED_DATE:
-                return {}
-        return query_wjapp_by_pubid(
-            raw_data["field_id"],
-            url=self.journal_data["wjapp_url"],
-            api_key=self.journal_data["wjapp_api_key"],
-        )
+                return False
+        return True
+
+    def prefetch_wjapp(self, batch):
+        """Fetch from wjapp, all at once, the data of the articles of a batch of nodes."""
+        pubids = [
+            raw_data["field_id"] for raw_data in batch if self.is_interesting(raw_data) and self.is_in_wjapp(raw_data)
+        ]
+        with self.report.phase("wjapp"):
+            self.wjapp_client.prefetch(pubids)
 
     def prepare(self):
         """Run una-tantum operations before starting any import."""
@@ -1,9 +1,16 @@
 """Data migration POC."""
 import datetime
+import fnmatch
+import multiprocessing
 import os
 import shutil
 import tempfile
+import threading
+import time
 import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
 from pathlib import Path
 
@@ -12,6 +19,7 @@ from core.models import Account
 from core.models import File as JanewayFile
 from django.core.files import File
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
 from identifiers import models as identifiers_models
 from identifiers.models import Identifier
 from jcomassistant import make_epub, make_xhtml
@@ -25,17 +33,21 @@ from jcomassistant.utils import (
 )
 from journal import models as journal_models
 from lxml.html import HtmlElement
-from production.logic import save_galley, save_galley_image, save_supp_file
+from production.logic import save_galley, save_supp_file
 from submission import models as submission_models
 from utils.logger import get_logger
 
 from wjs.jcom_profile import models as wjs_models
+from wjs.jcom_profile.author_matching import Person, match_people
 from wjs.jcom_profile.import_utils import (
+    ImportReport,
+    add_report_arguments,
     decide_galley_label,
     drop_existing_galleys,
     evince_language_from_filename_and_article,
     fake_request,
-    process_body,
+    ingest_galley_images,
+    process_body_tree,
     publish_article,
     query_wjapp_by_pubid,
     set_author_country,
@@ -48,6 +60,12 @@ from wjs.jcom_profile.management.commands.import_from_drupal import (
 )
 from wjs.jcom_profile.utils import from_pubid_to_eid, generate_doi
 
+try:
+    # Optional: without inotify we fall back to polling the watched folder.
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
 # Map wjapp article types to Janeway section names
 SECTIONS_MAPPING = {
     "editorial": "Editorial",
@@ -78,7 +96,15 @@ class Command(BaseCommand):
         """Command entry point."""
         self.options = options
         self.journal_data = JOURNALS_DATA[options["journal-code"]]
-        self.read_from_watched_dir()
+        if options["watch"]:
+            # Every import is reported by the worker that runs it.
+            self.watch()
+        else:
+            self.report = ImportReport(profile=options["profile"])
+            try:
+                self.read_from_watched_dir()
+            finally:
+                self.report.write(self.stdout, json_filename=options["report_json"])
 
     def add_arguments(self, parser):
         """Add arguments to command."""
@@ -92,21 +118,151 @@ class Command(BaseCommand):
             default="/home/wjs/received-from-wjapp",
             help="Where to keep zip files received from wjapp (and processed). Defaults to %(default)s",
         )
+        parser.add_argument(
+            "--error-dir",
+            default="/home/wjs/failed-from-wjapp",
+            help="In watch mode, where to move zip files that could not be imported. Defaults to %(default)s",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and import zip files as soon as they land in the watch dir.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="In watch mode, how many zip files can be imported concurrently. Defaults to %(default)s",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=30,
+            help="In watch mode, seconds between two scans of the watch dir when inotify is not available."
+            " Defaults to %(default)s",
+        )
+        add_report_arguments(parser)
         parser.add_argument(
             "journal-code",
             choices=["JCOM", "JCOMAL"],
             help="Toward which journal to import.",
         )
 
-    def read_from_watched_dir(self):
-        """Read zip files from the watched folder and start the import process."""
+    def get_watch_dir(self):
+        """Return the watched folder, ensuring that it exists."""
         if not os.path.isdir(self.options["watch_dir"]):
             logger.critical(f"No such directory {self.options['watch_dir']}")
             raise FileNotFoundError(f"No such directory {self.options['watch_dir']}")
-        watch_dir = Path(self.options["watch_dir"])
+        return Path(self.options["watch_dir"])
+
+    def read_from_watched_dir(self):
+        """Read zip files from the watched folder and start the import process."""
+        watch_dir = self.get_watch_dir()
         files = sorted(watch_dir.glob("*.zip"))
         for zip_file in files:
-            self.process(watch_dir / zip_file)
+            try:
+                self.process(watch_dir / zip_file)
+            except Exception as exception:
+                self.report.failure(zip_file.name, exception)
+                raise
+
+    def watch(self):
+        """Keep running and import zip files as soon as they land in the watched folder.
+
+        Zip files are imported by a bounded pool of worker processes
+        forked from this one, so that Django is set up only once.
+        """
+        watch_dir = self.get_watch_dir()
+        # Zip files queued or being imported, to avoid picking up the same file twice.
+        self.in_flight = set()
+        # Zip files that failed and could not be moved out of the watched folder (path → mtime).
+        self.failed = {}
+        self.in_flight_lock = threading.Lock()
+
+        self.worker_options = {k: v for k, v in self.options.items() if k not in ("stdout", "stderr")}
+        self.executor = self.make_executor()
+        try:
+            # Pick up what arrived while we were not watching...
+            for zip_file in find_new_zip_files(watch_dir, self.in_flight):
+                self.submit(zip_file)
+            # ...then wait for new arrivals
+            for zip_file in self.wait_for_zip_files(watch_dir):
+                self.submit(zip_file)
+        except KeyboardInterrupt:
+            logger.info(f"Stop watching {watch_dir}. Waiting for running imports to finish.")
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def make_executor(self):
+        """Return a new pool of worker processes, forked from this one."""
+        # Forked workers must not share the DB connection of the parent: close it
+        # here and let every worker open its own.
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=self.options["workers"],
+            mp_context=multiprocessing.get_context("fork"),
+        )
+
+    def submit(self, zip_file):
+        """Queue the given zip file for import (if it is not queued already and did not fail already)."""
+        with self.in_flight_lock:
+            if zip_file in self.in_flight or (zip_file in self.failed and self.failed[zip_file] == mtime(zip_file)):
+                return
+            self.in_flight.add(zip_file)
+            self.failed.pop(zip_file, None)
+        logger.debug(f"Queueing {zip_file}")
+        try:
+            future = self.executor.submit(process_zip_file, self.worker_options, zip_file)
+        except BrokenProcessPool:
+            # A worker died abruptly (e.g. killed for using too much memory): the pool cannot be used anymore
+            logger.error("The pool of workers is broken. Starting a new one.")
+            self.executor.shutdown(wait=False)
+            self.executor = self.make_executor()
+            future = self.executor.submit(process_zip_file, self.worker_options, zip_file)
+
+        def done(future):
+            if exception := future.exception():
+                logger.error(f"Import of {zip_file} failed: {exception!r}")
+                self.set_aside(zip_file)
+            with self.in_flight_lock:
+                self.in_flight.discard(zip_file)
+
+        future.add_done_callback(done)
+
+    def set_aside(self, zip_file):
+        """Move a zip file whose import failed out of the watched folder, so that it is not imported again."""
+        if not zip_file.exists():
+            # It had already been moved to the store dir
+            return
+        error_dir = Path(self.options["error_dir"])
+        try:
+            error_dir.mkdir(parents=True, exist_ok=True)
+            shutil.move(zip_file, error_dir / zip_file.name)
+        except OSError as exception:
+            logger.error(f"Cannot move {zip_file} to {error_dir} ({exception}). Ignoring it until it changes.")
+            with self.in_flight_lock:
+                self.failed[zip_file] = mtime(zip_file)
+        else:
+            logger.warning(f"Moved {zip_file.name} to {error_dir}")
+
+    def wait_for_zip_files(self, watch_dir):
+        """Yield zip files as they land in the watched folder.
+
+        wjapp's upload is "atomic", so a file is ready as soon as it has
+        been closed or moved into the folder.
+        """
+        if inotify_simple is not None:
+            inotify = inotify_simple.INotify()
+            inotify.add_watch(watch_dir, inotify_simple.flags.CLOSE_WRITE | inotify_simple.flags.MOVED_TO)
+            while True:
+                for event in inotify.read():
+                    if event.name.endswith(".zip"):
+                        yield watch_dir / event.name
+        else:
+            logger.warning(f"inotify not available. Polling {watch_dir} every {self.options['poll_interval']}s.")
+            while True:
+                time.sleep(self.options["poll_interval"])
+                yield from find_new_zip_files(watch_dir, self.in_flight)
 
     def process(self, zip_file):
         """Uncompress the zip file, and create the importing Article from the XML metadata."""
@@ -121,27 +277,37 @@ class Command(BaseCommand):
         zip_file = store_dir / os.path.basename(zip_file)
 
         tmpdir = Path(tempfile.mkdtemp(dir=store_dir))
-        with zipfile.ZipFile(zip_file, "r") as zip_ref:
-            zip_ref.extractall(tmpdir)
+        with WjappArchive(zip_file) as archive:
+            self.process_archive(archive, tmpdir)
+            self.report.add("files", len(archive.members))
+        self.report.add("bytes", zip_file.stat().st_size)
+        self.report.add("articles")
+        # Cleanup
+        shutil.rmtree(tmpdir)
+
+    def process_archive(self, archive, tmpdir):
+        """Create the importing Article from the content of the given archive.
 
-        # Expect to find a folder
-        workdir = os.listdir(tmpdir)
-        if len(workdir) != 1:
-            logger.error(f"Found {len(workdir)} files in the root of the zip file. Trying the first: {workdir[0]}")
-        workdir = tmpdir / Path(workdir[0])
+        Only the files needed by the TeX toolchain (the src folder and
+        the XML metadata) are extracted into tmpdir; PDF files and
+        attachments are read directly from the archive.
+        """
+        workdir = tmpdir / archive.root
 
         # Expect to find one XML (and some PDF files)
-        xml_files = list(workdir.glob("*.xml"))
+        xml_files = archive.list_files("*.xml")
         if len(xml_files) == 0:
-            logger.critical(f"No XML file found in {zip_file}. Quitting and leaving a mess...")
-            raise FileNotFoundError(f"No XML file found in {zip_file}")
+            logger.critical(f"No XML file found in {archive}. Quitting and leaving a mess...")
+            raise FileNotFoundError(f"No XML file found in {archive}")
         if len(xml_files) > 1:
-            logger.warning(f"Found {len(xml_files)} XML files in {zip_file}. Using the first one {xml_files[0]}")
-        xml_file = xml_files[0]
+            logger.warning(f"Found {len(xml_files)} XML files in {archive}. Using the first one {xml_files[0]}")
+        with self.report.phase("archive"):
+            xml_file = archive.extract(xml_files[0], tmpdir)
 
         # Need to read the TeX source in order to correct the XML
         # (mainly authors names and authors order)
-        src_folder = workdir / "src"
+        with self.report.phase("archive"):
+            src_folder = archive.extract_folder("src", tmpdir)
         if not os.path.exists(src_folder):
             raise FileNotFoundError(f"Missing src folder {src_folder}")
         tex_filenames = list(src_folder.glob("JCOM*.tex"))
@@ -172,55 +338,81 @@ class Command(BaseCommand):
 
         xml_obj = preprocess_xmlfile(xml_file, tex_data)
 
-        article, pubid = self.create_article(xml_obj)
-        self.set_keywords(article, xml_obj, pubid)
-        issue = self.set_issue(article, xml_obj, pubid)
-        self.set_section(article, xml_obj, pubid, issue)
-        self.set_authors(article, xml_obj)
-        self.set_license(article)
-        self.set_pdf_galleys(article, xml_obj, pubid, workdir)
-        self.set_supplementary_material(article, pubid, workdir)
-
-        try:
-            # Generate the full-text html from the TeX sources
-            html_galley_filename = make_xhtml.make(tex_filename, alternative_tex_filename=alternative_tex_filename)
-            self.set_html_galley(article, html_galley_filename)
-
-            # Generate the EPUB from the TeX sources
-            epub_galley_filename = make_epub.make(html_galley_filename, tex_data=tex_data)
-            self.set_epub_galley(article, epub_galley_filename, pubid)
-        except Exception as exception:
-            logger.error(f"Generation of HTML and EPUB galleys failes: {exception}")
-
+        with self.report.phase("create"):
+            article, pubid = self.create_article(xml_obj)
+            self.set_keywords(article, xml_obj, pubid)
+            issue = self.set_issue(article, xml_obj, pubid)
+            self.set_section(article, xml_obj, pubid, issue)
+            self.set_authors(article, xml_obj)
+            self.set_license(article)
+        with self.report.phase("files"):
+            self.set_pdf_galleys(article, xml_obj, pubid, archive, workdir)
+            self.set_supplementary_material(article, pubid, archive)
+
+        translation_tex_filenames = []
         if multilingual:
             try:
                 for translation_tex_filename in tex_filenames[1:]:
                     correct_translation(translation_tex_filename, tex_filename)
+                    translation_tex_filenames.append(translation_tex_filename)
+            except Exception as exception:
+                logger.error(f"Correction of translation failed for {translation_tex_filename}: {exception}")
 
-                    translation_html_galley_filename = make_xhtml.make(translation_tex_filename)
-                    # TODO: verify if Janeway can manage tranlastions of HTML galley
-
-                    translation_tex_data = read_tex(translation_tex_filename)
-                    translation_epub_galley_filename = make_epub.make(
-                        translation_html_galley_filename,
-                        tex_data=translation_tex_data,
-                    )
-                    self.set_epub_galley(article, translation_epub_galley_filename, pubid)
+        with self.report.phase("body"):
+            self.set_html_and_epub_galleys(
+                article,
+                pubid,
+                tex_filename,
+                alternative_tex_filename,
+                translation_tex_filenames,
+            )
+        with self.report.phase("create"):
+            self.set_doi(article)
+            publish_article(article)
 
+    def set_html_and_epub_galleys(
+        self,
+        article,
+        pubid,
+        tex_filename,
+        alternative_tex_filename,
+        translation_tex_filenames,
+    ):
+        """Generate the HTML and EPUB galleys from the TeX sources and set them onto the article.
+
+        The main TeX source and every translation are converted by
+        independent jobs in a pool of processes. The galleys are set
+        when all jobs are done, in a stable order: the main source
+        first, then the translations in their order. Translations get
+        only the EPUB galley.
+        """
+        # Forked workers must not share the DB connection of the parent.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=1 + len(translation_tex_filenames),
+            mp_context=multiprocessing.get_context("fork"),
+        ) as executor:
+            jobs = [executor.submit(make_html_and_epub, tex_filename, alternative_tex_filename)]
+            jobs.extend(executor.submit(make_html_and_epub, filename) for filename in translation_tex_filenames)
+        for job in jobs:
+            try:
+                galleys = job.result()
             except Exception as exception:
-                logger.error(f"Generation of HTML and EPUB galley failed for {translation_tex_filename}: {exception}")
-        self.set_doi(article)
-        publish_article(article)
-        # Cleanup
-        shutil.rmtree(tmpdir)
+                logger.error(f"Generation of HTML and EPUB galleys failed: {exception}")
+                continue
+            # Filenames are relative to the folder where the conversion took place
+            os.chdir(galleys.cwd)
+            if galleys.tex_filename == tex_filename:
+                self.set_html_galley(article, galleys.html_galley_filename)
+            self.set_epub_galley(article, galleys.epub_galley_filename, pubid)
 
     def set_html_galley(self, article, html_galley_filename):
         """Set the give file as HTML galley."""
         html_galley_text = open(html_galley_filename).read()
         galley_language = evince_language_from_filename_and_article(html_galley_filename, article)
-        processed_html_galley_as_bytes = process_body(html_galley_text, style="wjapp", lang=galley_language)
+        processed_html_galley = process_body_tree(html_galley_text, style="wjapp", lang=galley_language)
         name = "body.html"
-        html_galley_file = File(BytesIO(processed_html_galley_as_bytes), name)
+        html_galley_file = File(BytesIO(lxml.html.tostring(processed_html_galley)), name)
         label = "HTML"
         new_galley = save_galley(
             article,
@@ -243,7 +435,8 @@ class Command(BaseCommand):
             new_galley.file.save()
         article.render_galley = new_galley
         article.save()
-        mangle_images(article)
+        with self.report.phase("images"):
+            mangle_images(article, processed_html_galley)
 
     def set_epub_galley(self, article, epub_galley_filename, pubid):
         """Set the give file as EPUB galley."""
@@ -268,18 +461,21 @@ class Command(BaseCommand):
 
     def set_authors(self, article, xml_obj):
         """Find and set the article's authors, creating them if necessary."""
-        wjapp = query_wjapp_by_pubid(
-            article.get_identifier("pubid"),
-            url=self.journal_data["wjapp_url"],
-            api_key=self.journal_data["wjapp_api_key"],
-        )
+        with self.report.phase("wjapp"):
+            wjapp = query_wjapp_by_pubid(
+                article.get_identifier("pubid"),
+                url=self.journal_data["wjapp_url"],
+                api_key=self.journal_data["wjapp_api_key"],
+            )
         # The "source" of this author's info, used for future reference
         source = self.journal_data["correspondence_source"]
         pubid = article.get_identifier("pubid")
         # The first set of <author> elements (the one outside
         # <document>) is guaranteed to have the names and the order
         # correct. Ignore the rest (beware "//author" != "/author")
-        for order, author_obj in enumerate(xml_obj.findall("/author")):
+        author_objs = xml_obj.findall("/author")
+        emails = []
+        for author_obj in author_objs:
             # Don't confuse user_cod (camelcased originally) that is
             # the pk of the user in wjapp with Account.id in Janeway.
             user_cod = author_obj.get("authorid")
@@ -288,19 +484,39 @@ class Command(BaseCommand):
                 email = f"{user_cod}@invalid.com"
                 logger.error(f"No email for author {user_cod} on {pubid}. Using {email}")
             # just in case:
-            email = email.strip()
+            emails.append(email.strip())
+
+        # Look for all the authors at once
+        matches = match_people(
+            Person(
+                key=order,
+                first_name=author_obj.get("firstname") or "",
+                last_name=author_obj.get("lastname") or "",
+                email=email,
+            )
+            for order, (author_obj, email) in enumerate(zip(author_objs, emails))
+        )
 
+        for order, (author_obj, email) in enumerate(zip(author_objs, emails)):
+            user_cod = author_obj.get("authorid")
             # We use the email as discriminant because it must be
             # unique. This is opposed to using the wjapp usercod,
             # because different usercod-source can have the same email
             # (same person on multiple journals)
-            author, account_created = Account.objects.get_or_create(
-                email=email,
-                defaults={
-                    "first_name": author_obj.get("firstname"),
-                    "last_name": author_obj.get("lastname"),
-                },
-            )
+            same_email = [match for match in matches[order] if match.same_email]
+            if same_email:
+                author, account_created = same_email[0].account, False
+            else:
+                author, account_created = Account.objects.get_or_create(
+                    email=email,
+                    defaults={
+                        "first_name": author_obj.get("firstname"),
+                        "last_name": author_obj.get("lastname"),
+                    },
+                )
+                # Names are not reliable enough to re-use an account, but a human can merge them later
+                if similar := [match.account for match in matches[order] if match.account != author]:
+                    logger.warning(f"Author {email} on {pubid} is similar to existing {similar}. Please check.")
             # Sanity check: it is possible that data from Janeway and from wjapp differ.
             # See also https://gitlab.sissamedialab.it/wjs/specs/-/issues/380
             if not account_created:
@@ -492,14 +708,14 @@ class Command(BaseCommand):
         article.license = submission_models.Licence.objects.get(short_name="CC BY-NC-ND 4.0", journal=article.journal)
         article.save()
 
-    def set_pdf_galleys(self, article, xml_obj, pubid, workdir):
+    def set_pdf_galleys(self, article, xml_obj, pubid, archive, workdir):
         """Set the PDF galleys: original language and tranlastion."""
         # PDF galleys
         # Should find one file (common case) or two files (original language + english translation)
-        pdf_files = list(workdir.glob("*.pdf"))
+        pdf_files = archive.list_files("*.pdf")
         if len(pdf_files) == 0:
-            logger.critical(f"No PDF file found in {workdir}. Quitting and leaving a mess...")
-            raise FileNotFoundError(f"No PDF file found in {workdir}.")
+            logger.critical(f"No PDF file found in {archive}. Quitting and leaving a mess...")
+            raise FileNotFoundError(f"No PDF file found in {archive}.")
 
         drop_existing_galleys(article)
 
@@ -534,19 +750,21 @@ class Command(BaseCommand):
             #   found, but only _after_ the tex source has been corrected
             #   to include the missing content.
 
+            # The galleys are renamed and rebuilt by jcomassistant: they must be on disk.
+            pdf_files = [archive.extract(pdf_file, workdir.parent) for pdf_file in pdf_files]
             main_pdf_filename, translation_pdf_filename = find_and_rename_main_galley(pdf_files)
             translation_pdf_file, translation_label, translation_language = rebuild_translation_galley(
                 translation_pdf_filename,
                 main_pdf_filename,
             )
             set_translation_galley(translation_pdf_file, translation_label, article)
+            uploaded_file = File(open(main_pdf_filename, "rb"), os.path.basename(main_pdf_filename))
 
         else:
-            main_pdf_filename = pdf_files[0]
+            uploaded_file = archive.open_file(pdf_files[0])
 
-        file_name = os.path.basename(main_pdf_filename)
+        file_name = uploaded_file.name
         file_mimetype = "application/pdf"  # I just know it! (sry :)
-        uploaded_file = File(open(main_pdf_filename, "rb"), file_name)
         label, language = decide_galley_label(pubid, file_name=file_name, file_mimetype=file_mimetype)
         if language and language != "en":
             if article.language != "eng":
@@ -586,6 +804,8 @@ class Command(BaseCommand):
             # means that the article has been already imported and
             # that we are re-importing.
             logger.warning(f"Re-importing existing article {pubid} at {article.id}")
+            # Articles that were bulk-created (or created before this app was installed) may lack their wrapper
+            wjs_models.ArticleWrapper.create_missing([article])
         else:
             article = submission_models.Article.objects.create(
                 journal=journal,
@@ -622,7 +842,7 @@ class Command(BaseCommand):
         article.refresh_from_db()
         return (article, pubid)
 
-    def set_supplementary_material(self, article, pubid, workdir):
+    def set_supplementary_material(self, article, pubid, archive):
         """Set supplementary files if necessary."""
         # There is no useful info in wjapp's XML file about
         # supplementary material, so we don't need any reference to
@@ -634,13 +854,9 @@ class Command(BaseCommand):
             supp_file.file = None
         article.supplementary_files.clear()
 
-        attachments_folder = workdir / "attachments"
-        if not os.path.exists(attachments_folder):
-            return
-
-        for supplementary_file in os.listdir(attachments_folder):
-            file_name = os.path.basename(supplementary_file)
-            uploaded_file = File(open(attachments_folder / supplementary_file, "rb"), file_name)
+        for supplementary_file in archive.list_files("attachments/*"):
+            uploaded_file = archive.open_file(supplementary_file)
+            file_name = uploaded_file.name
             save_supp_file(
                 article,
                 request=fake_request,
@@ -670,39 +886,129 @@ class Command(BaseCommand):
             )
 
 
-# TODO: consider refactoring with import_from_drupal
-def download_and_store_article_file(image_source_url, article):
-    """Downaload a media file and link it to the article."""
+class WjappArchive:
+    """Read-only access to the content of a zip file produced by wjapp.
+
+    The zip is expected to contain a single folder: all the names used
+    here are relative to that folder.
+    """
+
+    def __init__(self, zip_file):
+        self.zip_file = zip_file
+        self.zip_ref = zipfile.ZipFile(zip_file, "r")
+        roots = sorted({name.split("/", 1)[0] for name in self.zip_ref.namelist()})
+        if len(roots) != 1:
+            logger.error(f"Found {len(roots)} files in the root of the zip file. Trying the first: {roots[0]}")
+        self.root = roots[0]
+        self.members = {
+            info.filename.split("/", 1)[1]: info
+            for info in self.zip_ref.infolist()
+            if info.filename.startswith(f"{self.root}/") and not info.is_dir()
+        }
+
+    def __str__(self):
+        return str(self.zip_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.zip_ref.close()
+
+    def list_files(self, pattern):
+        """Return the sorted names of the files matching the given pattern.
+
+        As with Path.glob, "*" does not match across folders.
+        """
+        depth = pattern.count("/")
+        return sorted(name for name in self.members if name.count("/") == depth and fnmatch.fnmatch(name, pattern))
+
+    def open_file(self, name):
+        """Return a django File that streams the given member from the archive."""
+        info = self.members[name]
+        uploaded_file = File(self.zip_ref.open(info), name=os.path.basename(name))
+        uploaded_file.size = info.file_size
+        return uploaded_file
+
+    def extract(self, name, path):
+        """Extract the given member into path (keeping the root folder) and return its filename."""
+        return Path(self.zip_ref.extract(self.members[name], path))
+
+    def extract_folder(self, folder, path):
+        """Extract all the members of the given folder into path and return the folder name."""
+        prefix = f"{folder}/"
+        for name, info in self.members.items():
+            if name.startswith(prefix):
+                self.zip_ref.extract(info, path)
+        return Path(path) / self.root / folder
+
+
+def mtime(path):
+    """Return the modification time of a file (or None if it does not exist anymore)."""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def find_new_zip_files(watch_dir, in_flight):
+    """Return the zip files in the watched folder that are not already being imported."""
+    return [zip_file for zip_file in sorted(watch_dir.glob("*.zip")) if zip_file not in in_flight]
+
+
+GeneratedGalleys = namedtuple(
+    "GeneratedGalleys", ["tex_filename", "cwd", "html_galley_filename", "epub_galley_filename"]
+)
+
+
+def make_html_and_epub(tex_filename, alternative_tex_filename=None):
+    """Generate the full-text HTML and the EPUB from a TeX source. Run in a worker process."""
+    try:
+        html_galley_filename = make_xhtml.make(tex_filename, alternative_tex_filename=alternative_tex_filename)
+        epub_galley_filename = make_epub.make(html_galley_filename, tex_data=read_tex(tex_filename))
+    except Exception as exception:
+        # Report which source failed: the traceback of the worker is lost in the parent.
+        raise RuntimeError(f"{tex_filename}: {exception}") from exception
+    return GeneratedGalleys(tex_filename, os.getcwd(), html_galley_filename, epub_galley_filename)
+
+
+def process_zip_file(options, zip_file):
+    """Import a zip file. Run by the workers of the watch mode."""
+    close_old_connections()
+    command = Command()
+    command.options = options
+    command.journal_data = JOURNALS_DATA[options["journal-code"]]
+    command.report = ImportReport(profile=options["profile"])
+    try:
+        command.process(zip_file)
+    except Exception as exception:
+        command.report.failure(zip_file.name, exception)
+        raise
+    finally:
+        close_old_connections()
+        logger.info(f"Import report for {zip_file.name}:\n{command.report.as_table()}")
+
+
+def read_image(image_source_url):
+    """Read a media file produced by the TeX toolchain and return its content (or None)."""
     if not os.path.exists(image_source_url):
         logger.error(f"Img {image_source_url} does not exist in {os.getcwd()}")
-    image_name = image_source_url.split("/")[-1]
-    image_file = File(open(image_source_url, "rb"), name=image_name)
-    new_file: JanewayFile = save_galley_image(
-        article.get_render_galley,
-        request=fake_request,
-        uploaded_file=image_file,
-        label=image_name,  # [*]
-    )
-    # [*] I tryed to look for some IPTC metadata in the image
-    # itself (Exif would probably useless as it is mostly related
-    # to the picture technical details) with `exiv2 -P I ...`, but
-    # found 3 maybe-useful metadata on ~1600 files and abandoned
-    # this idea.
-    return new_file
+        return None
+    with open(image_source_url, "rb") as image_file:
+        return image_file.read()
+
 
+def mangle_images(article, html: HtmlElement = None):
+    """Download all <img>s in the article's galley and adapt the "src" attribute.
 
-def mangle_images(article):
-    """Download all <img>s in the article's galley and adapt the "src" attribute."""
+    If not given, the galley's tree is read from the galley file.
+    """
     render_galley = article.get_render_galley
     galley_file: JanewayFile = render_galley.file
-    galley_string: str = galley_file.get_file(article)
-    html: HtmlElement = lxml.html.fromstring(galley_string)
-    images = html.findall(".//img")
-    for image in images:
-        img_src = image.attrib["src"].split("?")[0]
-        img_obj: JanewayFile = download_and_store_article_file(img_src, article)
-        # TBV: the `src` attribute is relative to the article's URL
-        image.attrib["src"] = img_obj.label
+    if html is None:
+        galley_string: str = galley_file.get_file(article)
+        html = lxml.html.fromstring(galley_string)
+    ingest_galley_images(article, html, fetch=read_image)
 
     with open(galley_file.self_article_path(), "wb") as out_file:
         out_file.write(lxml.html.tostring(html, pretty_print=False))
@@ -0,0 +1,61 @@
+"""Run the background jobs of Insert Many Users."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from utils.logger import get_logger
+
+from wjs.jcom_profile.models import IMUJob
+from wjs.jcom_profile.views import run_imu_job
+
+logger = get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run the background jobs of Insert Many Users (see setting WJS_IMU_ASYNC)."  # NOQA A003
+
+    def add_arguments(self, parser):
+        """Add arguments to command."""
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the pending jobs and exit, instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2,
+            help="Seconds between two checks for new jobs. Defaults to %(default)s",
+        )
+
+    def handle(self, *args, **options):
+        """Command entry point."""
+        try:
+            while True:
+                # Drop the connection if it is broken or too old, as Django does between requests
+                close_old_connections()
+                job = IMUJob.claim_next()
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                self.run(job)
+        except KeyboardInterrupt:
+            logger.info("Stop running IMU jobs.")
+
+    def run(self, job):
+        """Run a job, recording any error in the job itself."""
+        logger.debug(f"Running {job}")
+        close_old_connections()
+        try:
+            run_imu_job(job)
+        except Exception as exception:
+            logger.exception(f"{job} failed")
+            # The error may come from the connection itself: record it with a working one
+            close_old_connections()
+            job.finish(error=str(exception) or exception.__class__.__name__)
+        else:
+            logger.info(f"{job} done in {(job.finished - job.started).total_seconds():.1f}s")
+        finally:
+            close_old_connections()
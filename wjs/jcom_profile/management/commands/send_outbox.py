@@ -0,0 +1,52 @@
+"""Send the emails recorded in the outbox."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from utils.logger import get_logger
+
+from wjs.jcom_profile.outbox import DEFAULT_BATCH_SIZE, send_pending_emails
+
+logger = get_logger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the emails recorded in the outbox, retrying the failed ones (see setting WJS_OUTBOX_ASYNC)."  # NOQA A003
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to command."""
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send the emails that are due and exit, instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Seconds between two checks for new emails. Defaults to %(default)s",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Emails sent through the same connection to the mail server. Defaults to %(default)s",
+        )
+
+    def handle(self, *args, **options):
+        """Command entry point."""
+        try:
+            while True:
+                # Drop the connection if it is broken or too old, as Django does between requests
+                close_old_connections()
+                processed = send_pending_emails(options["batch_size"])
+                if processed:
+                    logger.debug(f"Processed {processed} emails")
+                if processed < options["batch_size"]:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            logger.info("Stop sending emails.")
@@ -0,0 +1,218 @@
+"""Replay a stream of submissions through the automatic assignment functions and report how they behave.
+
+Everything happens inside a transaction that is rolled back, so the
+simulation has no side effects (emails are not sent either).
+"""
+import json
+import random
+import statistics
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from journal.models import Journal
+from review.models import EditorAssignment
+from submission import models as submission_models
+from utils.logger import get_logger
+
+from wjs.jcom_profile.models import EditorAssignmentParameters
+
+logger = get_logger(__name__)
+
+
+class Rollback(Exception):
+    """Raised to roll back the simulation."""
+
+
+class Simulation:
+    """The measures of the simulation of one assignment function."""
+
+    def __init__(self, function_path):
+        self.function_path = function_path
+        self.seconds = []
+        self.queries = []
+        self.assignments = Counter()
+        self.workloads = {}
+        self.unassigned = 0
+
+    def as_dict(self):
+        """Return the measures as a json-serializable dictionary."""
+        milliseconds = sorted(seconds * 1000 for seconds in self.seconds)
+        workloads = list(self.workloads.values())
+        return {
+            "function": self.function_path,
+            "calls": len(milliseconds),
+            "unassigned": self.unassigned,
+            "latency_ms": {
+                "mean": round(statistics.mean(milliseconds), 3) if milliseconds else 0,
+                "median": round(statistics.median(milliseconds), 3) if milliseconds else 0,
+                "p95": round(milliseconds[int(len(milliseconds) * 0.95)], 3) if milliseconds else 0,
+                "max": round(milliseconds[-1], 3) if milliseconds else 0,
+            },
+            "queries": {
+                "mean": round(statistics.mean(self.queries), 2) if self.queries else 0,
+                "max": max(self.queries, default=0),
+            },
+            "workload": {
+                "min": min(workloads, default=0),
+                "max": max(workloads, default=0),
+                "stdev": round(statistics.pstdev(workloads), 3) if workloads else 0,
+            },
+            "assignments": dict(self.assignments.most_common()),
+            "workloads": self.workloads,
+        }
+
+    def as_table(self):
+        """Return the measures as a human-readable table."""
+        report = self.as_dict()
+        lines = [
+            f"=== {report['function']} ===",
+            f"{'calls':<20}{report['calls']:>12}",
+            f"{'unassigned':<20}{report['unassigned']:>12}",
+        ]
+        for name, value in report["latency_ms"].items():
+            lines.append(f"{'latency ms ' + name:<20}{value:>12.3f}")
+        for name, value in report["queries"].items():
+            lines.append(f"{'queries ' + name:<20}{value:>12}")
+        for name, value in report["workload"].items():
+            lines.append(f"{'workload ' + name:<20}{value:>12}")
+        lines.append(f"{'Editor':<40}{'Assigned':>10}{'Workload':>10}")
+        for editor, workload in sorted(report["workloads"].items(), key=lambda item: -item[1]):
+            lines.append(f"{editor:<40}{report['assignments'].get(editor, 0):>10}{workload:>10}")
+        return "\n".join(lines)
+
+
+class Command(BaseCommand):
+    help = (  # NOQA A003
+        "Replay submissions (the last submitted articles or generated ones) through the automatic assignment"
+        " functions, without side effects, and report latency, queries and the resulting workload of the editors."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to command."""
+        parser.add_argument(
+            "--journal-code",
+            default="JCOM",
+            help="The code of the journal that we are working on. Defaults to %(default)s",
+        )
+        parser.add_argument(
+            "--function",
+            action="append",
+            dest="functions",
+            help="Dotted path of an assignment function (can be repeated)."
+            " Defaults to all functions in WJS_ARTICLE_ASSIGNMENT_FUNCTIONS.",
+        )
+        parser.add_argument(
+            "--articles",
+            type=int,
+            default=100,
+            help="Replay the last ARTICLES submitted articles of the journal. Defaults to %(default)s",
+        )
+        parser.add_argument(
+            "--generate",
+            type=int,
+            default=0,
+            help="Replay GENERATE new articles with random keywords instead of existing ones.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the random generator (generated articles are the same for every function).",
+        )
+        parser.add_argument(
+            "--report-json",
+            help="Also write the report as json onto this file.",
+        )
+
+    def handle(self, *args, **options):
+        """Command entry point."""
+        self.options = options
+        journal = Journal.objects.get(code=options["journal_code"])
+        functions = options["functions"] or sorted(set(settings.WJS_ARTICLE_ASSIGNMENT_FUNCTIONS.values()))
+        simulations = [self.simulate(journal, function_path) for function_path in functions]
+        for simulation in simulations:
+            self.stdout.write(f"{simulation.as_table()}\n\n")
+        if options["report_json"]:
+            with open(options["report_json"], "w") as json_file:
+                json.dump([simulation.as_dict() for simulation in simulations], json_file, indent=2)
+
+    def simulate(self, journal, function_path):
+        """Replay the submissions through the given function and roll everything back."""
+        function = import_string(function_path)
+        simulation = Simulation(function_path)
+        no_emails = override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+        try:
+            with transaction.atomic(), no_emails:
+                articles = self.get_submissions(journal)
+                for article in articles:
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        function(article=article, request=None)
+                        simulation.seconds.append(time.perf_counter() - started)
+                    simulation.queries.append(len(queries))
+
+                assigned = dict(
+                    EditorAssignment.objects.filter(article__in=articles).values_list("article", "editor__email"),
+                )
+                simulation.unassigned = len(articles) - len(assigned)
+                simulation.assignments.update(assigned.values())
+                simulation.workloads = dict(
+                    EditorAssignmentParameters.objects.filter(journal=journal).values_list(
+                        "editor__email",
+                        "active_assignments",
+                    ),
+                )
+                raise Rollback
+        except Rollback:
+            pass
+        logger.debug(f"Simulated {function_path} on {len(simulation.seconds)} submissions")
+        return simulation
+
+    def get_submissions(self, journal):
+        """Return the articles to submit, in order of submission, as if they had just been submitted."""
+        if self.options["generate"]:
+            articles = self.generate_submissions(journal)
+        else:
+            articles = list(
+                submission_models.Article.objects.filter(journal=journal, date_submitted__isnull=False).order_by(
+                    "-date_submitted",
+                )[: self.options["articles"]],
+            )
+            # Forget their editors (the workload of the editors is updated by the signals)
+            EditorAssignment.objects.filter(article__in=articles).delete()
+        submission_models.Article.objects.filter(pk__in=[article.pk for article in articles]).update(
+            stage=submission_models.STAGE_UNASSIGNED,
+        )
+        return list(
+            submission_models.Article.objects.filter(pk__in=[article.pk for article in articles])
+            .select_related("journal", "articlewrapper__special_issue")
+            .order_by("date_submitted", "pk"),
+        )
+
+    def generate_submissions(self, journal):
+        """Create new articles with random sections and with some of the keywords of the journal's editors."""
+        generator = random.Random(self.options["seed"])
+        sections = list(submission_models.Section.objects.filter(journal=journal))
+        keywords = list(
+            submission_models.Keyword.objects.filter(editorkeyword__editor_parameters__journal=journal)
+            .distinct()
+            .order_by("pk"),
+        )
+        articles = []
+        for number in range(1, self.options["generate"] + 1):
+            article = submission_models.Article.objects.create(
+                journal=journal,
+                title=f"Simulated submission {number}",
+                language="eng",
+                section=generator.choice(sections) if sections else None,
+                date_submitted=timezone.now(),
+            )
+            article.keywords.add(*generator.sample(keywords, min(3, len(keywords))))
+            articles.append(article)
+        return articles
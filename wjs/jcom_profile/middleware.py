@@ -1,11 +1,46 @@
 """Middleware for JCOM account profile."""
+import re
+from functools import lru_cache
+from typing import Pattern, Tuple
+
 from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.shortcuts import redirect, reverse
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# The flag is forgotten when the profile is saved (see signals): the timeout only limits the damage of other updates
+PRIVACY_ACKNOWLEDGED_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def privacy_acknowledged_cache_key(account_id) -> str:
+    """Return the key of the cached GDPR acknowledgement of an account."""
+    return f"wjs_privacy_acknowledged_{account_id}"
+
+
+def has_acknowledged_privacy(user) -> bool:
+    """Tell if the user has acknowledged the privacy policy (cached per account)."""
+    key = privacy_acknowledged_cache_key(user.pk)
+    acknowledged = cache.get(key)
+    if acknowledged is None:
+        if not hasattr(user, "jcomprofile"):
+            logger.warning(f"User {user.id} has no extended profile!")
+            # TODO: raise exception
+        acknowledged = user.jcomprofile.gdpr_checkbox
+        cache.set(key, acknowledged, PRIVACY_ACKNOWLEDGED_CACHE_TIMEOUT)
+    return acknowledged
+
+
+@lru_cache(maxsize=8)
+def free_paths_regex(free_paths: Tuple[str, ...]) -> Pattern:
+    """Compile a regex that matches the paths under /admin/ and the paths ending with any of the free paths."""
+    patterns = [r"\A/admin/"]
+    if free_paths:
+        patterns.append(f"(?:{'|'.join(re.escape(free_path) for free_path in free_paths)})\\Z")
+    return re.compile("|".join(patterns))
+
 
 class PrivacyAcknowledgedMiddleware:
     """Ensure that the logged-in user has acknowledged the privacy policy."""
@@ -17,6 +52,9 @@ class PrivacyAcknowledgedMiddleware:
         Kick in only if there is a logged-in user (otherwise return None).
         Let alone /logout and /profile.
 
+        The acknowledgement is cached, so that no queries are made
+        (except on the first request of the user).
+
         If the logged-in user hasn't got a gdpr_policy flag, set a
         flash message and redirect to /profile.
 
@@ -24,10 +62,9 @@ class PrivacyAcknowledgedMiddleware:
         if not hasattr(request, "user"):
             return None
 
-        free_paths = getattr(settings, "CORE_PRIVACY_MIDDLEWARE_ALLOWED_URLS", [])
-        if any(request.path.endswith(free_path) for free_path in free_paths):
-            return None
-        if request.path.startswith("/admin/"):
+        # The settings are part of the key of the compiled regex, so that they can change (e.g. in tests)
+        free_paths = tuple(getattr(settings, "CORE_PRIVACY_MIDDLEWARE_ALLOWED_URLS", []))
+        if free_paths_regex(free_paths).search(request.path):
             return None
 
         # I need `if request.user.is_authenticated` because request
@@ -36,10 +73,7 @@ class PrivacyAcknowledgedMiddleware:
         if not request.user.is_authenticated:
             return None
 
-        if not hasattr(request.user, "jcomprofile"):
-            logger.warning(f"User {request.user.id} has no extended profile!")
-            # TODO: raise exception
-        if request.user.jcomprofile.gdpr_checkbox:
+        if has_acknowledged_privacy(request.user):
             return None
 
         message_text = """Please acknowledge privacy note (see checkbox below)
@@ -0,0 +1,22 @@
+# Generated by Django 1.11.29 on 2026-10-18 10:12
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jcom_profile", "0023_auto_20230630_1756"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="articlewrapper",
+            name="import_hashes",
+            field=django.contrib.postgres.fields.jsonb.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Hash of the source data of each import step, to skip unchanged steps when re-importing.",
+            ),
+        ),
+    ]
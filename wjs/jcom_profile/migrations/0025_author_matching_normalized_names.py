@@ -0,0 +1,34 @@
+# Generated by Django 1.11.29 on 2026-10-18 11:48
+
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# unaccent() is only STABLE and cannot be used in an index: wrap it
+# in an IMMUTABLE function (fixing the dictionary and its schema).
+# Keep in sync with wjs.defaults.tests.SkipMigrations.
+NORMALIZE_NAME_FUNCTION = """
+CREATE OR REPLACE FUNCTION wjs_normalize_name(text) RETURNS text AS
+$$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0077_merge_20221004_1031"),
+        ("jcom_profile", "0024_articlewrapper_import_hashes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(
+            sql=NORMALIZE_NAME_FUNCTION,
+            reverse_sql="DROP FUNCTION IF EXISTS wjs_normalize_name(text);",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS jcom_profile_account_last_name_norm_trgm"
+            " ON core_account USING gin (wjs_normalize_name(last_name) gin_trgm_ops);",
+            reverse_sql="DROP INDEX IF EXISTS jcom_profile_account_last_name_norm_trgm;",
+        ),
+    ]
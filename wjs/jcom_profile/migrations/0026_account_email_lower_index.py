@@ -0,0 +1,18 @@
+# Generated by Django 1.11.29 on 2026-10-18 12:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0077_merge_20221004_1031"),
+        ("jcom_profile", "0025_author_matching_normalized_names"),
+    ]
+
+    operations = [
+        # Used by the case-insensitive lookup of the emails in author_matching.match_people
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS jcom_profile_account_email_lower ON core_account (LOWER("email"::text));',
+            reverse_sql="DROP INDEX IF EXISTS jcom_profile_account_email_lower;",
+        ),
+    ]
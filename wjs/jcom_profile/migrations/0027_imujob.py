@@ -0,0 +1,95 @@
+# Generated by Django 1.11.29 on 2026-10-18 12:45
+
+import django.contrib.postgres.fields.jsonb
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("jcom_profile", "0026_account_email_lower_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IMUJob",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "step",
+                    models.CharField(
+                        choices=[("check", "Check uploaded data"), ("import", "Import users and contributions")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "data",
+                    django.contrib.postgres.fields.jsonb.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="The data posted to the IMU step.",
+                    ),
+                ),
+                (
+                    "data_file",
+                    models.BinaryField(help_text="The uploaded spreadsheet (only for the check step).", null=True),
+                ),
+                ("progress", models.PositiveIntegerField(default=0)),
+                ("total", models.PositiveIntegerField(default=0)),
+                (
+                    "result",
+                    django.contrib.postgres.fields.jsonb.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="What the IMU step should show.",
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("started", models.DateTimeField(blank=True, null=True)),
+                (
+                    "heartbeat",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When the worker running the job last recorded its progress.",
+                        null=True,
+                    ),
+                ),
+                ("finished", models.DateTimeField(blank=True, null=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "special_issue",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="imu_jobs",
+                        to="jcom_profile.SpecialIssue",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 1.11.29 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+# Same as wjs.jcom_profile.events.workload.ACTIVE_STAGES
+ACTIVE_STAGES = ("Unassigned", "Assigned", "Under Review", "Under Revision")
+
+COUNT_ACTIVE_ASSIGNMENTS = """
+UPDATE jcom_profile_editorassignmentparameters p
+SET active_assignments = (
+    SELECT count(*)
+    FROM review_editorassignment ea
+    JOIN submission_article a ON a.id = ea.article_id
+    WHERE ea.editor_id = p.editor_id AND a.journal_id = p.journal_id AND a.stage IN %s
+);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jcom_profile", "0027_imujob"),
+        ("review", "__first__"),
+        ("submission", "__first__"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="editorassignmentparameters",
+            name="active_assignments",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of active editor assignments in the journal (see events.workload).",
+            ),
+        ),
+        migrations.RunSQL(
+            sql=[(COUNT_ACTIVE_ASSIGNMENTS, [ACTIVE_STAGES])],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
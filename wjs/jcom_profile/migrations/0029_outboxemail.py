@@ -0,0 +1,80 @@
+# Generated by Django 1.11.29 on 2026-10-18 21:20
+
+import django.contrib.postgres.fields.jsonb
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "__first__"),
+        ("submission", "__first__"),
+        ("jcom_profile", "0028_editorassignmentparameters_active_assignments"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "from_email",
+                    models.CharField(help_text="The From header, including the display name.", max_length=512),
+                ),
+                ("reply_to", django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=list)),
+                ("recipients", django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ("subject", models.TextField()),
+                ("html", models.TextField()),
+                (
+                    "log_dict",
+                    django.contrib.postgres.fields.jsonb.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="The level, types and action_text of the log entry.",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("next_attempt", models.DateTimeField(default=django.utils.timezone.now)),
+                ("error", models.TextField(blank=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("sent", models.DateTimeField(blank=True, null=True)),
+                (
+                    "article",
+                    models.ForeignKey(
+                        help_text="The target of the log entry recorded when the email is sent.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="submission.Article",
+                    ),
+                ),
+                (
+                    "journal",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="journal.Journal",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="outboxemail",
+            index=models.Index(fields=["status", "next_attempt"], name="jcom_outbox_due_idx"),
+        ),
+    ]
@@ -3,7 +3,7 @@ from core.models import Account, AccountManager
 from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models import Q
 from django.urls import reverse
 from django.utils import timezone
@@ -50,6 +50,24 @@ class JCOMProfile(Account):
     gdpr_checkbox = models.BooleanField(_("GDPR acceptance checkbox"), default=False)
     invitation_token = models.CharField(_("Invitation token"), max_length=500, default="")
 
+    @classmethod
+    def create_for_accounts(cls, accounts, **fields):
+        """Create the profiles of the given (already saved) accounts, with one query.
+
+        Saving a new JCOMProfile also saves its parent Account,
+        overwriting it with empty values: only the profiles' table is
+        written here. This works also for accounts created with
+        `bulk_create` (that skips the signal that creates the profiles).
+
+        This uses Django's private `Manager._insert`, because
+        `bulk_create` refuses multi-table inherited models such as this
+        one. The columns that it writes are pinned by a test
+        (see test_create_for_accounts_writes_only_the_profile_columns).
+        """
+        profiles = [cls(janeway_account=account, **fields) for account in accounts]
+        if profiles:
+            cls.objects._insert(profiles, fields=cls._meta.local_concrete_fields)
+
 
 class Correspondence(models.Model):
     """Storage area for wjapp, PoS, SGP,... userCods."""
@@ -209,6 +227,53 @@ class ArticleWrapper(models.Model):
         blank=True,
         null=True,
     )
+    import_hashes = JSONField(
+        help_text="Hash of the source data of each import step, to skip unchanged steps when re-importing.",
+        default=dict,
+        blank=True,
+    )
+
+    @classmethod
+    def create_missing(cls, articles=None, special_issue=None) -> int:
+        """Create the wrappers of the given articles (or ids) that don't have one yet, with one query.
+
+        Articles created with `bulk_create` don't get their wrapper from
+        the post_save signal. Without `articles`, all articles are
+        checked. Existing wrappers are left untouched, as
+        `bulk_create(..., ignore_conflicts=True)` would do (not available
+        in Django 1.11).
+
+        The wrappers get the defaults of their fields, as with `save()`.
+
+        Return the number of wrappers created.
+        """
+        columns, values, params = [], [], []
+        for field in cls._meta.concrete_fields:
+            columns.append(connection.ops.quote_name(field.column))
+            if field.primary_key:
+                values.append("a.id")
+                continue
+            value = field.get_default()
+            if field.name == "special_issue":
+                value = special_issue.pk if special_issue else None
+            # Without a cast, PostgreSQL would take the values of the SELECT as text
+            values.append(f"CAST(%s AS {field.db_type(connection)})")
+            params.append(field.get_db_prep_save(value, connection))
+        columns, values = ", ".join(columns), ", ".join(values)
+        sql = f"""
+            INSERT INTO {cls._meta.db_table} ({columns})
+            SELECT {values} FROM {Article._meta.db_table} a
+        """
+        if articles is not None:
+            article_ids = [getattr(article, "pk", article) for article in articles]
+            if not article_ids:
+                return 0
+            sql += " WHERE a.id = ANY(%s)"
+            params.append(article_ids)
+        sql += " ON CONFLICT DO NOTHING"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
 
 
 class EditorAssignmentParameters(models.Model):
@@ -218,6 +283,11 @@ class EditorAssignmentParameters(models.Model):
     journal = models.ForeignKey("journal.Journal")
     workload = models.PositiveSmallIntegerField(default=0)
     brake_on = models.PositiveSmallIntegerField(default=0)
+    active_assignments = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of active editor assignments in the journal (see events.workload).",
+    )
 
     def __str__(self):  #
         return f"{self.editor} - Assignment parameters"
@@ -299,9 +369,235 @@ class Genealogy(models.Model):
     )
 
     def __str__(self):
+        # No queries if the parent is selected and the children are prefetched (see GenealogyAdmin)
         return f"Genealogy: article {self.parent} has {self.children.count()} kids"
 
 
+class IMUJob(models.Model):
+    """A step of Insert Many Users that runs in the background.
+
+    Big spreadsheets take too long to be processed in a web request: the
+    views of the IMU steps just record a job and the command
+    `run_imu_jobs` runs it. The template polls the job's progress and
+    shows the result when the job is done.
+    """
+
+    CHECK = "check"
+    IMPORT = "import"
+    STEPS = (
+        (CHECK, _("Check uploaded data")),
+        (IMPORT, _("Import users and contributions")),
+    )
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, _("Pending")),
+        (RUNNING, _("Running")),
+        (DONE, _("Done")),
+        (FAILED, _("Failed")),
+    )
+    # Don't write progress to the DB more often than this (seconds)
+    PROGRESS_INTERVAL = 1
+    # A running job without progress for this long has lost its worker (seconds)
+    STALE_AFTER = 10 * 60
+
+    special_issue = models.ForeignKey(
+        to=SpecialIssue,
+        on_delete=models.CASCADE,
+        related_name="imu_jobs",
+    )
+    owner = models.ForeignKey(
+        to=Account,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    step = models.CharField(max_length=10, choices=STEPS)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING, db_index=True)
+    data = JSONField(help_text="The data posted to the IMU step.", default=dict, encoder=DjangoJSONEncoder)
+    data_file = models.BinaryField(help_text="The uploaded spreadsheet (only for the check step).", null=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    result = JSONField(help_text="What the IMU step should show.", default=dict, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    heartbeat = models.DateTimeField(
+        help_text="When the worker running the job last recorded its progress.",
+        null=True,
+        blank=True,
+    )
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"IMU job {self.pk} ({self.step}) for {self.special_issue}: {self.status}"
+
+    def get_absolute_url(self):
+        """Get the URL where the job's progress and result are shown."""
+        return reverse("si-imu-job", kwargs={"pk": self.special_issue_id, "job_pk": self.pk})
+
+    @classmethod
+    def claim_next(cls):
+        """Mark the oldest pending job as running and return it (or None).
+
+        Jobs locked by other workers are skipped, so that more workers can run at the same time.
+        """
+        cls.fail_stale()
+        with transaction.atomic():
+            job = cls.objects.select_for_update(skip_locked=True).filter(status=cls.PENDING).order_by("pk").first()
+            if job is None:
+                return None
+            job.status = cls.RUNNING
+            job.started = job.heartbeat = timezone.now()
+            job.save(update_fields=["status", "started", "heartbeat"])
+        return job
+
+    @classmethod
+    def fail_stale(cls, **filters):
+        """Mark as failed the running jobs (among those matching `filters`) whose worker died.
+
+        A job is not retried, because its worker could have died because of the job itself.
+        """
+        now = timezone.now()
+        return cls.objects.filter(
+            status=cls.RUNNING,
+            heartbeat__lt=now - timezone.timedelta(seconds=cls.STALE_AFTER),
+            **filters,
+        ).update(status=cls.FAILED, error="The job stopped unexpectedly. Please try again.", finished=now)
+
+    def set_progress(self, progress, total):
+        """Record the job's progress (not more often than PROGRESS_INTERVAL, unless it is complete).
+
+        A total of 0 means that the total is not known yet.
+        """
+        now = timezone.now()
+        last_update = getattr(self, "_last_progress_update", None)
+        complete = total and progress >= total
+        if not complete and last_update and (now - last_update).total_seconds() < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress_update = now
+        self.progress, self.total, self.heartbeat = progress, total, now
+        IMUJob.objects.filter(pk=self.pk).update(progress=progress, total=total, heartbeat=now)
+
+    def finish(self, result=None, error=""):
+        """Record the job's result, or the error that stopped it."""
+        self.status = self.FAILED if error else self.DONE
+        self.result = result or {}
+        self.error = error
+        self.finished = timezone.now()
+        # The spreadsheet is not needed anymore
+        self.data_file = None
+        self.save(update_fields=["status", "result", "error", "finished", "data_file"])
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be sent by the command `send_outbox`.
+
+    Event handlers render the emails and record them here, so that the
+    request that triggered the event does not wait for the mail server
+    (see `wjs.jcom_profile.outbox`). Failed emails are retried, waiting
+    longer each time, until MAX_ATTEMPTS.
+
+    A worker claims the emails that it is going to send (SENDING) for
+    SENDING_TIMEOUT seconds: if it dies before recording the outcome,
+    the emails are due again when the timeout expires.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, _("Pending")),
+        (SENDING, _("Sending")),
+        (SENT, _("Sent")),
+        (FAILED, _("Failed")),
+    )
+    MAX_ATTEMPTS = 5
+    # Seconds before the first retry, doubled at every attempt
+    RETRY_DELAY = 60
+    SENDING_TIMEOUT = 10 * 60
+
+    journal = models.ForeignKey(
+        to=Journal,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    article = models.ForeignKey(
+        to=Article,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+        help_text="The target of the log entry recorded when the email is sent.",
+    )
+    from_email = models.CharField(max_length=512, help_text="The From header, including the display name.")
+    reply_to = JSONField(default=list, blank=True)
+    recipients = JSONField(default=list)
+    subject = models.TextField()
+    html = models.TextField()
+    log_dict = JSONField(help_text="The level, types and action_text of the log entry.", default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt"], name="jcom_outbox_due_idx")]
+
+    def __str__(self):
+        return f"Email {self.pk} to {', '.join(self.recipients)}: {self.status}"
+
+    @classmethod
+    def due(cls):
+        """Return the emails that should be sent now (including those of dead workers), oldest first."""
+        return cls.objects.filter(status__in=[cls.PENDING, cls.SENDING], next_attempt__lte=timezone.now()).order_by(
+            "next_attempt",
+            "pk",
+        )
+
+    @classmethod
+    def claim(cls, batch_size):
+        """Claim a batch of the emails that are due for SENDING_TIMEOUT seconds and return them.
+
+        Emails being claimed by other workers are skipped. The claim is
+        committed at once, so that the emails are not locked while they
+        are being sent.
+        """
+        with transaction.atomic():
+            emails = list(cls.due().select_for_update(skip_locked=True)[:batch_size])
+            cls.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status=cls.SENDING,
+                next_attempt=timezone.now() + timezone.timedelta(seconds=cls.SENDING_TIMEOUT),
+            )
+        return emails
+
+    def mark_sent(self):
+        """Record that the email has been sent."""
+        self.status = self.SENT
+        self.attempts += 1
+        self.error = ""
+        self.sent = timezone.now()
+        self.save(update_fields=["status", "attempts", "error", "sent"])
+
+    def mark_failed(self, error):
+        """Record a failed attempt and schedule the next one (if any)."""
+        self.attempts += 1
+        self.error = error
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.FAILED
+        else:
+            self.status = self.PENDING
+            self.next_attempt = timezone.now() + timezone.timedelta(
+                seconds=self.RETRY_DELAY * 2 ** (self.attempts - 1),
+            )
+        self.save(update_fields=["status", "attempts", "error", "next_attempt"])
+
+
 class Newsletter(models.Model):
     last_sent = models.DateTimeField(
         verbose_name=_("Last time newsletter emails have been sent to users"),
@@ -0,0 +1,170 @@
+"""Send emails outside of the request/response cycle.
+
+`enqueue_email` renders an email as Janeway's
+`notify_helpers.send_email_with_body_from_setting_template` would do,
+but it just records it in the outbox (OutboxEmail). The command
+`send_outbox` sends the recorded emails in batches, through a single
+connection to the mail server, and retries the failed ones.
+
+The outbox reproduces what Janeway's `send_email` does (subject prefix,
+From header on behalf of the logged-in user, Reply-To, journal footer)
+and the log entry of the article, but it intentionally skips the other
+notification plugins of Janeway (`utils.notify`): only the email is
+sent.
+
+The command `send_outbox` must run when the setting WJS_OUTBOX_ASYNC
+is on: nothing else sends the recorded emails. When the setting is off,
+nothing is recorded and the emails go through Janeway's helper as usual.
+"""
+from email.utils import formataddr
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils.html import strip_tags
+from submission.models import Article
+from utils import notify_helpers, render_template
+from utils.logger import get_logger
+from utils.setting_handler import get_setting
+
+from wjs.jcom_profile.models import OutboxEmail
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def enqueue_email(
+    request,
+    template: str,
+    subject_setting: str,
+    to: List[str],
+    context: dict,
+    log_dict: Optional[dict] = None,
+) -> Optional[OutboxEmail]:
+    """Render an email from the given email template and email subject settings and record it in the outbox.
+
+    The arguments are the same as for Janeway's `send_email_with_body_from_setting_template`.
+    As in Janeway's `send_email`, the email comes from the journal's
+    address on behalf of the logged-in user, who gets the replies.
+
+    When WJS_OUTBOX_ASYNC is off, the email is sent at once by Janeway's
+    helper instead, and nothing is recorded.
+    """
+    if not settings.WJS_OUTBOX_ASYNC:
+        notify_helpers.send_email_with_body_from_setting_template(
+            request,
+            template,
+            subject_setting,
+            to,
+            context,
+            log_dict=log_dict,
+        )
+        return None
+
+    journal = request.journal
+    html = render_template.get_message_content(request, context, template)
+    subject = get_setting("email_subject", subject_setting, journal, create=False, default=True).value
+    from_address = get_setting("general", "from_address", journal, create=False, default=True).value
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        from_email = formataddr((user.full_name(), from_address))
+        reply_to = [user.email]
+    else:
+        site_type = getattr(request, "site_type", None)
+        from_email = formataddr((site_type.name, from_address)) if site_type else from_address
+        reply_to = []
+    log_dict = dict(log_dict or {})
+    target = log_dict.pop("target", None)
+    return OutboxEmail.objects.create(
+        journal=journal,
+        article=target if isinstance(target, Article) else None,
+        from_email=from_email,
+        reply_to=reply_to,
+        recipients=list(to),
+        subject=f"[{journal.code}] {subject}",
+        html=f"{html}<br />{journal.name}",
+        log_dict=log_dict,
+    )
+
+
+def build_message(email: OutboxEmail, connection=None) -> EmailMultiAlternatives:
+    """Return the message to send for an email of the outbox."""
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=strip_tags(email.html),
+        from_email=email.from_email,
+        to=email.recipients,
+        reply_to=email.reply_to,
+        connection=connection,
+    )
+    message.attach_alternative(email.html, "text/html")
+    return message
+
+
+def log_email(email: OutboxEmail):
+    """Record that the email has been sent in the log of its article."""
+    if not email.article_id or not email.log_dict:
+        return
+    from utils.models import LogEntry
+
+    try:
+        with transaction.atomic():
+            LogEntry.add_entry(
+                types=email.log_dict.get("types"),
+                description=email.log_dict.get("action_text"),
+                level=email.log_dict.get("level"),
+                target=email.article,
+                is_email=True,
+            )
+    except Exception:
+        # The email has been sent anyway: don't send it again
+        logger.exception(f"Cannot log {email}")
+
+
+def send_emails(emails: Iterable[OutboxEmail]) -> int:
+    """Send the given emails through a single connection, recording the outcome of each. Return how many were sent.
+
+    The outcome of each email is saved as soon as it is known, so that
+    an error further on does not make the emails already sent go again.
+    """
+    emails = list(emails)
+    if not emails:
+        return 0
+    sent = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exception:
+        logger.exception("Cannot connect to the mail server")
+        for email in emails:
+            email.mark_failed(str(exception) or exception.__class__.__name__)
+        return 0
+    try:
+        for email in emails:
+            try:
+                build_message(email, connection).send()
+            except Exception as exception:
+                logger.warning(f"Cannot send {email}: {exception!r}")
+                email.mark_failed(str(exception) or exception.__class__.__name__)
+            else:
+                email.mark_sent()
+                log_email(email)
+                sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def send_pending_emails(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Send a batch of the emails that are due. Return how many were processed.
+
+    The emails are claimed in a short transaction (see
+    OutboxEmail.claim) and sent after it: neither the rows nor the
+    transaction are held while talking to the mail server, and more
+    workers can run at the same time.
+    """
+    emails = OutboxEmail.claim(batch_size)
+    send_emails(emails)
+    return len(emails)
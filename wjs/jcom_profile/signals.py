@@ -3,14 +3,64 @@
 Every time a user model instance is created, a corresponding JCOM
 profile instance must be created as well.
 
+The workload of the editors is kept up to date when editor assignments
+are created or deleted and when articles enter or leave the active
+stages (see events.workload).
+
+The cached GDPR acknowledgement of an account is forgotten when its
+profile is saved (see middleware.PrivacyAcknowledgedMiddleware).
+
+The cached submission windows of the special issues of a journal are
+forgotten when the special issues or their invitees change (see
+special_issues).
+
+The cached parents of each journal (articles with children) are
+forgotten when a genealogy changes (see genealogy).
+
+The cached role memberships of the journals and the cached editors of
+the special issues are forgotten when they change (see events.roles).
+
+Cached values are forgotten when the transaction commits: until then,
+concurrent requests still see the old data and could cache it again.
+
 """
+from functools import partial
 
+from core.models import AccountRole
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
+from review.models import EditorAssignment
 from submission.models import Article
 
-from wjs.jcom_profile.models import ArticleWrapper, JCOMProfile
+from wjs.jcom_profile.events.roles import (
+    invalidate_journal_roles,
+    invalidate_special_issue_editors,
+)
+from wjs.jcom_profile.events.workload import (
+    count_active_assignments,
+    is_active_stage,
+    update_workload,
+)
+from wjs.jcom_profile.genealogy import invalidate_parent_ids
+from wjs.jcom_profile.middleware import privacy_acknowledged_cache_key
+from wjs.jcom_profile.models import (
+    ArticleWrapper,
+    EditorAssignmentParameters,
+    Genealogy,
+    JCOMProfile,
+    SpecialIssue,
+)
+from wjs.jcom_profile.special_issues import invalidate_special_issue_windows
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -19,20 +69,16 @@ def create_profile_handler(sender, instance, created, **kwargs):
     if not created:
         return
 
-    JCOMProfile.objects.create(janeway_account=instance)
+    # A single insert in the profiles' table: saving a JCOMProfile would
+    # also save (and blank) the account, that had to be saved again.
+    JCOMProfile.create_for_accounts([instance])
 
-    # If I don't `save()` the instance also, an empty record is
-    # created.
-    #
-    # I think this is because the post_save message is emitted by one
-    # of core.forms.RegistrationForm's ancestor (l.133) but with
-    # `commit=False`, so that the form's data is not yet in the DB.
-    instance.save()
 
-    # NB: instance.save_m2m() fails with
-    # AttributeError: 'Account' object has no attribute 'save_m2m'
-    # because this is not a many-to-many relation
-    # https://django.readthedocs.io/en/stable/topics/forms/modelforms.html?highlight=save_m2m#the-save-method
+@receiver(post_save, sender=JCOMProfile)
+@receiver(post_delete, sender=JCOMProfile)
+def forget_privacy_acknowledgement_handler(sender, instance, **kwargs):
+    """Forget the cached GDPR acknowledgement of the account, that may have changed."""
+    transaction.on_commit(partial(cache.delete, privacy_acknowledged_cache_key(instance.pk)))
 
 
 @receiver(post_save, sender=Article)
@@ -40,4 +86,124 @@ def create_articlewrapper_handler(sender, instance, created, **kwargs):
     """Create a record in our ArticleWrapper when any Article is newly created."""
     if not created:
         return
-    ArticleWrapper.objects.get_or_create(janeway_article=instance)
+    ArticleWrapper.create_missing([instance])
+
+
+@receiver(post_save, sender=EditorAssignment)
+def add_assignment_to_workload_handler(sender, instance, created, raw, **kwargs):
+    """Count a new editor assignment in the workload of the editor."""
+    if created and not raw and is_active_stage(instance.article.stage):
+        update_workload([instance.editor_id], instance.article.journal_id, +1)
+
+
+@receiver(pre_delete, sender=EditorAssignment)
+def remove_assignment_from_workload_handler(sender, instance, **kwargs):
+    """Remove a deleted editor assignment from the workload of the editor."""
+    # pre_delete, because the article could be gone already when the assignment is deleted in cascade
+    if is_active_stage(instance.article.stage):
+        update_workload([instance.editor_id], instance.article.journal_id, -1)
+
+
+@receiver(post_init, sender=Article)
+def remember_article_stage_handler(sender, instance, **kwargs):
+    """Remember the stage of the article as loaded, to see when it changes (see below)."""
+    # Don't look at deferred fields: it would cost a query
+    instance._wjs_loaded_stage = instance.__dict__.get("stage")
+
+
+@receiver(post_save, sender=Article)
+def update_workload_handler(sender, instance, created, raw, **kwargs):
+    """Update the workload of the article's editors when the article enters or leaves the active stages."""
+    loaded_stage, instance._wjs_loaded_stage = getattr(instance, "_wjs_loaded_stage", None), instance.stage
+    if created or raw or loaded_stage is None:
+        return
+    is_active = is_active_stage(instance.stage)
+    if is_active_stage(loaded_stage) != is_active:
+        editors = EditorAssignment.objects.filter(article=instance).values("editor")
+        update_workload(editors, instance.journal_id, +1 if is_active else -1)
+
+
+@receiver(pre_save, sender=EditorAssignmentParameters)
+def init_workload_handler(sender, instance, raw, **kwargs):
+    """Start counting the workload of an editor from its current active assignments."""
+    if instance._state.adding and not raw:
+        instance.active_assignments = count_active_assignments(instance.editor_id, instance.journal_id)
+
+
+@receiver(post_save, sender=AccountRole)
+@receiver(post_delete, sender=AccountRole)
+def invalidate_journal_roles_handler(sender, instance, **kwargs):
+    """Forget the cached role memberships of the journal when somebody gets or loses a role."""
+    if instance.journal_id:
+        transaction.on_commit(partial(invalidate_journal_roles, instance.journal_id))
+
+
+@receiver(m2m_changed, sender=SpecialIssue.editors.through)
+def invalidate_special_issue_editors_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    """Forget the cached editors of the special issues whose editors change."""
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        special_issue_ids = [instance.pk]
+    elif pk_set:
+        special_issue_ids = list(pk_set)
+    else:
+        # post_clear from the account's side: pk_set is None and the special issues are not known anymore
+        special_issue_ids = list(SpecialIssue.objects.values_list("pk", flat=True))
+    transaction.on_commit(partial(invalidate_special_issue_editors, *special_issue_ids))
+
+
+@receiver(post_save, sender=SpecialIssue)
+@receiver(post_delete, sender=SpecialIssue)
+def invalidate_special_issue_windows_handler(sender, instance, **kwargs):
+    """Forget the cached submission windows of the journal when one of its special issues changes."""
+    transaction.on_commit(partial(invalidate_special_issue_windows, instance.journal_id))
+
+
+@receiver(m2m_changed, sender=SpecialIssue.invitees.through)
+def invalidate_special_issue_windows_on_invitees_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    """Forget the cached submission windows of the journals whose special issues get or lose all invitees."""
+    if not reverse:
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        journal_ids = {instance.journal_id}
+    elif action in ("post_add", "post_remove"):
+        journal_ids = set(SpecialIssue.objects.filter(pk__in=pk_set).values_list("journal_id", flat=True))
+    elif action == "pre_clear":
+        # After clearing, the special issues of the account are not known anymore
+        journal_ids = set(instance.special_issue_invited.values_list("journal_id", flat=True))
+    else:
+        return
+    transaction.on_commit(partial(invalidate_special_issue_windows, *journal_ids))
+
+
+@receiver(post_save, sender=Genealogy)
+@receiver(post_delete, sender=Genealogy)
+def invalidate_genealogy_parents_handler(sender, instance, **kwargs):
+    """Forget the cached parents of the journal of a genealogy that changes."""
+    journal_id = Article.objects.filter(pk=instance.parent_id).values_list("journal_id", flat=True).first()
+    transaction.on_commit(partial(invalidate_parent_ids, journal_id))
+
+
+@receiver(m2m_changed, sender=Genealogy.children.through)
+def invalidate_genealogy_parents_on_children_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    """Forget the cached parents of the journals whose genealogies gain or lose children."""
+    if not reverse:
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        journal_ids = {instance.parent.journal_id}
+    elif action == "pre_clear":
+        # instance is a child article: after clearing, its genealogies are not known anymore
+        journal_ids = set(instance.ancestors.values_list("parent__journal_id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        journal_ids = set(Genealogy.objects.filter(pk__in=pk_set).values_list("parent__journal_id", flat=True))
+    else:
+        return
+    transaction.on_commit(partial(invalidate_parent_ids, *journal_ids))
+
+
+@receiver(post_delete, sender=Article)
+def invalidate_genealogy_parents_on_article_delete_handler(sender, instance, **kwargs):
+    """Forget the cached parents of the journal: a deleted child may have been the last one of its parent."""
+    if instance.journal_id:
+        transaction.on_commit(partial(invalidate_parent_ids, instance.journal_id))
@@ -0,0 +1,89 @@
+"""Cached submission windows of the special issues, to tell cheaply if a journal has open special issues.
+
+For each journal the cache holds the special issues that are open or
+that will open (their open/close dates and whether they are restricted
+to invitees). The entry expires at the first open_date or close_date
+still to come, and the signals in `wjs.jcom_profile.signals` forget it
+when a special issue or its invitees change. Only restricted special
+issues need a (per-user) query.
+"""
+import math
+from collections import namedtuple
+from typing import List
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+# Upper bound of the expiry, when no open_date or close_date is to come
+CACHE_TIMEOUT = 24 * 60 * 60
+
+SIWindow = namedtuple("SIWindow", ["pk", "open_date", "close_date", "restricted"])
+
+
+def _windows_key(journal_id) -> str:
+    return f"wjs_special_issue_windows_{journal_id}"
+
+
+def _seconds_to_next_boundary(windows: List[SIWindow], now) -> int:
+    boundaries = [date for window in windows for date in (window.open_date, window.close_date) if date and date > now]
+    if not boundaries:
+        return CACHE_TIMEOUT
+    return max(1, min(CACHE_TIMEOUT, math.ceil((min(boundaries) - now).total_seconds())))
+
+
+def special_issue_windows(journal) -> List[SIWindow]:
+    """Return the submission windows of the special issues of a journal (object or id) that are not closed yet."""
+    journal_id = getattr(journal, "pk", journal)
+    key = _windows_key(journal_id)
+    windows = cache.get(key)
+    if windows is None:
+        from .models import SpecialIssue
+
+        now = timezone.now()
+        special_issues = (
+            SpecialIssue.objects.filter(journal_id=journal_id)
+            .filter(Q(close_date__isnull=True) | Q(close_date__gte=now))
+            .annotate(invitees_count=Count("invitees"))
+            .values_list("pk", "open_date", "close_date", "invitees_count")
+        )
+        windows = [
+            SIWindow(pk, open_date, close_date, invitees_count > 0)
+            for pk, open_date, close_date, invitees_count in special_issues
+        ]
+        cache.set(key, windows, _seconds_to_next_boundary(windows, now))
+    return windows
+
+
+def is_open(window: SIWindow, now=None) -> bool:
+    """Tell if the special issue accepts submissions (see SIQuerySet.open_for_submission)."""
+    now = now or timezone.now()
+    return window.open_date <= now and (window.close_date is None or window.close_date >= now)
+
+
+def has_open_special_issue(journal, user) -> bool:
+    """Tell if the journal has some special issue open for submission that is available to the user.
+
+    Special issues without invitees are available to everybody, the
+    others only to their invitees (see SIQuerySet.current_user).
+    """
+    if not journal:
+        return False
+    now = timezone.now()
+    open_windows = [window for window in special_issue_windows(journal) if is_open(window, now)]
+    if any(not window.restricted for window in open_windows):
+        return True
+    if not open_windows or not user or not user.is_authenticated:
+        return False
+
+    from .models import SpecialIssue
+
+    return SpecialIssue.invitees.through.objects.filter(
+        specialissue_id__in=[window.pk for window in open_windows],
+        account_id=user.pk,
+    ).exists()
+
+
+def invalidate_special_issue_windows(*journal_ids):
+    """Forget the submission windows of the special issues of the given journals."""
+    cache.delete_many([_windows_key(journal_id) for journal_id in journal_ids])
@@ -0,0 +1,192 @@
+"""Read the rows of the first sheet of a spreadsheet (ODS, XLSX or CSV), one at a time.
+
+The XML of ODS and XLSX files is parsed incrementally from the zip
+archive, so that the memory used does not depend on the size of the
+sheet (except for XLSX's shared strings).
+"""
+import csv
+import io
+import posixpath
+import re
+import zipfile
+from collections import namedtuple
+from typing import IO, Iterator, List, Sequence
+
+from lxml import etree
+
+ODS_NS = {
+    "office": "urn:oasis:names:tc:opendocument:xmlns:office:1.0",
+    "table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
+    "text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
+}
+XLSX_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+# Repeated empty cells are often used to fill a sheet up to its last column (16384 in LibreOffice)
+MAX_REPEATED_CELLS = 1024
+
+
+class SpreadsheetError(Exception):
+    """The data file cannot be read."""
+
+
+def _qname(namespaces, name):
+    prefix, local = name.split(":")
+    return f"{{{namespaces[prefix]}}}{local}"
+
+
+def iter_rows(data_file: IO[bytes], names: Sequence[str]) -> Iterator[tuple]:
+    """Yield the non-empty rows of the first sheet as namedtuples with the given field names.
+
+    As for pandas' `DataFrame.itertuples`, the first field is `Index`:
+    the position of the row among the non-empty ones. Missing cells
+    are empty strings and cells beyond the given names are ignored.
+    """
+    Row = namedtuple("Row", ["Index", *names])
+    index = 0
+    for values in iter_values(data_file):
+        if not any(values):
+            continue
+        values = (values + [""] * len(names))[: len(names)]
+        yield Row(index, *values)
+        index += 1
+
+
+def iter_values(data_file: IO[bytes]) -> Iterator[List[str]]:
+    """Yield the values of each row of the first sheet, recognizing the format of the file from its content."""
+    data_file.seek(0)
+    if not zipfile.is_zipfile(data_file):
+        data_file.seek(0)
+        yield from iter_csv_values(data_file)
+        return
+    data_file.seek(0)
+    with zipfile.ZipFile(data_file) as archive:
+        names = set(archive.namelist())
+        if "content.xml" in names:
+            yield from iter_ods_values(archive)
+        elif "xl/workbook.xml" in names:
+            yield from iter_xlsx_values(archive)
+        else:
+            raise SpreadsheetError("Unknown spreadsheet format.")
+
+
+def iter_csv_values(data_file: IO[bytes]) -> Iterator[List[str]]:
+    """Yield the values of each row of a CSV file (utf-8 encoded)."""
+    text = io.TextIOWrapper(data_file, encoding="utf-8-sig", newline="")
+    try:
+        dialect = csv.Sniffer().sniff(text.read(4096), delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    text.seek(0)
+    try:
+        yield from csv.reader(text, dialect)
+    finally:
+        # Don't close the data file together with the wrapper
+        text.detach()
+
+
+def _ods_text(element) -> str:
+    """Return the text of an ODS text element, expanding spaces, tabs and line-breaks."""
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag == _qname(ODS_NS, "text:s"):
+            parts.append(" " * int(child.get(_qname(ODS_NS, "text:c"), 1)))
+        elif child.tag == _qname(ODS_NS, "text:tab"):
+            parts.append("\t")
+        elif child.tag == _qname(ODS_NS, "text:line-break"):
+            parts.append("\n")
+        else:
+            parts.append(_ods_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def iter_ods_values(archive: zipfile.ZipFile) -> Iterator[List[str]]:
+    """Yield the values of each row of the first table of an ODS file."""
+    table_tag = _qname(ODS_NS, "table:table")
+    row_tag = _qname(ODS_NS, "table:table-row")
+    cell_tags = (_qname(ODS_NS, "table:table-cell"), _qname(ODS_NS, "table:covered-table-cell"))
+    paragraph_tag = _qname(ODS_NS, "text:p")
+    rows_repeated = _qname(ODS_NS, "table:number-rows-repeated")
+    columns_repeated = _qname(ODS_NS, "table:number-columns-repeated")
+
+    with archive.open("content.xml") as content:
+        for event, element in etree.iterparse(content, events=("end",), tag=(row_tag, table_tag)):
+            if element.tag == table_tag:
+                # Only the first sheet
+                return
+            values = []
+            for cell in element.iterchildren(*cell_tags):
+                value = "\n".join(_ods_text(paragraph) for paragraph in cell.iterchildren(paragraph_tag))
+                values.extend([value] * min(int(cell.get(columns_repeated, 1)), MAX_REPEATED_CELLS))
+            # Only empty rows are repeated many times (e.g. to fill the sheet): yield them once
+            repeated = int(element.get(rows_repeated, 1)) if any(values) else 1
+            for _ in range(repeated):
+                yield values
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def _xlsx_first_sheet(archive: zipfile.ZipFile) -> str:
+    """Return the name of the archive member with the first sheet of an XLSX file."""
+    workbook = etree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find("main:sheets/main:sheet", XLSX_NS)
+    if sheet is None:
+        raise SpreadsheetError("No sheets in the workbook.")
+    relationships = etree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for relationship in relationships.iterfind("rel:Relationship", XLSX_NS):
+        if relationship.get("Id") == sheet.get(_qname(XLSX_NS, "r:id")):
+            target = relationship.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise SpreadsheetError("Cannot find the first sheet of the workbook.")
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    item_tag = _qname(XLSX_NS, "main:si")
+    with archive.open("xl/sharedStrings.xml") as shared_strings:
+        for event, element in etree.iterparse(shared_strings, events=("end",), tag=item_tag):
+            # Rich text is split in runs; phonetic hints are not part of the text
+            strings.append("".join(element.xpath("main:t/text() | main:r/main:t/text()", namespaces=XLSX_NS)))
+            element.clear()
+    return strings
+
+
+def _xlsx_column(reference: str) -> int:
+    """Return the (0-based) column of a cell reference such as "AB12"."""
+    column = 0
+    for letter in re.match(r"[A-Z]+", reference).group():
+        column = column * 26 + ord(letter) - ord("A") + 1
+    return column - 1
+
+
+def iter_xlsx_values(archive: zipfile.ZipFile) -> Iterator[List[str]]:
+    """Yield the values of each row of the first sheet of an XLSX file."""
+    shared_strings = _xlsx_shared_strings(archive)
+    row_tag = _qname(XLSX_NS, "main:row")
+    with archive.open(_xlsx_first_sheet(archive)) as sheet:
+        for event, row in etree.iterparse(sheet, events=("end",), tag=row_tag):
+            values = []
+            for cell in row.iterfind("main:c", XLSX_NS):
+                if cell.get("r"):
+                    values.extend([""] * (_xlsx_column(cell.get("r")) - len(values)))
+                cell_type = cell.get("t")
+                if cell_type == "inlineStr":
+                    value = "".join(cell.xpath("main:is//main:t/text()", namespaces=XLSX_NS))
+                else:
+                    value = cell.findtext("main:v", default="", namespaces=XLSX_NS)
+                    if cell_type == "s" and value:
+                        value = shared_strings[int(value)]
+                values.append(value)
+            yield values
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
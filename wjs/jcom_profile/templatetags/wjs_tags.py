@@ -8,21 +8,22 @@ from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext_lazy as _
 from journal import logic as journal_logic
 from journal.models import Issue
-from submission.models import STAGE_PUBLISHED, Article, Keyword
+from submission.models import STAGE_PUBLISHED, Keyword
 
-from wjs.jcom_profile.models import SpecialIssue
+from wjs.jcom_profile.genealogy import has_children
+from wjs.jcom_profile.special_issues import has_open_special_issue
 from wjs.jcom_profile.utils import citation_name
 
 register = template.Library()
 
 
-@register.simple_tag
-def journal_has_open_si(journal):
-    """Return true if this journal has any special issue open for submission."""
+@register.simple_tag(takes_context=True)
+def journal_has_open_si(context, journal):
+    """Return true if this journal has any special issue open for submission (for the current user)."""
     # The timeline.html template should show/hide the SI step as
     # necessary.
-    has_open_si = SpecialIssue.objects.current_journal().open_for_submission().current_user().exists()
-    return has_open_si
+    request = context.get("request")
+    return has_open_special_issue(journal, getattr(request, "user", None))
 
 
 @register.filter
@@ -31,20 +32,11 @@ def keyvalue(dictionary, key):
     return dictionary[key]
 
 
-@register.filter
-def article(article_wrapper):
-    """Return the article wrapped by the given article_wrapper."""
-    # I don't know why, but simply calling
-    # `article_wrapper.janeway_article` results in an error
-    # `'ArticleWrapper' object has no attribute 'id'`
-    return Article.objects.get(pk=article_wrapper.janeway_article_id)
-
-
 @register.filter
 def article_has_children(article):
-    """Return if article has children articles (commentary items)."""
+    """Return if article has children articles (commentary items), without querying each article."""
     try:
-        return article.genealogy.children.exists()
+        return has_children(article)
     except AttributeError:
         return False
 
@@ -10,6 +10,7 @@ from core.models import Account, File, Role, Setting, SupplementaryFile
 from django.conf import settings as django_settings
 from django.core import management
 from django.core.cache import cache
+from django.db import transaction
 from django.urls.base import clear_script_prefix
 from django.utils import timezone, translation
 from identifiers.models import Identifier
@@ -95,6 +96,16 @@ def clear_cache():
     cache.clear()
 
 
+@pytest.fixture(autouse=True)
+def run_on_commit_immediately(monkeypatch):
+    """Run the on-commit callbacks (e.g. the cache invalidations of the signals) immediately.
+
+    Tests run inside a transaction that is never committed, so the
+    callbacks would never run otherwise.
+    """
+    monkeypatch.setattr(transaction, "on_commit", lambda func, using=None: func())
+
+
 @pytest.fixture
 def mock_premailer_load_url(mocker):
     """Provide a empty response for css when fetched by premailer."""
@@ -0,0 +1,44 @@
+"""Test the matching of persons with existing Janeway accounts."""
+import pytest
+from core.models import Account
+
+from wjs.jcom_profile.author_matching import Person, match_people
+
+
+@pytest.mark.django_db
+def test_match_people():
+    """Test that persons are matched by email and by normalized names, best match first."""
+    rossi = Account.objects.create(email="mario.rossi@example.com", first_name="Mario", last_name="Rossi")
+    rossini = Account.objects.create(email="g.rossini@example.com", first_name="Gioachino", last_name="Rossini")
+    nunez = Account.objects.create(email="nunez@example.com", first_name="José", last_name="Núñez")
+
+    matches = match_people(
+        [
+            Person(key="by-email", first_name="M.", last_name="R.", email="g.rossini@example.com"),
+            Person(key="by-name", first_name="Mario", last_name="ROSSI", email="mrossi@example.org"),
+            Person(key="unaccented", first_name="Jose", last_name="Nunez"),
+            Person(key="nobody", first_name="Anna", last_name="Bianchi"),
+        ],
+    )
+
+    assert [(match.account, match.same_email) for match in matches["by-email"]] == [(rossini, True)]
+    assert matches["by-name"][0].account == rossi
+    assert matches["by-name"][0].score == pytest.approx(1)
+    assert [match.account for match in matches["unaccented"]] == [nunez]
+    assert matches["nobody"] == []
+
+
+@pytest.mark.django_db
+def test_match_people_ignoring_email_case():
+    """Test that emails can be compared case-insensitively, and that persons can share the same email."""
+    rossi = Account.objects.create(email="Mario.Rossi@example.com", first_name="Mario", last_name="Rossi")
+
+    people = [
+        Person(key=1, first_name="M.", last_name="R.", email="mario.rossi@example.com"),
+        Person(key=2, first_name="M.", last_name="R.", email="MARIO.ROSSI@EXAMPLE.COM"),
+    ]
+    assert match_people(people) == {1: [], 2: []}
+
+    matches = match_people(people, ignore_email_case=True)
+    assert [(match.account, match.same_email) for match in matches[1]] == [(rossi, True)]
+    assert [(match.account, match.same_email) for match in matches[2]] == [(rossi, True)]
@@ -1,10 +1,14 @@
 """Tests related to the automatic assignment of articles after submission."""
+import io
+import json
+
 import pytest
 from django.test import Client, override_settings
 from django.urls import reverse
 from review.models import EditorAssignment
+from submission import models as submission_models
 
-from wjs.jcom_profile.models import EditorAssignmentParameters
+from wjs.jcom_profile.models import EditorAssignmentParameters, EditorKeyword
 
 WJS_ARTICLE_ASSIGNMENT_FUNCTIONS = {
     None: "wjs.jcom_profile.events.assignment.default_assign_editors_to_articles",
@@ -187,3 +191,145 @@ def test_jcom_special_issue_articles_automatic_assignment(
             editor_assignment = EditorAssignment.objects.get(article=article)
 
             assert editor_assignment.editor == expected_editor
+
+
+@pytest.mark.django_db
+def test_workload_follows_editor_assignments(article, editors):
+    """The workload of an editor counts its assignments on articles that are waiting for a decision."""
+    editor = editors[0]
+
+    def workload():
+        return EditorAssignmentParameters.objects.get(editor=editor, journal=article.journal).active_assignments
+
+    article.stage = submission_models.STAGE_UNDER_REVIEW
+    article.save()
+    assignment = EditorAssignment.objects.create(article=article, editor=editor, editor_type="editor")
+    assert workload() == 1
+
+    article.stage = submission_models.STAGE_ACCEPTED
+    article.save()
+    assert workload() == 0
+
+    article.stage = submission_models.STAGE_UNDER_REVISION
+    article.save()
+    assert workload() == 1
+
+    assignment.delete()
+    assert workload() == 0
+
+
+@pytest.mark.django_db
+def test_assignment_respects_brake_on(
+    admin,
+    article,
+    editors,
+    coauthors_setting,
+):
+    """Editors with as many active assignments as their brake_on don't receive new articles."""
+    braked, *others = EditorAssignmentParameters.objects.filter(journal=article.journal)
+    # The braked editor would be the least loaded one...
+    braked.active_assignments = 1
+    braked.brake_on = 1
+    braked.save()
+    EditorAssignmentParameters.objects.filter(pk__in=[other.pk for other in others]).update(active_assignments=2)
+    # ...so the one with the lowest workload among the others is expected
+    expected = min(others, key=lambda parameters: (parameters.workload, parameters.pk))
+
+    # Other tests add the JCOM algorithm to WJS_ARTICLE_ASSIGNMENT_FUNCTIONS
+    default_assignment_settings = {None: WJS_ARTICLE_ASSIGNMENT_FUNCTIONS[None]}
+    with override_settings(WJS_ARTICLE_ASSIGNMENT_FUNCTIONS=default_assignment_settings):
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse("submit_review", args=(article.pk,)), data={"next_step": "next_step"})
+        assert response.status_code == 302
+
+    assert EditorAssignment.objects.get(article=article).editor == expected.editor
+    expected.refresh_from_db()
+    assert expected.active_assignments == 3
+
+
+@pytest.mark.django_db
+def test_assignment_prefers_editors_with_weighted_keywords(
+    admin,
+    article,
+    editors,
+    keywords,
+    coauthors_setting,
+):
+    """The editor with the highest weights for the article's keywords is chosen, regardless of the workload."""
+    parameters = EditorAssignmentParameters.objects.filter(journal=article.journal).order_by("-workload", "-pk")
+    expected, other, *rest = parameters
+    article.keywords.add(keywords[0], keywords[1])
+    EditorKeyword.objects.create(editor_parameters=expected, keyword=keywords[0], weight=3)
+    EditorKeyword.objects.create(editor_parameters=expected, keyword=keywords[1], weight=2)
+    EditorKeyword.objects.create(editor_parameters=other, keyword=keywords[0], weight=4)
+    EditorKeyword.objects.create(editor_parameters=other, keyword=keywords[2], weight=10)
+
+    default_assignment_settings = {None: WJS_ARTICLE_ASSIGNMENT_FUNCTIONS[None]}
+    with override_settings(WJS_ARTICLE_ASSIGNMENT_FUNCTIONS=default_assignment_settings):
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse("submit_review", args=(article.pk,)), data={"next_step": "next_step"})
+        assert response.status_code == 302
+
+    assert EditorAssignment.objects.get(article=article).editor == expected.editor
+
+
+@pytest.mark.django_db
+def test_jcom_assignment_uses_cached_roles(article, directors, editors, special_issue):
+    """Once the cache is warm, assigning an article makes no queries on the roles or on the special issue editors."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from wjs.jcom_profile.events.assignment import jcom_assign_editors_to_articles
+    from wjs.jcom_profile.events.roles import director_ids, special_issue_editor_ids
+
+    assert director_ids(article.journal) == {director.pk for director in directors}
+    assert special_issue_editor_ids(special_issue) == {editor.pk for editor in editors}
+
+    with CaptureQueriesContext(connection) as queries:
+        jcom_assign_editors_to_articles(article=article, request=None)
+    assert EditorAssignment.objects.get(article=article).editor in editors
+    for query in queries:
+        assert "core_role" not in query["sql"]
+        assert "core_accountrole" not in query["sql"]
+        assert "jcom_profile_specialissue_editors" not in query["sql"]
+
+    # The caches are invalidated when the roles or the editors change
+    special_issue.editors.remove(editors[0])
+    assert special_issue_editor_ids(special_issue) == {editor.pk for editor in editors[1:]}
+    directors[0].remove_account_role("director", article.journal)
+    editors[0].add_account_role("director", article.journal)
+    assert director_ids(article.journal) == {editors[0].pk} | {director.pk for director in directors[1:]}
+
+
+@pytest.mark.django_db
+def test_simulate_assignment_has_no_side_effects(article, editors, keywords, tmp_path):
+    """The simulation reports on all the replayed submissions and then rolls everything back."""
+    from django.core import management
+    from submission.models import Article
+
+    report_json = tmp_path / "report.json"
+    stdout = io.StringIO()
+    management.call_command(
+        "simulate_assignment",
+        "--journal-code",
+        article.journal.code,
+        "--function",
+        WJS_ARTICLE_ASSIGNMENT_FUNCTIONS[None],
+        "--generate",
+        "3",
+        "--report-json",
+        str(report_json),
+        stdout=stdout,
+    )
+
+    assert WJS_ARTICLE_ASSIGNMENT_FUNCTIONS[None] in stdout.getvalue()
+    (report,) = json.loads(report_json.read_text())
+    assert report["calls"] == 3
+    assert report["unassigned"] == 0
+    assert sum(report["assignments"].values()) == 3
+    assert sum(report["workloads"].values()) == 3
+    assert list(Article.objects.all()) == [article]
+    assert not EditorAssignment.objects.exists()
+    assert not EditorAssignmentParameters.objects.exclude(active_assignments=0).exists()
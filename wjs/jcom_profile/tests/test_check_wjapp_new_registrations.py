@@ -0,0 +1,24 @@
+"""Test the matching of wjapp's new users with existing Janeway accounts."""
+import pytest
+
+from wjs.jcom_profile.management.commands.check_wjapp_new_registrations import Command
+from wjs.jcom_profile.models import Correspondence
+
+
+@pytest.mark.django_db
+def test_find_similar_accounts(admin, coauthor):
+    """Test that accounts are matched by email or by similar names."""
+    Correspondence.objects.create(account=coauthor, user_cod=1234, source="jcomal")
+    new_users = [
+        {"userCod": 1, "firstName": "Ad", "lastName": "Ádmin", "email": "ad@example.com"},
+        {"userCod": 2, "firstName": "Co", "lastName": "Someone", "email": "coauthor@coauthor.it"},
+        {"userCod": 3, "firstName": "No", "lastName": "Match", "email": "no@example.com"},
+    ]
+
+    similar_accounts = Command().find_similar_accounts(new_users)
+
+    assert similar_accounts[1] == [admin.janeway_account]
+    assert similar_accounts[2] == [coauthor.janeway_account]
+    assert similar_accounts[3] == []
+    # The mappings are prefetched
+    assert similar_accounts[2][0].usercods.all()[0].user_cod == 1234
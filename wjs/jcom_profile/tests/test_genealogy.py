@@ -251,3 +251,43 @@ class TestChildrenExclusion:
         assert parent.title not in content
         assert child.title in content
         assert child.abstract in content
+
+
+@pytest.mark.django_db
+def test_genealogy_lookups_without_per_article_queries(
+    related_and_not_related_articles,
+    article_factory,
+    django_assert_num_queries,
+):
+    """Listings know which articles have children without querying each article; trees are fetched at once."""
+    from submission.models import Article
+
+    from wjs.jcom_profile.genealogy import (
+        genealogy_tree,
+        has_children,
+        with_has_children,
+    )
+    from wjs.jcom_profile.templatetags.wjs_tags import article_has_children
+
+    article, parent, child = related_and_not_related_articles
+    assert article_has_children(parent)
+    with django_assert_num_queries(0):
+        assert not article_has_children(article)
+        assert article_has_children(parent)
+        assert not article_has_children(child)
+
+    with django_assert_num_queries(1):
+        articles = with_has_children(Article.objects.filter(pk__in=[article.pk, parent.pk, child.pk]))
+        annotated = {a.pk: has_children(a) for a in articles}
+    assert annotated == {article.pk: False, parent.pk: True, child.pk: False}
+
+    grandchild = article_factory(title="Grandchild", journal=parent.journal)
+    Genealogy.objects.create(parent=child).children.add(grandchild)
+    with django_assert_num_queries(1):
+        tree = genealogy_tree(parent)
+    assert tree == {parent.pk: [child], child.pk: [grandchild]}
+    assert [kid.genealogy_depth for kid in tree[child.pk]] == [2]
+    assert article_has_children(child)
+
+    parent.genealogy.children.remove(child)
+    assert not article_has_children(parent)
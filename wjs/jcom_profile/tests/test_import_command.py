@@ -198,6 +198,273 @@ e foi amplamente rebatida pela imprensa a partir de evid&#234;ncias cient&#237;f
         assert len(h2_elements) == 1
         assert "Notas" in h2_elements[0].text_content()
 
+    @pytest.mark.django_db
+    def test_find_new_zip_files_skips_in_flight(self, tmp_path):
+        """Test that the watch mode does not pick up zip files that are already being imported."""
+        from wjs.jcom_profile.management.commands.import_from_wjapp import (
+            find_new_zip_files,
+        )
+
+        for name in ("JCOM_0101_2023_A02.zip", "JCOM_0101_2023_A01.zip", "notes.txt"):
+            (tmp_path / name).touch()
+        in_flight = {tmp_path / "JCOM_0101_2023_A02.zip"}
+
+        assert find_new_zip_files(tmp_path, in_flight) == [tmp_path / "JCOM_0101_2023_A01.zip"]
+        assert find_new_zip_files(tmp_path, set()) == [
+            tmp_path / "JCOM_0101_2023_A01.zip",
+            tmp_path / "JCOM_0101_2023_A02.zip",
+        ]
+
+    @pytest.mark.django_db
+    def test_watch_sets_failed_zip_files_aside(self, tmp_path, mocker):
+        """Test that the watch mode does not import again and again a zip file whose import failed."""
+        import threading
+        from concurrent.futures.process import BrokenProcessPool
+
+        from wjs.jcom_profile.management.commands.import_from_wjapp import Command
+
+        watch_dir = tmp_path / "incoming"
+        watch_dir.mkdir()
+        zip_file = watch_dir / "JCOM_0101_2023_A01.zip"
+        zip_file.touch()
+        command = Command()
+        command.options = {"error_dir": str(tmp_path / "failed"), "workers": 1}
+        command.in_flight, command.failed = set(), {}
+        command.in_flight_lock = threading.Lock()
+        command.worker_options = {}
+        command.executor = mocker.Mock()
+        # The pool breaks when a worker dies: a new one is started
+        command.executor.submit.side_effect = BrokenProcessPool()
+        new_executor = mocker.Mock()
+        mocker.patch.object(command, "make_executor", return_value=new_executor)
+
+        command.submit(zip_file)
+        future = new_executor.submit.return_value
+        (done,) = future.add_done_callback.call_args[0]
+        future.exception.return_value = RuntimeError("Cannot import")
+        done(future)
+
+        assert not zip_file.exists()
+        assert (tmp_path / "failed" / "JCOM_0101_2023_A01.zip").exists()
+        assert not command.in_flight
+
+        # A failed zip file that cannot be moved is ignored until it changes
+        zip_file.touch()
+        mocker.patch("shutil.move", side_effect=PermissionError("Read-only"))
+        command.set_aside(zip_file)
+        new_executor.submit.reset_mock()
+        command.submit(zip_file)
+        new_executor.submit.assert_not_called()
+        os.utime(zip_file, (0, 0))
+        command.submit(zip_file)
+        new_executor.submit.assert_called_once()
+
+    @pytest.mark.django_db
+    def test_html_and_epub_galleys_are_set_in_order(self, tmp_path, mocker, monkeypatch):
+        """Test that the galleys generated in parallel are set main source first, then translations in order."""
+        import time
+
+        from wjs.jcom_profile.management.commands import import_from_wjapp
+        from wjs.jcom_profile.management.commands.import_from_wjapp import Command
+
+        def make_xhtml(tex_filename, alternative_tex_filename=None):
+            if tex_filename == "main.tex":
+                # The main source finishes last
+                time.sleep(0.5)
+            if tex_filename == "broken.tex":
+                raise ValueError("Cannot convert")
+            return tex_filename.replace(".tex", ".html")
+
+        monkeypatch.chdir(tmp_path)
+        # The workers are forked: keep the connection of the test transaction open
+        mocker.patch.object(import_from_wjapp, "connections")
+        mocker.patch.object(import_from_wjapp, "read_tex")
+        mocker.patch("jcomassistant.make_xhtml.make", side_effect=make_xhtml)
+        mocker.patch("jcomassistant.make_epub.make", side_effect=lambda html, tex_data: html.replace(".html", ".epub"))
+        command = Command()
+        set_html_galley = mocker.patch.object(command, "set_html_galley")
+        set_epub_galley = mocker.patch.object(command, "set_epub_galley")
+        article = mocker.Mock()
+
+        command.set_html_and_epub_galleys(
+            article,
+            "JCOM_0101_2023_A01",
+            "main.tex",
+            None,
+            ["translation_pt.tex", "broken.tex", "translation_es.tex"],
+        )
+
+        set_html_galley.assert_called_once_with(article, "main.html")
+        assert [call[0][1] for call in set_epub_galley.call_args_list] == [
+            "main.epub",
+            "translation_pt.epub",
+            "translation_es.epub",
+        ]
+
+    @pytest.mark.django_db
+    def test_wjapp_archive_reads_members_without_extracting(self, tmp_path):
+        """Test that the archive reader lists and streams the files of a wjapp zip."""
+        import zipfile
+
+        from wjs.jcom_profile.management.commands.import_from_wjapp import WjappArchive
+
+        zip_file = tmp_path / "JCOM_0101_2023_A01.zip"
+        with zipfile.ZipFile(zip_file, "w") as zip_ref:
+            zip_ref.writestr("JCOM_0101_2023_A01/JCOM_0101_2023_A01.xml", "<article/>")
+            zip_ref.writestr("JCOM_0101_2023_A01/JCOM_0101_2023_A01.pdf", b"%PDF-1.4")
+            zip_ref.writestr("JCOM_0101_2023_A01/src/JCOM_0101_2023_A01.tex", "\\documentclass{jcom}")
+            zip_ref.writestr("JCOM_0101_2023_A01/attachments/data.csv", "a,b")
+
+        with WjappArchive(zip_file) as archive:
+            assert archive.root == "JCOM_0101_2023_A01"
+            assert archive.list_files("*.pdf") == ["JCOM_0101_2023_A01.pdf"]
+            assert archive.list_files("attachments/*") == ["attachments/data.csv"]
+
+            uploaded_file = archive.open_file("attachments/data.csv")
+            assert uploaded_file.name == "data.csv"
+            assert uploaded_file.size == 3
+            assert uploaded_file.read() == b"a,b"
+
+            src_folder = archive.extract_folder("src", tmp_path / "work")
+            assert list(src_folder.iterdir()) == [src_folder / "JCOM_0101_2023_A01.tex"]
+        assert not (tmp_path / "work" / "JCOM_0101_2023_A01" / "attachments").exists()
+
+    @pytest.mark.django_db
+    def test_ingest_galley_images_dedups_by_url_and_content(self, article):
+        """Test that each image is fetched once and that identical images are stored once."""
+        from io import BytesIO
+
+        from django.core.files import File
+        from production.logic import save_galley
+
+        from wjs.jcom_profile.import_utils import fake_request, ingest_galley_images
+
+        galley = save_galley(
+            article,
+            request=fake_request,
+            uploaded_file=File(BytesIO(b"<p/>"), "body.html"),
+            is_galley=True,
+            label="HTML",
+            save_to_disk=True,
+            public=True,
+        )
+        article.render_galley = galley
+        article.save()
+
+        fetched = []
+
+        def fetch(src):
+            fetched.append(src)
+            return b"same bytes"
+
+        html = lxml.html.fromstring('<div><img src="a.png"/><img src="a.png?itok=1"/><img src="b.png"/></div>')
+        ingest_galley_images(article, html, fetch=fetch)
+
+        assert sorted(fetched) == ["a.png", "b.png"]
+        assert galley.images.count() == 1
+        assert [img.attrib["src"] for img in html.findall(".//img")] == ["a.png", "a.png", "a.png"]
+
+    @pytest.mark.django_db
+    def test_import_report_accounts_nested_phases_separately(self):
+        """Test that the time spent in an inner phase is not accounted to the outer one."""
+        import time
+
+        from wjs.jcom_profile.import_utils import ImportReport
+
+        report = ImportReport()
+        with report.phase("body"):
+            with report.phase("images"):
+                time.sleep(0.05)
+        report.add("articles")
+        report.failure("JCOM_0101_2023_A01", ValueError("Boom"))
+
+        data = report.as_dict()
+        assert data["phases"]["images"]["seconds"] >= 0.05
+        assert data["phases"]["body"]["seconds"] < 0.05
+        assert data["counters"] == {"articles": 1, "failures": 1}
+        assert data["failures"] == [{"id": "JCOM_0101_2023_A01", "error": "ValueError: Boom"}]
+        assert "images" in report.as_table()
+
+    @pytest.mark.django_db
+    def test_rewrite_body_applies_rules_in_order_in_one_pass(self):
+        """Test that rules see the changes of the rules before them and that each element is visited once."""
+        from wjs.jcom_profile.import_utils import (
+            BodyRule,
+            DropHowToCite,
+            PromoteHeadings,
+            rewrite_body,
+        )
+
+        class CountVisits(BodyRule):
+            def __init__(self):
+                self.visits = 0
+
+            def visit(self, element):
+                self.visits += 1
+
+        html = lxml.html.fromstring(
+            """<div><h3>Intro</h3><p>text</p><h3>How to cite</h3><p>Cite me</p><!-- note --><h3>End</h3></div>""",
+        )
+        counter = CountVisits()
+        rewrite_body(html, [PromoteHeadings(), DropHowToCite(lang="eng"), counter])
+
+        assert [h2.text for h2 in html.findall(".//h2")] == ["Intro", "End"]
+        assert [p.text for p in html.findall(".//p")] == ["text"]
+        assert counter.visits == 6
+
+    @pytest.mark.django_db
+    def test_drupal_import_skips_unchanged_steps(self, article):
+        """Test that an import step is re-run only when its source data changes."""
+        from wjs.jcom_profile.import_utils import ImportReport
+        from wjs.jcom_profile.management.commands.import_from_drupal import Command
+
+        command = Command()
+        command.options = {"force": False}
+        command.report = ImportReport()
+        command.pending_hashes = {}
+
+        assert command.has_changed(article, "keywords", ["science", "communication"])
+        command.mark_imported(article, "keywords")
+        article.articlewrapper.refresh_from_db()
+        assert "keywords" in article.articlewrapper.import_hashes
+
+        assert not command.has_changed(article, "keywords", ["science", "communication"])
+        assert command.has_changed(article, "keywords", ["science"])
+        command.options["force"] = True
+        assert command.has_changed(article, "keywords", ["science", "communication"])
+
+    @pytest.mark.django_db
+    def test_wjapp_client_fetches_each_pubid_once(self, settings, mocker):
+        """Test that the wjapp client caches prefetched data."""
+        from wjs.jcom_profile.import_utils import WjappClient
+
+        settings.WJAPP_JCOM_APIKEY = "secret"
+        client = WjappClient()
+        fetch = mocker.patch.object(client, "fetch", side_effect=lambda pubid: {"pubId": pubid})
+
+        client.prefetch(["JCOM_0101_2023_A01", "JCOM_0101_2023_A02", "JCOM_0101_2023_A01"])
+        assert fetch.call_count == 2
+        assert client.get("JCOM_0101_2023_A02") == {"pubId": "JCOM_0101_2023_A02"}
+        assert client.get("JCOM_0101_2023_A03") == {"pubId": "JCOM_0101_2023_A03"}
+        assert fetch.call_count == 3
+
+    @pytest.mark.django_db
+    def test_wjapp_client_requests_time_out(self, settings, mocker):
+        """Test that wjapp requests have a timeout and that timed-out prefetches are not cached."""
+        import requests
+
+        from wjs.jcom_profile.import_utils import WjappClient
+
+        settings.WJAPP_JCOM_APIKEY = "secret"
+        client = WjappClient(timeout=3)
+        get = mocker.patch.object(client.session, "get", side_effect=requests.Timeout("Too slow"))
+
+        client.prefetch(["JCOM_0101_2023_A01"])
+        assert get.call_args[1]["timeout"] == 3
+        assert "JCOM_0101_2023_A01" not in client.cache
+        with pytest.raises(requests.Timeout):
+            client.get("JCOM_0101_2023_A01")
+
     @pytest.mark.skip(reason="Una-tantum test. Not related to the application.")
     def test_lxml_from_to_string(self):
         """Verify that lxml tostring method doesn't messes with the spaces."""
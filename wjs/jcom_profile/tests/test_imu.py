@@ -12,6 +12,8 @@ from odf.table import Table, TableCell, TableRow
 from odf.text import P
 from submission.models import Article
 
+from wjs.jcom_profile.models import IMUJob, JCOMProfile
+
 
 def make_ods(data):
     """Return a ods file with the give data.
@@ -605,3 +607,216 @@ def test_si_imu_edit_exising(
     article = Article.objects.first()
     # NB: existing_user is a JCOMProfile, not a core.Account!
     assert article.owner == existing_user.janeway_account
+
+
+@pytest.mark.django_db
+def test_si_imu_creates_accounts_and_contributions_in_bulk(
+    journal,
+    client,
+    admin,
+    fb_special_issue,
+    existing_user,
+):
+    """All accounts and articles are created at once, with profiles, wrappers and frozen authors."""
+    client.force_login(admin)
+    url = reverse("si-imu-2", kwargs={"pk": fb_special_issue.id})
+    data = {
+        "tot_lines": "4",
+        "create_articles_on_import": "on",
+        "type_of_new_articles": fb_special_issue.allowed_sections.first().id,
+        "just_the_name_0": "Main session",
+        "action-3": f"db_{existing_user.pk}",
+        "title_3": "Title ばる",
+    }
+    for index, title in ((1, "Title ふう"), (2, "Title ぴよ")):
+        data.update(
+            {
+                f"first_name_{index}": "Novicius",
+                f"middle_name_{index}": "",
+                f"last_name_{index}": "Fabulator",
+                f"email_{index}": "nfabulator@domain.net",
+                f"institution_{index}": "Affilia",
+                f"title_{index}": title,
+                f"action-{index}": "new",
+            },
+        )
+    response = client.post(url, data)
+    assert response.status_code == 200
+
+    # The new author has been created only once, with its profile
+    author = Account.objects.get(email="nfabulator@domain.net")
+    assert JCOMProfile.objects.filter(janeway_account=author).exists()
+
+    articles = Article.objects.order_by("pk")
+    assert [(article.title, article.owner) for article in articles] == [
+        ("Title ふう", author),
+        ("Title ぴよ", author),
+        ("Title ばる", existing_user),
+    ]
+    for article in articles:
+        assert article.articlewrapper.special_issue == fb_special_issue
+        assert list(article.authors.all()) == [article.owner]
+        assert [frozen.author for frozen in article.frozenauthor_set.all()] == [article.owner]
+    assert set(fb_special_issue.invitees.all()) == {author, existing_user}
+
+
+@pytest.mark.django_db
+def test_si_imu_async_job(
+    journal,
+    client,
+    admin,
+    existing_user,
+    fb_special_issue,
+    settings,
+    mocker,
+):
+    """In async mode, the upload creates a job whose progress can be polled and whose result is shown when done."""
+    from wjs.jcom_profile.management.commands.run_imu_jobs import Command
+
+    settings.WJS_IMU_ASYNC = True
+    client.force_login(admin)
+    url = reverse("si-imu-1", kwargs={"pk": fb_special_issue.id})
+    foglio = (
+        ("Main session", None, None, None, None, None),
+        ("Novicius", None, "Fabulator", "nfabulator@domain.net", "Affilia", "Title ばる"),
+    )
+    data = {
+        "data_file": make_ods(foglio),
+        "create_articles_on_import": "on",
+        "match_euristic": "optimistic",
+        "type_of_new_articles": fb_special_issue.allowed_sections.first().id,
+    }
+    response = client.post(url, data)
+
+    job = IMUJob.objects.get()
+    assert response.status_code == 302
+    assert response.url == job.get_absolute_url()
+    assert job.status == IMUJob.PENDING
+    progress_url = reverse("si-imu-job-progress", kwargs={"pk": fb_special_issue.id, "job_pk": job.pk})
+    assert client.get(progress_url).json()["status"] == IMUJob.PENDING
+
+    # The test runs in a transaction, that close_old_connections would drop
+    close_old_connections = mocker.patch("wjs.jcom_profile.management.commands.run_imu_jobs.close_old_connections")
+    Command().handle(once=True, poll_interval=0)
+    assert close_old_connections.called
+
+    job.refresh_from_db()
+    assert job.status == IMUJob.DONE
+    assert client.get(progress_url).json() == {"status": "done", "progress": 2, "total": 2, "error": ""}
+    response = client.get(job.get_absolute_url())
+    response_content = response.content.decode()
+    assert "Insert Users — Step 2/3" in response_content
+    assert 'name="email_1" value="nfabulator@domain.net"' in response_content
+    html = lxml.html.fromstring(response_content)
+    assert html.find(".//input[@name='action-1'][@checked]").value == "new"
+
+
+@pytest.mark.django_db
+def test_si_imu_new_authors_emails_iequal(
+    journal,
+    client,
+    admin,
+    fb_special_issue,
+    existing_user,
+):
+    """Emails differing only in case belong to the same account, both among the new lines and in the DB."""
+    client.force_login(admin)
+    url = reverse("si-imu-2", kwargs={"pk": fb_special_issue.id})
+    data = {
+        "tot_lines": "3",
+        "create_articles_on_import": "on",
+        "type_of_new_articles": fb_special_issue.allowed_sections.first().id,
+    }
+    lines = (
+        ("Novicius", "Fabulator", "NFABULATOR@DOMAIN.NET", "Affilia", "Title ふう"),
+        ("Novicius", "Fabulator", "nfabulator@domain.net", "Affilia", "Title ぴよ"),
+        (existing_user.first_name, existing_user.last_name, existing_user.email.upper(), "ML", "Title ばる"),
+    )
+    for index, (first_name, last_name, email, institution, title) in enumerate(lines):
+        data.update(
+            {
+                f"first_name_{index}": first_name,
+                f"middle_name_{index}": "",
+                f"last_name_{index}": last_name,
+                f"email_{index}": email,
+                f"institution_{index}": institution,
+                f"title_{index}": title,
+                f"action-{index}": "new",
+            },
+        )
+    response = client.post(url, data)
+    assert response.status_code == 200
+
+    author = Account.objects.get(email__iexact="nfabulator@domain.net")
+    assert Account.objects.filter(email__iexact=existing_user.email).count() == 1
+    articles = Article.objects.order_by("pk")
+    assert [(article.title, article.owner) for article in articles] == [
+        ("Title ふう", author),
+        ("Title ぴよ", author),
+        ("Title ばる", existing_user.janeway_account),
+    ]
+
+
+@pytest.mark.django_db
+def test_si_imu_unknown_section_is_reported_per_line(
+    journal,
+    client,
+    admin,
+    fb_special_issue,
+    existing_user,
+):
+    """An unknown type of article is reported on the lines, instead of failing the whole import."""
+    client.force_login(admin)
+    url = reverse("si-imu-2", kwargs={"pk": fb_special_issue.id})
+    data = {
+        "tot_lines": "2",
+        "create_articles_on_import": "on",
+        "type_of_new_articles": "999999",
+        "action-0": f"db_{existing_user.pk}",
+        "title_0": "Title ばる",
+        "action-1": "skip",
+    }
+    response = client.post(url, data)
+    assert response.status_code == 200
+
+    lines = response.context["view"].extra_context["lines"]
+    assert lines[0]["css_class"] == "error"
+    assert "999999" in lines[0]["msg"]
+    assert lines[1]["msg"] == "SKIP"
+    assert not Article.objects.exists()
+
+
+@pytest.mark.django_db
+def test_si_imu_job_requires_permission(client, existing_user, fb_special_issue):
+    """The pages of an IMU job show uploaded names and emails: only who can manage special issues can see them."""
+    job = IMUJob.objects.create(special_issue=fb_special_issue, step=IMUJob.CHECK)
+    progress_url = reverse("si-imu-job-progress", kwargs={"pk": fb_special_issue.id, "job_pk": job.pk})
+
+    client.force_login(existing_user)
+    assert client.get(progress_url).status_code == 403
+    # As the other pages of the special issues, this one redirects to the login
+    assert client.get(job.get_absolute_url()).status_code == 302
+
+
+@pytest.mark.django_db
+def test_si_imu_job_of_dead_worker_fails(client, admin, fb_special_issue):
+    """A running job whose worker stopped recording progress is marked as failed, so that the page stops polling."""
+    from django.utils import timezone
+
+    long_ago = timezone.now() - timezone.timedelta(seconds=IMUJob.STALE_AFTER + 1)
+    job = IMUJob.objects.create(special_issue=fb_special_issue, step=IMUJob.CHECK)
+    IMUJob.objects.filter(pk=job.pk).update(status=IMUJob.RUNNING, started=long_ago, heartbeat=long_ago)
+    alive = IMUJob.objects.create(special_issue=fb_special_issue, step=IMUJob.CHECK)
+    IMUJob.objects.filter(pk=alive.pk).update(status=IMUJob.RUNNING, started=long_ago, heartbeat=timezone.now())
+
+    client.force_login(admin)
+    progress_url = reverse("si-imu-job-progress", kwargs={"pk": fb_special_issue.id, "job_pk": job.pk})
+    assert client.get(progress_url).json()["status"] == IMUJob.FAILED
+
+    # Workers fail the dead jobs before looking for new ones
+    IMUJob.objects.filter(pk=job.pk).update(status=IMUJob.RUNNING)
+    assert IMUJob.claim_next() is None
+    job.refresh_from_db()
+    alive.refresh_from_db()
+    assert job.status == IMUJob.FAILED
+    assert alive.status == IMUJob.RUNNING
@@ -98,3 +98,29 @@ def test_middleware_honors_settings(journal, client, settings):
     assert response.status_code == 302
     response = client.get("/contact/")
     assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_acknowledgement_is_cached_until_the_profile_is_saved(journal, client, django_assert_num_queries):
+    """Test that the middleware doesn't query the profile at every request, but notices when it changes."""
+    from wjs.jcom_profile.middleware import has_acknowledged_privacy
+
+    shy_user = Account.objects.get_or_create(username="testuser")[0]
+    shy_user.is_active = True
+    shy_user.jcomprofile.gdpr_checkbox = False
+    shy_user.jcomprofile.save()
+    shy_user.save()
+    client.force_login(shy_user)
+
+    response = client.get("/contact/")
+    assert response.status_code == 302
+    with django_assert_num_queries(0):
+        assert not has_acknowledged_privacy(shy_user)
+
+    shy_user.jcomprofile.gdpr_checkbox = True
+    shy_user.jcomprofile.save()
+    response = client.get("/contact/")
+    assert response.status_code == 200
+    user = Account.objects.get(pk=shy_user.pk)
+    with django_assert_num_queries(0):
+        assert has_acknowledged_privacy(user)
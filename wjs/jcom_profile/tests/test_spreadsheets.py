@@ -0,0 +1,32 @@
+"""Test the streaming reader of spreadsheets used by Insert Many Users."""
+import io
+
+from wjs.jcom_profile.spreadsheets import iter_rows
+from wjs.jcom_profile.tests.test_imu import make_ods
+
+NAMES = ("first_name", "middle_name", "last_name", "email", "institution", "title")
+
+
+def test_iter_rows_ods():
+    """Test that empty rows are skipped and that rows are padded to the given names."""
+    data = (
+        ("Main session",),
+        ("", "", ""),
+        ("Novicius", "", "Fabulator", "nfabulator@domain.net", "Affilia", "Title  ばる", "ignored"),
+    )
+    rows = list(iter_rows(make_ods(data), names=NAMES))
+
+    assert [row.Index for row in rows] == [0, 1]
+    assert rows[0].first_name == "Main session"
+    assert rows[0].title == ""
+    assert tuple(rows[1])[1:] == ("Novicius", "", "Fabulator", "nfabulator@domain.net", "Affilia", "Title  ばる")
+
+
+def test_iter_rows_csv():
+    """Test that CSV files are recognized and read."""
+    data = io.BytesIO('Main session,,,,,\nNovicius,,"Fabulator, Jr.",nfabulator@domain.net,Affilia,Title\n'.encode())
+    rows = list(iter_rows(data, names=NAMES))
+
+    assert rows[0].first_name == "Main session"
+    assert rows[1].last_name == "Fabulator, Jr."
+    assert rows[1].title == "Title"
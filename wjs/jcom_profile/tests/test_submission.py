@@ -455,3 +455,28 @@ def test_special_issue_article_show_issue_name_in_article_info(admin, article, c
     assert special_issue.name in [
         td.text.strip() for td in (e.find("td") for e in article_info_table.findall("tr")) if td is not None
     ]
+
+
+@pytest.mark.django_db
+def test_open_special_issues_are_cached_per_journal(admin, coauthor, journal, django_assert_num_queries):
+    """Open special issues are cached per journal; only restricted ones need a query (for the user's invitations)."""
+    from wjs.jcom_profile.special_issues import has_open_special_issue
+
+    yesterday = timezone.now() - timezone.timedelta(1)
+    tomorrow = timezone.now() + timezone.timedelta(1)
+    SpecialIssue.objects.create(name="Future SI", journal=journal, open_date=tomorrow)
+    restricted = SpecialIssue.objects.create(name="Restricted SI", journal=journal, open_date=yesterday)
+    restricted.invitees.add(admin)
+
+    assert has_open_special_issue(journal, admin)
+    with django_assert_num_queries(1):
+        assert not has_open_special_issue(journal, coauthor)
+
+    SpecialIssue.objects.create(name="Open SI", journal=journal, open_date=yesterday, close_date=tomorrow)
+    assert has_open_special_issue(journal, coauthor)
+    with django_assert_num_queries(0):
+        assert has_open_special_issue(journal, coauthor)
+
+    restricted.invitees.remove(admin)
+    SpecialIssue.objects.filter(name="Open SI").delete()
+    assert has_open_special_issue(journal, coauthor)
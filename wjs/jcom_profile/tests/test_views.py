@@ -4,7 +4,7 @@ import pytest
 from core import models as core_models
 from django.conf import settings
 from django.core import mail
-from django.test import Client
+from django.test import Client, override_settings
 from django.test.client import RequestFactory
 from django.urls import reverse
 from submission import models as submission_models
@@ -15,6 +15,7 @@ from wjs.jcom_profile.models import (
     EditorAssignmentParameters,
     EditorKeyword,
     JCOMProfile,
+    OutboxEmail,
 )
 from wjs.jcom_profile.tests.conftest import ASSIGNMENT_PARAMETERS_SPAN, INVITE_BUTTON
 from wjs.jcom_profile.utils import generate_token
@@ -204,6 +205,8 @@ def test_email_are_sent_to_author_and_coauthors_after_article_submission_(
     response = client.post(url, data={"next_step": "next_step"})
     assert response.status_code == 302
     assert len(mail.outbox) == article.authors.count()
+    # Without WJS_OUTBOX_ASYNC the emails go through Janeway's helper
+    assert not OutboxEmail.objects.exists()
 
     for m in mail.outbox:
         if m.subject == f"[{article.journal.code}] Coauthor - Article Submission":
@@ -212,6 +215,92 @@ def test_email_are_sent_to_author_and_coauthors_after_article_submission_(
             assert m.to == [article.correspondence_author.email]
 
 
+@pytest.mark.django_db
+def test_coauthors_emails_are_sent_by_the_outbox_worker(
+    admin,
+    article,
+    coauthors_setting,
+    director_role,
+    mocker,
+):
+    from django.core import management
+
+    # The test runs in a transaction, that close_old_connections would drop
+    mocker.patch("wjs.jcom_profile.management.commands.send_outbox.close_old_connections")
+    client = Client()
+    client.force_login(admin)
+    url = reverse("submit_review", args=(article.pk,))
+    coauthors_subject = f"[{article.journal.code}] Coauthor - Article Submission"
+
+    with override_settings(WJS_OUTBOX_ASYNC=True):
+        response = client.post(url, data={"next_step": "next_step"})
+    assert response.status_code == 302
+    assert not [m for m in mail.outbox if m.subject == coauthors_subject]
+    email = OutboxEmail.objects.get()
+    assert email.status == OutboxEmail.PENDING
+    assert email.article == article
+    # As with Janeway's send_email, the submitting author gets the replies
+    assert email.reply_to == [admin.email]
+    assert email.from_email.startswith(f"{admin.full_name()} <")
+
+    # A failed attempt is retried later
+    from wjs.jcom_profile.outbox import build_message
+
+    failing_build_message = mocker.patch(
+        "wjs.jcom_profile.outbox.build_message",
+        side_effect=ConnectionError("Server down"),
+    )
+    management.call_command("send_outbox", "--once")
+    email.refresh_from_db()
+    assert email.status == OutboxEmail.PENDING
+    assert email.attempts == 1
+    assert email.error == "Server down"
+    failing_build_message.side_effect = build_message
+
+    management.call_command("send_outbox", "--once")
+    assert not [m for m in mail.outbox if m.subject == coauthors_subject]
+
+    OutboxEmail.objects.update(next_attempt=email.created)
+    management.call_command("send_outbox", "--once")
+    email.refresh_from_db()
+    assert email.status == OutboxEmail.SENT
+    assert email.attempts == 2
+    (coauthors_mail,) = [m for m in mail.outbox if m.subject == coauthors_subject]
+    assert coauthors_mail.to == email.recipients
+    assert coauthors_mail.reply_to == [admin.email]
+    assert coauthors_mail.from_email == email.from_email
+    assert coauthors_mail.alternatives[0][0] == email.html
+
+
+@pytest.mark.django_db
+def test_outbox_emails_claimed_by_a_dead_worker_are_sent_again(journal, mocker):
+    from django.core import management
+    from django.utils import timezone
+
+    # The test runs in a transaction, that close_old_connections would drop
+    mocker.patch("wjs.jcom_profile.management.commands.send_outbox.close_old_connections")
+    email = OutboxEmail.objects.create(
+        journal=journal,
+        from_email="wjs@example.org",
+        recipients=["someone@example.org"],
+        subject="Subject",
+        html="<p>Body</p>",
+    )
+    assert OutboxEmail.claim(10) == [email]
+    email.refresh_from_db()
+    assert email.status == OutboxEmail.SENDING
+    # Other workers skip the claimed emails
+    assert OutboxEmail.claim(10) == []
+
+    # The worker died before sending: the email is due again when the claim expires
+    OutboxEmail.objects.update(next_attempt=timezone.now())
+    management.call_command("send_outbox", "--once")
+    email.refresh_from_db()
+    assert email.status == OutboxEmail.SENT
+    assert email.attempts == 1
+    assert mail.outbox[-1].to == ["someone@example.org"]
+
+
 @pytest.mark.parametrize("user_as_main_author", (True, False))
 @pytest.mark.django_db
 def test_submitting_user_is_main_author_when_setting_is_on(
@@ -426,3 +515,75 @@ def test_director_can_change_editor_parameters(journal, roles, admin, editor, ke
     assert editor_parameters.brake_on == brake_on
     for keyword in EditorKeyword.objects.filter(editor_parameters=editor_parameters):
         assert keyword.weight == weight
+
+
+@pytest.mark.django_db
+def test_special_issue_articles_are_listed_with_constant_queries(admin, journal, fb_special_issue):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from wjs.jcom_profile.models import ArticleWrapper
+
+    def add_article(i):
+        article = submission_models.Article.objects.create(
+            journal=journal,
+            title=f"Article {i}",
+            section=fb_special_issue.allowed_sections.first(),
+        )
+        ArticleWrapper.objects.filter(janeway_article=article).update(special_issue=fb_special_issue)
+        for order in range(2):
+            submission_models.FrozenAuthor.objects.create(
+                article=article,
+                first_name=f"First{i}{order}",
+                last_name=f"Last{i}{order}",
+                order=order,
+            )
+
+    def render():
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(queries), response.content.decode()
+
+    client = Client()
+    client.force_login(admin)
+    url = reverse("si-update", kwargs={"pk": fb_special_issue.pk})
+    add_article(0)
+    render()
+    queries_with_one_article, content = render()
+    assert "First00 Last00, First01 Last01" in content
+
+    for i in range(1, 5):
+        add_article(i)
+    queries_with_five_articles, content = render()
+    assert "First41 Last41" in content
+    assert queries_with_five_articles == queries_with_one_article
+
+
+@pytest.mark.django_db
+def test_special_issue_articles_without_frozen_authors_list_their_authors(admin, journal, fb_special_issue):
+    """Articles not snapshotted yet (e.g. imported by the IMU) list their authors, in order."""
+    from wjs.jcom_profile.models import ArticleWrapper
+
+    article = submission_models.Article.objects.create(
+        journal=journal,
+        title="Article without frozen authors",
+        section=fb_special_issue.allowed_sections.first(),
+    )
+    ArticleWrapper.objects.filter(janeway_article=article).update(special_issue=fb_special_issue)
+    first, second, unordered = (
+        core_models.Account.objects.create(
+            username=name, email=f"{name}@example.org", first_name=name, last_name="Lst"
+        )
+        for name in ("Zeta", "Alpha", "Omega")
+    )
+    article.authors.add(first, second, unordered)
+    submission_models.ArticleAuthorOrder.objects.create(article=article, author=first, order=0)
+    submission_models.ArticleAuthorOrder.objects.create(article=article, author=second, order=1)
+
+    client = Client()
+    client.force_login(admin)
+    response = client.get(reverse("si-update", kwargs={"pk": fb_special_issue.pk}))
+
+    assert response.status_code == 200
+    assert "Zeta Lst, Alpha Lst, Omega Lst" in response.content.decode()
@@ -2,7 +2,9 @@
 
 import pytest
 from core.models import Account
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 
 from wjs.jcom_profile.forms import JCOMProfileForm, JCOMRegistrationForm
 from wjs.jcom_profile.models import JCOMProfile
@@ -39,6 +41,49 @@ class TestJCOMProfileProfessionModelTests:
         assert again.username == USERNAME
         assert again.jcomprofile.profession == profession_id
 
+    @pytest.mark.django_db
+    def test_new_account_profile_is_created_with_one_write(self, journal):
+        """Creating an account inserts the account and the profile, without updating the account again."""
+        with CaptureQueriesContext(connection) as queries:
+            account = Account.objects.create(username="new", email="new@example.org", first_name="New")
+        sqls = [query["sql"] for query in queries]
+        assert len([sql for sql in sqls if sql.startswith('INSERT INTO "core_account"')]) == 1
+        assert len([sql for sql in sqls if sql.startswith('INSERT INTO "jcom_profile_jcomprofile"')]) == 1
+        assert not [sql for sql in sqls if sql.startswith('UPDATE "core_account"')]
+        again = Account.objects.get(pk=account.pk)
+        assert again.first_name == "New"
+        assert again.jcomprofile.gdpr_checkbox is False
+
+    @pytest.mark.django_db
+    def test_bulk_created_accounts_get_profiles(self, journal):
+        """Accounts created with bulk_create get their profiles from JCOMProfile.create_for_accounts."""
+        accounts = Account.objects.bulk_create(
+            [Account(username=f"bulk{i}", email=f"bulk{i}@example.org", first_name=f"Bulk{i}") for i in range(3)],
+        )
+        JCOMProfile.create_for_accounts(accounts, gdpr_checkbox=True)
+
+        for i, account in enumerate(accounts):
+            again = Account.objects.get(pk=account.pk)
+            assert again.first_name == f"Bulk{i}"
+            assert again.jcomprofile.gdpr_checkbox is True
+
+    @pytest.mark.django_db
+    def test_create_for_accounts_writes_only_the_profile_columns(self, journal):
+        """JCOMProfile.create_for_accounts relies on the private Manager._insert: pin the query that it runs."""
+        accounts = Account.objects.bulk_create(
+            [Account(username=f"bulk{i}", email=f"bulk{i}@example.org") for i in range(2)],
+        )
+        with CaptureQueriesContext(connection) as context:
+            JCOMProfile.create_for_accounts(accounts)
+
+        (query,) = context.captured_queries
+        sql = query["sql"]
+        assert sql.startswith(f'INSERT INTO "{JCOMProfile._meta.db_table}" ')
+        columns = sql.partition("(")[2].partition(")")[0].split(", ")
+        assert sorted(columns) == sorted(
+            ['"janeway_account_id"', '"profession"', '"gdpr_checkbox"', '"invitation_token"'],
+        )
+
 
 # TODO: test that django admin interface has an inline with the
 # profile extension. Do I really care?
@@ -125,3 +170,33 @@ class TestJCOMWIP:
         field_label = profile._meta.get_field("profession").verbose_name
         expected_label = "profession"
         assert field_label == expected_label
+
+
+@pytest.mark.django_db
+def test_create_missing_article_wrappers(journal, article, special_issue):
+    """Bulk-created articles get their wrappers from the repair command; existing wrappers are left untouched."""
+    import io
+
+    from django.core import management
+    from submission.models import Article
+
+    from wjs.jcom_profile.models import ArticleWrapper
+
+    articles = Article.objects.bulk_create([Article(journal=journal, title=f"Bulk {i}") for i in range(3)])
+    assert not ArticleWrapper.objects.filter(janeway_article__in=articles).exists()
+
+    stdout = io.StringIO()
+    management.call_command("create_missing_article_wrappers", "--dry-run", stdout=stdout)
+    assert stdout.getvalue().startswith("3 articles without wrapper")
+    assert ArticleWrapper.create_missing([]) == 0
+
+    management.call_command("create_missing_article_wrappers", stdout=io.StringIO())
+    assert ArticleWrapper.objects.filter(janeway_article__in=articles, special_issue__isnull=True).count() == 3
+    assert ArticleWrapper.objects.get(janeway_article=article).special_issue == special_issue
+    assert ArticleWrapper.create_missing(articles + [article]) == 0
+
+    # The other fields get their defaults, as with save(): new fields are not forgotten
+    wrapper = ArticleWrapper.objects.get(janeway_article=articles[0])
+    for field in ArticleWrapper._meta.concrete_fields:
+        if not field.primary_key and field.name != "special_issue":
+            assert getattr(wrapper, field.attname) == field.get_default(), field.name
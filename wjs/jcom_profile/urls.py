@@ -82,6 +82,16 @@ urlpatterns = [
         views.IMUStep3.as_view(),
         name="si-imu-3",
     ),
+    url(
+        r"^si/(?P<pk>\d+)/imu-job/(?P<job_pk>\d+)/$",
+        views.IMUJobView.as_view(template_name="admin/core/si_imu_job.html"),
+        name="si-imu-job",
+    ),
+    url(
+        r"^si/(?P<pk>\d+)/imu-job/(?P<job_pk>\d+)/progress$",
+        views.imu_job_progress,
+        name="si-imu-job-progress",
+    ),
     # Issues - override view "journal_issues" from journal.urls
     url(r"^issues/$", views.issues, name="journal_issues"),
     #
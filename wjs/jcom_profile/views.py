@@ -1,11 +1,11 @@
 """My views. Looking for a way to "enrich" Janeway's `edit_profile`."""
+import io
 import re
 from collections import namedtuple
-from dataclasses import dataclass
-from typing import Iterable
+from dataclasses import asdict, dataclass
+from typing import Iterable, List
 from urllib.parse import urlencode
 
-import pandas as pd
 from core import files as core_files
 from core import logic
 from core import models as core_models
@@ -13,16 +13,17 @@ from core.models import Account
 from django.apps import apps
 from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import PermissionRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.mail import send_mail
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.core.validators import validate_email
-from django.db import IntegrityError
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import Lower
 from django.forms import modelformset_factory
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone, translation
@@ -55,14 +56,19 @@ from submission.models import Article, Keyword, Section
 from utils import setting_handler
 from utils.logger import get_logger
 
+from wjs.jcom_profile.author_matching import Match, Person, match_people
+from wjs.jcom_profile.genealogy import with_has_children
 from wjs.jcom_profile.models import (
+    ArticleWrapper,
     EditorAssignmentParameters,
+    IMUJob,
     JCOMProfile,
     Recipient,
     SpecialIssue,
 )
+from wjs.jcom_profile.special_issues import has_open_special_issue
 
-from . import forms
+from . import forms, spreadsheets
 from .drupal_redirect_views import (  # noqa F401
     DrupalAuthorsRedirect,
     DrupalKeywordsRedirect,
@@ -280,7 +286,7 @@ class SpecialIssues(TemplateView):
     def get(self, *args, **kwargs):
         """Show a form to choose the special issue to which one is submitting."""
         article = get_object_or_404(submission_models.Article, pk=kwargs["article_id"])
-        if not SpecialIssue.objects.current_journal().open_for_submission().current_user().exists():
+        if not has_open_special_issue(self.request.journal, self.request.user):
             return redirect(
                 reverse(
                     "submit_info_original",
@@ -369,7 +375,49 @@ class SIDetails(DetailView):
     model = SpecialIssue
 
 
-class SIUpdate(PermissionRequiredMixin, UpdateView):
+class SIArticlesMixin:
+    """Provide the articles of the Special Issue, ready to be listed in a constant number of queries."""
+
+    def get_articles(self):
+        """Return the articles of the Special Issue, with their section and their authors in `listed_authors`.
+
+        The authors are the frozen ones or, for articles not snapshotted
+        yet (e.g. those imported by the IMU), the accounts in `authors`
+        in the order of ArticleAuthorOrder (as Article.author_list does).
+        """
+        frozen_authors = submission_models.FrozenAuthor.objects.order_by("order", "pk")
+        articles = list(
+            Article.objects.filter(articlewrapper__special_issue=self.object)
+            .select_related("section")
+            .prefetch_related(
+                Prefetch("frozenauthor_set", queryset=frozen_authors, to_attr="ordered_frozen_authors"),
+                Prefetch("authors", queryset=Account.objects.order_by("pk")),
+                "articleauthororder_set",
+            )
+            .order_by("pk"),
+        )
+        for article in articles:
+            if article.ordered_frozen_authors:
+                article.listed_authors = article.ordered_frozen_authors
+            else:
+                order = {
+                    author_order.author_id: author_order.order for author_order in article.articleauthororder_set.all()
+                }
+                # Authors without an order (e.g. set by older IMU versions) come last
+                article.listed_authors = sorted(
+                    article.authors.all(),
+                    key=lambda author: (author.pk not in order, order.get(author.pk, 0)),
+                )
+        return articles
+
+    def get_context_data(self, **kwargs):
+        """Add the articles to the context."""
+        context = super().get_context_data(**kwargs)
+        context["articles"] = self.get_articles()
+        return context
+
+
+class SIUpdate(SIArticlesMixin, PermissionRequiredMixin, UpdateView):
     """Update a Special Issue."""
 
     # "add" and "update" operations share the same permissions
@@ -758,38 +806,55 @@ class IMUStep1(TemplateView):
                 context={"form": form},
             )
         data_file = form.files["data_file"]
-        context = {
-            "lines": self.process_data_file(data_file),
-            "special_issue_id": kwargs["pk"],
-            "create_articles_on_import": form.data.get("create_articles_on_import", ""),
-            "type_of_new_articles": form.data.get("type_of_new_articles", ""),
-        }
+        self.data = form.data
+        if settings.WJS_IMU_ASYNC:
+            job = IMUJob.objects.create(
+                special_issue_id=kwargs["pk"],
+                owner=self.request.user if self.request.user.is_authenticated else None,
+                step=IMUJob.CHECK,
+                data=imu_job_data(self.data),
+                data_file=data_file.read(),
+            )
+            return redirect(job.get_absolute_url())
+
+        context = self.get_check_context(self.process_data_file(data_file))
+        context["special_issue_id"] = kwargs["pk"]
         return render(
             self.request,
             template_name="admin/core/si_imu_check.html",
             context=context,
         )
 
-    def process_data_file(self, data_file) -> Iterable[ContributionLine]:
-        """Prepare data file to be presented in the input/merge form."""
+    def get_check_context(self, lines):
+        """Return the context for the input/merge form."""
+        return {
+            "lines": lines,
+            "create_articles_on_import": self.data.get("create_articles_on_import", ""),
+            "type_of_new_articles": self.data.get("type_of_new_articles", ""),
+        }
+
+    def process_data_file(self, data_file, progress=None) -> Iterable[ContributionLine]:
+        """Prepare data file to be presented in the input/merge form.
+
+        This does not depend on the request (only on `self.data`), so
+        that it can run in a background job. `progress` is called with
+        the number of rows processed so far and the total (0 while the
+        rows are being read, since the total is not known in advance).
+        """
         result_lines = []
 
         columns_names = ("first_name", "middle_name", "last_name", "email", "institution", "title")
-        sheet_index = 0
-        df = pd.read_excel(
-            data_file.read(),
-            sheet_name=sheet_index,
-            header=None,
-            names=columns_names,
-            dtype="string",
-            na_filter=False,
-            engine="odf",
-        )
+        # Rows are read one at a time, the whole sheet is never loaded
+        rows = spreadsheets.iter_rows(getattr(data_file, "file", data_file), names=columns_names)
         # Check for extra copy paste: two lines with same author and same title.
         seen_titles = {}
         # Check for uncleare data: two lines with same email, but different author metadata.
         seen_authors = {}
-        for row in df.itertuples(index=True):
+        tot_rows = 0
+        for row in rows:
+            tot_rows += 1
+            if progress:
+                progress(tot_rows, 0)
             line = self.examine_row(row)
             if not isinstance(line, ContributionLine):
                 result_lines.append(line)
@@ -807,12 +872,16 @@ class IMUStep1(TemplateView):
                 seen_titles[line] = line.index
                 seen_authors[line.email] = line
             result_lines.append(line)
+
+        self.make_suggestions([line for line in result_lines if isinstance(line, ContributionLine)])
+        if progress:
+            progress(tot_rows, tot_rows)
         return result_lines
 
     def examine_row(self, row: namedtuple) -> ContributionLine:
-        """Parse a odt row (pandas namedtuple) into a Line.
+        """Parse a spreadsheet row (a namedtuple, see `spreadsheets.iter_rows`) into a Line.
 
-        Line can be a PartitionLine or a ContributionLine with its suggestions.
+        Line can be a PartitionLine or a ContributionLine (without suggestions, see `make_suggestions`).
         """
         # Allow for dirty data: if I'm missing lastname and email,
         # I'll consider this a PartitionLine and just use the
@@ -823,7 +892,7 @@ class IMUStep1(TemplateView):
         # But filter untreatable errors: if the title is missing and
         # the flag `create_articles_on_import` is True, treat the line
         # as an error
-        if self.request.POST["create_articles_on_import"] and not row.title:
+        if self.data.get("create_articles_on_import") and not row.title:
             return ErrorLine(*[*row], error="Missing title!")
 
         # Validate the rest
@@ -841,34 +910,33 @@ class IMUStep1(TemplateView):
             return ErrorLine(validation_form.cleaned_data, error=validation_form.errors)
 
         validation_form.cleaned_data["index"] = row.Index  # watch out for "Index" uppercase "I"
-        line = ContributionLine(validation_form.cleaned_data)
-        line.suggestions = self.make_suggestion(line)
-        return line
-
-    def make_suggestion(self, line: ContributionLine) -> Iterable[SuggestionLine]:
-        """Take a contribution line and find similar users in the DB."""
-        suggestions = []
-        try:
-            # Find similar users in the DB by email
-            # expect at most one and when one is found that is sufficient
-            user_with_same_email = core_models.Account.objects.get(email=line.email)
-        except core_models.Account.DoesNotExist:
-            suggestions = self.make_more_suggestions(line)
-        else:
-            suggestions.append(SuggestionLine(user_with_same_email, line))
-
-        return suggestions
-
-    def make_more_suggestions(self, line: ContributionLine) -> Iterable[SuggestionLine]:
-        """Take a contribution line and find similar users in the DB by euristics."""
+        # Suggestions are looked for later, for all lines at once
+        return ContributionLine(validation_form.cleaned_data)
+
+    def make_suggestions(self, lines: List[ContributionLine]):
+        """Find similar users in the DB for all the given contribution lines at once."""
+        matches = match_people(
+            (
+                Person(key=line.index, first_name=line.first_name, last_name=line.last_name, email=line.email)
+                for line in lines
+            ),
+            ignore_email_case=True,
+        )
+        for line in lines:
+            line.suggestions = self.make_suggestion(line, matches[line.index])
+
+    def make_suggestion(self, line: ContributionLine, matches: List[Match]) -> Iterable[SuggestionLine]:
+        """Take a contribution line and its similar users in the DB, and build suggestions."""
+        # Expect at most one user with the same email and when one is found that is sufficient
+        same_email = [match for match in matches if match.same_email]
+        if same_email:
+            return [SuggestionLine(same_email[0].account, line)]
+        return self.make_more_suggestions(line, matches)
+
+    def make_more_suggestions(self, line: ContributionLine, matches: List[Match]) -> Iterable[SuggestionLine]:
+        """Take a contribution line and its similar users in the DB (by name), and build suggestions."""
         # TODO: use self.form.cleaned_data.match_euristic
-        return [
-            SuggestionLine(suggestion, line)
-            for suggestion in core_models.Account.objects.filter(
-                last_name__iexact=line.last_name,
-                first_name__istartswith=line.first_name[0],
-            )
-        ]
+        return [SuggestionLine(match.account, line) for match in matches]
 
 
 imu_edit_formset_factory = modelformset_factory(
@@ -895,9 +963,11 @@ class IMUStep2(TemplateView):
         """
         # Procedure
         # - while scanning received lines
+        #   - collect the accounts to create and the contributions (articles) to create
         #   - accumulate instances of core.Accounts to edit
         #   - also accumulate ODT data, paired with the Accounts
         # - after scanning all lines
+        #   - create all accounts and articles at once (bulk_create, in one transaction)
         #   - build a queryset ...filter(pk__in( [pk for pk in line] ) )
         #   - use the suggestion pk as key in a dictionary of ODT lines
         # - in the template
@@ -907,36 +977,135 @@ class IMUStep2(TemplateView):
         #     - layout the ODT data
         #     - layout the form
 
+        self.data = self.request.POST
+        self.journal = self.request.journal
+        if settings.WJS_IMU_ASYNC:
+            job = IMUJob.objects.create(
+                special_issue_id=kwargs["pk"],
+                owner=self.request.user if self.request.user.is_authenticated else None,
+                step=IMUJob.IMPORT,
+                data=imu_job_data(self.data),
+            )
+            return redirect(job.get_absolute_url())
+
+        self.import_lines(kwargs["pk"])
+        formset = imu_edit_formset_factory(queryset=core_models.Account.objects.filter(pk__in=self.accounts_to_edit))
+        return self.render_to_response(
+            context=self.get_context_data(
+                formset=formset,
+                accounts_new_data=self.accounts_new_data,
+                special_issue_id=kwargs["pk"],
+            ),
+        )
+
+    def import_lines(self, special_issue_pk, progress=None):
+        """Process all lines (from `self.data`) and create what is necessary.
+
+        This does not depend on the request, so that it can run in a
+        background job. `progress` is called with the number of lines
+        processed so far and the total.
+
+        Every line is validated before anything is written, so that
+        the problems of a line are reported on that line (in
+        `self.extra_context["lines"]`) and don't stop the others.
+        """
         # fetch the special issue object; it will be used by all
         # methods that create an article
-        self.special_issue = SpecialIssue.objects.get(pk=kwargs["pk"])
+        self.special_issue = SpecialIssue.objects.get(pk=special_issue_pk)
 
         # collect accounts we should present for editing and the
         # relative new possible data
         self.accounts_to_edit = []
         self.accounts_new_data = {}
 
+        # collect accounts and articles that should be created
+        self.new_accounts = []
+        self.contributions = []
+
         # TODO: validate... single fields? somthing else???
         self.extra_context = {"lines": [], "edit_suggestions": {}}
-        for i in range(int(self.request.POST["tot_lines"])):
-            if f"just_the_name_{i}" in self.request.POST:
+        actions = {}
+        for i in range(int(self.data["tot_lines"])):
+            if f"just_the_name_{i}" in self.data:
                 # this is just a partition, nothing to do
-                self.extra_context["lines"].append(f"{i} - PARTITION")
+                actions[i] = None
                 continue
-            self.process(i)
+            actions[i] = self.data.get(f"action-{i}", "unspecified")
 
-        # save the special issue because invitees have probably been added
-        self.special_issue.save()
-        formset = imu_edit_formset_factory(queryset=core_models.Account.objects.filter(pk__in=self.accounts_to_edit))
-        return self.render_to_response(
-            context=self.get_context_data(
-                formset=formset,
-                accounts_new_data=self.accounts_new_data,
-                special_issue_id=kwargs["pk"],
-            ),
+        self.prefetch_accounts(actions)
+        self.get_section()
+        for i, action_suggestion in actions.items():
+            if action_suggestion is None:
+                self.extra_context["lines"].append(f"{i} - PARTITION")
+            else:
+                self.process(i, action_suggestion)
+            if progress:
+                progress(i + 1, len(actions))
+
+        try:
+            with transaction.atomic():
+                self.create_accounts()
+                self.create_articles()
+                self.special_issue.invitees.add(*{author for index, author, title, line in self.contributions})
+        except IntegrityError as e:
+            # The lines have been validated, but somebody else may have
+            # created the same accounts in the meantime
+            logger.exception(f"Cannot import lines in special issue {special_issue_pk}")
+            for index, author, title, line in self.contributions:
+                line.update(msg=f"ERROR - {e}", css_class="error")
+            self.accounts_to_edit = []
+            self.accounts_new_data = {}
+
+    def prefetch_accounts(self, actions):
+        """Fetch at once all the existing accounts that the lines refer to (by pk or by email).
+
+        Emails are compared case-insensitively, as in the first step
+        (see IMUStep1.make_suggestions).
+        """
+        pks = set()
+        emails = set()
+        for index, action_suggestion in actions.items():
+            if action_suggestion is None:
+                continue
+            action, *suggestion = action_suggestion.split("_")
+            if action == "new":
+                emails.add(self.data.get(f"email_{index}", "").lower())
+            elif suggestion and suggestion[0].isdigit():
+                pks.add(int(suggestion[0]))
+        self.accounts_by_pk = core_models.Account.objects.in_bulk(pks)
+        self.accounts_by_email = {}
+        # New accounts get their email as username (see action_new)
+        self.taken_usernames = set()
+        accounts = core_models.Account.objects.annotate(email_lower=Lower("email")).filter(
+            Q(email_lower__in=emails) | Q(username__in=emails),
         )
+        for account in accounts:
+            if account.email_lower in emails:
+                self.accounts_by_email.setdefault(account.email_lower, account)
+            self.taken_usernames.add(account.username)
+
+    def get_section(self):
+        """Look up the section of the new articles (the same for all), if articles must be created."""
+        self.section = None
+        self.section_error = None
+        if not self.data.get("create_articles_on_import", False):
+            return
+        try:
+            self.section = submission_models.Section.objects.get(
+                pk=int(self.data["type_of_new_articles"]),
+                journal=self.journal,
+            )
+        except (KeyError, ValueError, submission_models.Section.DoesNotExist):
+            self.section_error = f'unknown type of article "{self.data.get("type_of_new_articles", "")}"'
+
+    def get_account(self, pk):
+        """Get an existing account among the prefetched ones."""
+        try:
+            return self.accounts_by_pk[pk]
+        except KeyError:
+            raise core_models.Account.DoesNotExist(f"Account {pk} does not exist.")
 
-    def process(self, index: int):
+    def process(self, index: int, action_suggestion: str):
         """Process line "index"."""
         # Actions come in these forms:
         # - action-1 → skip
@@ -944,7 +1113,6 @@ class IMUStep2(TemplateView):
         # - action-1 → db_123
         # - action-1 → edit_123
         # Here we just find to where we should dispatch the processing to.
-        action_suggestion = self.request.POST.get(f"action-{index}", "unspecified")
         action, *suggestion = action_suggestion.split("_")
         func = getattr(self, f"action_{action}")
         try:
@@ -959,19 +1127,20 @@ class IMUStep2(TemplateView):
         """Create a contribution and a new core.Account."""
         # It is possible that a new author has multiple entries in the
         # spreadsheet. The first time that we encounter him, it's easy
-        # and we create him, but, subsequent encounters should trigger
-        # an IntegrityError because the email is constrained as
-        # unique. If this happens, to be safe, we must assume that
-        # there might be some differences between the two lines of
-        # this contributor (misspelled name, different
+        # and we create him, but, subsequent encounters find the
+        # account that we are going to create (the email is
+        # constrained as unique, and compared case-insensitively). If
+        # this happens, to be safe, we must
+        # assume that there might be some differences between the two
+        # lines of this contributor (misspelled name, different
         # affiliation,...), and so we check.
         form = forms.IMUHelperForm(
             data={
-                "first_name": self.request.POST[f"first_name_{index}"],
-                "middle_name": self.request.POST[f"middle_name_{index}"],
-                "last_name": self.request.POST[f"last_name_{index}"],
-                "email": self.request.POST[f"email_{index}"],
-                "institution": self.request.POST[f"institution_{index}"],
+                "first_name": self.data[f"first_name_{index}"],
+                "middle_name": self.data[f"middle_name_{index}"],
+                "last_name": self.data[f"last_name_{index}"],
+                "email": self.data[f"email_{index}"],
+                "institution": self.data[f"institution_{index}"],
             },
         )
         if not form.is_valid():
@@ -982,32 +1151,43 @@ class IMUStep2(TemplateView):
             )
             return
 
-        author, created = core_models.Account.objects.get_or_create(email=form.cleaned_data["email"])
-        if created:
-            author.first_name = form.cleaned_data["first_name"]
-            author.middle_name = form.cleaned_data["middle_name"]
-            author.last_name = form.cleaned_data["last_name"]
-            author.institution = form.cleaned_data["institution"]
-            author.save()
-        else:
-            if (
-                author.first_name != form.cleaned_data["first_name"]
-                or author.middle_name != form.cleaned_data["middle_name"]
-                or author.last_name != form.cleaned_data["last_name"]
-                or author.institution != form.cleaned_data["institution"]
-            ):
+        email = form.cleaned_data["email"].lower()
+        author = self.accounts_by_email.get(email)
+        if author is None:
+            if email in self.taken_usernames:
                 self.add_line(
                     index,
-                    msg=f'ERROR - different data for existing user with email "{form.cleaned_data["email"]}".',
+                    msg=f'ERROR - the username "{email}" belongs to an account with a different email.',
                     css_class="error",
                 )
                 return
-        # No need to check if `author` is already in
-        # `special_issue.invitees` (django takes care 🎉)
-        self.special_issue.invitees.add(author)
+            author = core_models.Account(
+                email=form.cleaned_data["email"],
+                username=email,
+                first_name=form.cleaned_data["first_name"],
+                middle_name=form.cleaned_data["middle_name"],
+                last_name=form.cleaned_data["last_name"],
+                institution=form.cleaned_data["institution"],
+            )
+            self.add_contribution(index, author, "NEW - {article}")
+            self.accounts_by_email[email] = author
+            self.new_accounts.append(author)
+            return
 
-        article = self.create_article(index, author)
-        self.add_line(index, msg=f"NEW - {article}")
+        if (
+            author.first_name != form.cleaned_data["first_name"]
+            or author.middle_name != form.cleaned_data["middle_name"]
+            or author.last_name != form.cleaned_data["last_name"]
+            or author.institution != form.cleaned_data["institution"]
+        ):
+            self.add_line(
+                index,
+                msg=f'ERROR - different data for existing user with email "{form.cleaned_data["email"]}".',
+                css_class="error",
+            )
+            return
+
+        self.add_contribution(index, author, "NEW - {article}")
 
     def action_skip(self, index):
         """Skip."""
@@ -1015,16 +1195,13 @@ class IMUStep2(TemplateView):
 
     def action_db(self, index, pk):
         """Create a contribution and using the suggested author (core.Account) as-is."""
-        author = core_models.Account.objects.get(pk=pk)
-        self.special_issue.invitees.add(author)
-        article = self.create_article(index, author)
-        self.add_line(index, msg=f"DB - {article} by {author}")
+        author = self.get_account(pk)
+        self.add_contribution(index, author, "DB - {article} by {author}")
 
     def action_edit(self, index, pk):
         """Create a contribution and prepare the suggested author (core.Account) for editing."""
-        author = core_models.Account.objects.get(pk=pk)
-        self.special_issue.invitees.add(author)
-        article = self.create_article(index, author)
+        author = self.get_account(pk)
+        self.add_contribution(index, author, "EDIT - {article} by {author}", must_edit=True)
 
         # I'd prefer to use the author directly, but the formset wants
         # a queryset, not a list...
@@ -1032,14 +1209,13 @@ class IMUStep2(TemplateView):
         self.accounts_to_edit.append(pk)
 
         odsline = ODSLine(
-            first_name=self.request.POST[f"first_name_{index}"],
-            middle_name=self.request.POST[f"middle_name_{index}"],
-            last_name=self.request.POST[f"last_name_{index}"],
-            email=self.request.POST[f"email_{index}"],
-            institution=self.request.POST[f"institution_{index}"],
+            first_name=self.data[f"first_name_{index}"],
+            middle_name=self.data[f"middle_name_{index}"],
+            last_name=self.data[f"last_name_{index}"],
+            email=self.data[f"email_{index}"],
+            institution=self.data[f"institution_{index}"],
         )
         self.accounts_new_data[pk] = odsline
-        self.add_line(index, msg=f"EDIT - {article} by {author}", must_edit=True)
 
     def action_unspecified(self, index):
         """Report 💩."""
@@ -1049,36 +1225,94 @@ class IMUStep2(TemplateView):
         """Add a line of data in extra_context."""
         kwargs["index"] = index
         self.extra_context["lines"].append(kwargs)
+        return kwargs
 
-    def create_article(self, index, author):
-        """Create an article with data from the given index and author."""
-        if not self.request.POST.get("create_articles_on_import", False):
-            return
-        article = submission_models.Article(
-            # do I need this? last_modified=now()
-            journal=self.request.journal,
-            # TODO: use only cleaned data (don't use POST directly)
-            title=self.request.POST[f"title_{index}"],
-            owner=author,
+    def add_contribution(self, index, author, msg, **kwargs):
+        """Record a contribution of the given author, to be created later.
+
+        The message is formatted when the article has been created.
+        Raise an exception, and record nothing, if the article cannot be
+        created.
+        """
+        title = None
+        if self.data.get("create_articles_on_import", False):
+            if self.section is None:
+                raise ValueError(self.section_error)
             # TODO: use only cleaned data (don't use POST directly)
-            section=submission_models.Section.objects.get(
-                pk=self.request.POST["type_of_new_articles"],
-                journal=self.request.journal,
-            ),
-            # TODO: enable choosing a license in the first step
-            license=submission_models.Licence.objects.filter(journal=self.request.journal).first(),
-            date_started=timezone.now(),
-            # date_submitted=... NOPE! this indicates when the submission has been "finished"
-            # TODO: find out which "steps" we can choose from and their relation with "stages"
-            current_step=1,
-            stage=submission_models.STAGE_UNSUBMITTED,
+            title = self.data[f"title_{index}"]
+        line = self.add_line(index, msg=msg, **kwargs)
+        self.contributions.append((index, author, title, line))
+
+    def create_accounts(self):
+        """Create the new accounts (and their JCOM profiles)."""
+        if not self.new_accounts:
+            return
+        # bulk_create skips the post_save signals that create the profiles
+        core_models.Account.objects.bulk_create(self.new_accounts)
+        JCOMProfile.create_for_accounts(self.new_accounts)
+
+    def create_articles(self):
+        """Create the articles of all contributions, with data from the given index and author."""
+        if not self.data.get("create_articles_on_import", False):
+            for index, author, title, line in self.contributions:
+                line["msg"] = line["msg"].format(article=None, author=author)
+            return
+
+        # Same licence for all articles
+        # TODO: enable choosing a license in the first step
+        licence = submission_models.Licence.objects.filter(journal=self.journal).first()
+
+        articles = submission_models.Article.objects.bulk_create(
+            [
+                submission_models.Article(
+                    # do I need this? last_modified=now()
+                    journal=self.journal,
+                    title=title,
+                    owner=author,
+                    section=self.section,
+                    license=licence,
+                    date_started=timezone.now(),
+                    # date_submitted=... NOPE! this indicates when the submission has been "finished"
+                    # TODO: find out which "steps" we can choose from and their relation with "stages"
+                    current_step=1,
+                    stage=submission_models.STAGE_UNSUBMITTED,
+                )
+                for index, author, title, line in self.contributions
+            ],
+        )
+
+        # bulk_create skips the post_save signal that creates the wrappers
+        ArticleWrapper.create_missing(articles, special_issue=self.special_issue)
+        submission_models.Article.authors.through.objects.bulk_create(
+            [
+                submission_models.Article.authors.through(article=article, account=author)
+                for article, (index, author, title, line) in zip(articles, self.contributions)
+            ],
         )
-        article.save()  # why doesn't it get saved using `create`?!?
-        article.authors.set([author])
-        article.articlewrapper.special_issue = self.special_issue
-        article.articlewrapper.save()
-        article.save()
-        return article
+        submission_models.ArticleAuthorOrder.objects.bulk_create(
+            [
+                submission_models.ArticleAuthorOrder(article=article, author=author, order=0)
+                for article, (index, author, title, line) in zip(articles, self.contributions)
+            ],
+        )
+        submission_models.FrozenAuthor.objects.bulk_create(
+            [
+                submission_models.FrozenAuthor(
+                    article=article,
+                    author=author,
+                    first_name=author.first_name,
+                    middle_name=author.middle_name,
+                    last_name=author.last_name,
+                    institution=author.institution,
+                    department=author.department,
+                    order=0,
+                )
+                for article, (index, author, title, line) in zip(articles, self.contributions)
+            ],
+        )
+
+        for article, (index, author, title, line) in zip(articles, self.contributions):
+            line["msg"] = line["msg"].format(article=article, author=author)
 
 
 # TODO: protect me!
@@ -1095,6 +1329,102 @@ class IMUStep3(TemplateView):
         return redirect(to=reverse("si-update", kwargs={"pk": kwargs["pk"]}))
 
 
+def imu_job_data(data) -> dict:
+    """Return the posted data that an IMU job needs."""
+    return {key: value for key, value in data.items() if key != "csrfmiddlewaretoken"}
+
+
+def imu_line_to_dict(line) -> dict:
+    """Serialize a line of the input/merge form, so that it can be kept in an IMUJob.
+
+    The templates can use the dictionary as they would use the line.
+    """
+    if isinstance(line, PartitionLine):
+        return {"index": line.index, "name": line.name, "is_just_a_name": True}
+    if isinstance(line, ErrorLine):
+        data = asdict(line)
+        if hasattr(line.error, "as_text"):
+            data["error"] = line.error.as_text()
+        return data
+    data = {
+        key: value
+        for key, value in vars(line).items()
+        if key in ("first_name", "middle_name", "last_name", "email", "institution", "title", "index", "disable_new")
+    }
+    data["suggestions"] = [asdict(suggestion) for suggestion in line.suggestions]
+    return data
+
+
+def run_imu_job(job: IMUJob):
+    """Run the given IMU job, recording its progress and result."""
+    if job.step == IMUJob.CHECK:
+        step = IMUStep1()
+        step.data = job.data
+        lines = step.process_data_file(io.BytesIO(job.data_file), progress=job.set_progress)
+        result = step.get_check_context([imu_line_to_dict(line) for line in lines])
+    else:
+        step = IMUStep2()
+        step.data = job.data
+        step.journal = job.special_issue.journal
+        step.import_lines(job.special_issue_id, progress=job.set_progress)
+        result = {
+            "lines": step.extra_context["lines"],
+            "accounts_to_edit": step.accounts_to_edit,
+            "accounts_new_data": {pk: odsline._asdict() for pk, odsline in step.accounts_new_data.items()},
+        }
+    job.finish(result=result)
+
+
+class IMUJobView(PermissionRequiredMixin, TemplateView):
+    """Insert Many Users - show the progress of a background job and then its result."""
+
+    permission_required = "jcom_profile.add_specialissue"
+
+    def get(self, *args, **kwargs):
+        """Show the result of the job if it is done, otherwise its progress."""
+        IMUJob.fail_stale(pk=kwargs["job_pk"])
+        job = get_object_or_404(IMUJob, pk=kwargs["job_pk"], special_issue_id=kwargs["pk"])
+        if job.status != IMUJob.DONE:
+            return render(self.request, template_name=self.template_name, context={"job": job})
+
+        if job.step == IMUJob.CHECK:
+            context = dict(job.result, special_issue_id=kwargs["pk"])
+            return render(self.request, template_name="admin/core/si_imu_check.html", context=context)
+
+        # The template of step 2 reads the lines from the view
+        self.extra_context = {"lines": job.result["lines"]}
+        accounts_new_data = {int(pk): ODSLine(**odsline) for pk, odsline in job.result["accounts_new_data"].items()}
+        formset = imu_edit_formset_factory(
+            queryset=core_models.Account.objects.filter(pk__in=job.result["accounts_to_edit"]),
+        )
+        return render(
+            self.request,
+            template_name="admin/core/si_imu_imported.html",
+            context={
+                "view": self,
+                "formset": formset,
+                "accounts_new_data": accounts_new_data,
+                "special_issue_id": kwargs["pk"],
+            },
+        )
+
+
+@permission_required("jcom_profile.add_specialissue", raise_exception=True)
+def imu_job_progress(request, pk, job_pk):
+    """Return the progress of an IMU job (polled by the job's page)."""
+    # Let the page stop polling if the worker died
+    IMUJob.fail_stale(pk=job_pk)
+    job = get_object_or_404(IMUJob, pk=job_pk, special_issue_id=pk)
+    return JsonResponse(
+        {
+            "status": job.status,
+            "progress": job.progress,
+            "total": job.total,
+            "error": job.error,
+        },
+    )
+
+
 class NewsletterParametersUpdate(UserPassesTestMixin, UpdateView):
     model = Recipient
     template_name = "elements/accounts/edit_newsletters_subscription.html"
@@ -1269,7 +1599,7 @@ def filter_articles(request, section=None, keyword=None, author=None):
         paragraph = _("All author's publications are listed below.")
         filtered_object = get_object_or_404(Account, pk=author).full_name()
 
-    filtered_articles = Article.objects.filter(**filters).order_by("-date_published")
+    filtered_articles = with_has_children(Article.objects.filter(**filters)).order_by("-date_published")
 
     paginator = Paginator(filtered_articles, 10)
     page = request.GET.get("page")
@@ -1376,7 +1706,7 @@ def search(request):
             date_published__year=year,
         )
 
-    articles = articles.distinct().order_by(sort)
+    articles = with_has_children(articles.distinct()).order_by(sort)
     keywords = (
         submission_models.Keyword.objects.filter(
             article__journal=request.journal,